@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request, Response
 from sse_starlette.sse import EventSourceResponse
+import asyncio
+import gzip
 import json
+from typing import Literal, Optional
 import pandas as pd
 
-import yfinance as yf
-
 from app.models.requests import ScanRequest
+from app.models.responses import HeatmapResponse
 from app.services.scanner_service import scanner_service
 from app.services.cache_service import cache_service
+from app.services.chain_cache import option_chain_cache
+from app.services.prefetch_service import prefetch_scheduler
+from app.services.scan_result_cache import scan_result_cache
+from app.services.market_data import market_data
+from app.services.concurrency import route_offloader, scan_limiter, upstream_rate_limiter
 from app.services.heatmap_service import heatmap_service
+from app.services.price_store import price_store
+from app.services.ranking import TopK
+from app.services.ticker_data import ticker_data
+from app.utils import fast_json
+from app.utils.sse import batch_scan_events
 
 
 router = APIRouter(prefix="/api/v1")
@@ -33,6 +45,26 @@ def df_to_dict(df):
             return []
 
 
+def _ticker_attribute(ticker: str, attribute: str, key: str, convert=df_to_dict) -> dict:
+    """Read one yf.Ticker attribute (a blocking upstream call) into a response."""
+    try:
+        value = market_data.ticker_attribute(ticker, attribute)
+        return {
+            "ticker": ticker,
+            key: convert(value) if convert else value,
+        }
+    except Exception as e:
+        return {"ticker": ticker, "error": str(e), key: None}
+
+
+async def _fetched(awaitable):
+    """Await a dataset, returning rather than raising its upstream error."""
+    try:
+        return await awaitable
+    except Exception as e:
+        return e
+
+
 # =============================================================================
 # Stock Info Endpoints
 # =============================================================================
@@ -40,8 +72,7 @@ def df_to_dict(df):
 @router.get("/stock/{ticker}", tags=["Stock Info"])
 async def get_stock_info(ticker: str):
     """Get comprehensive stock info via yf.Ticker().info"""
-    t = yf.Ticker(ticker)
-    info = t.info
+    info = await ticker_data.info(ticker)
     return {
         "ticker": ticker,
         "price": info.get("regularMarketPrice") or info.get("currentPrice"),
@@ -53,51 +84,37 @@ async def get_stock_info(ticker: str):
 
 @router.get("/stock/{ticker}/price", tags=["Stock Info"])
 async def get_stock_price(ticker: str):
-    """Get current stock price via yf.download()"""
-    data = yf.download(ticker, period="1d", progress=False, auto_adjust=False)
-    if data.empty:
+    """Get current stock price via yf.download(), through the per-ticker price cache"""
+    prices, _ = await price_store.get([ticker.upper()], run=route_offloader.run)
+    price = prices.get(ticker.upper())
+    if price is None:
         return {"ticker": ticker, "price": None, "error": "No data"}
-    price = data["Close"].iloc[-1]
     return {
         "ticker": ticker,
-        "price": float(price),
+        "price": price,
     }
 
 
 @router.get("/stocks/batch", tags=["Stock Info"])
 async def get_batch_prices(tickers: str = Query(..., description="Comma-separated tickers")):
-    """Get batch prices for multiple tickers via yf.download()"""
+    """
+    Get batch prices for multiple tickers via yf.download(). Prices are
+    cached per ticker; only tickers without a fresh one are downloaded.
+    """
     ticker_list = [t.strip().upper() for t in tickers.split(",")]
-    data = yf.download(ticker_list, period="1d", progress=False, threads=True, auto_adjust=False)
-
-    result = {}
-    if data.empty:
-        return {"tickers": result}
-
-    if isinstance(data.columns, pd.MultiIndex):
-        close_data = data["Close"]
-        for ticker in ticker_list:
-            try:
-                if ticker in close_data.columns:
-                    price = close_data[ticker].iloc[-1]
-                    result[ticker] = float(price) if pd.notna(price) else None
-                else:
-                    result[ticker] = None
-            except (KeyError, IndexError):
-                result[ticker] = None
-    else:
-        price = data["Close"].iloc[-1]
-        result[ticker_list[0]] = float(price) if pd.notna(price) else None
-
-    return {"tickers": result}
+    prices, _ = await price_store.get(ticker_list, run=route_offloader.run)
+    return {"tickers": {ticker: prices.get(ticker) for ticker in ticker_list}}
 
 
 @router.get("/stock/{ticker}/calendar", tags=["Stock Info"])
 async def get_earnings_calendar(ticker: str):
     """Get upcoming events calendar (earnings date, dividend date, etc.)"""
-    t = yf.Ticker(ticker)
+    return await route_offloader.run(_earnings_calendar, ticker)
+
+
+def _earnings_calendar(ticker: str) -> dict:
     try:
-        calendar = t.calendar
+        calendar = market_data.calendar(ticker)
         return {
             "ticker": ticker,
             "calendar": calendar,
@@ -117,18 +134,16 @@ async def get_earnings_calendar(ticker: str):
 @router.get("/stock/{ticker}/options/expirations", tags=["Options"])
 async def get_option_expirations(ticker: str):
     """Get available option expiration dates"""
-    t = yf.Ticker(ticker)
     return {
         "ticker": ticker,
-        "expirations": list(t.options),
+        "expirations": await route_offloader.run(option_chain_cache.get_expirations, ticker),
     }
 
 
 @router.get("/stock/{ticker}/options/chain/{expiration}", tags=["Options"])
 async def get_option_chain(ticker: str, expiration: str):
     """Get full options chain for a specific expiration date"""
-    t = yf.Ticker(ticker)
-    chain = t.option_chain(expiration)
+    chain = await route_offloader.run(option_chain_cache.get_chain, ticker, expiration)
     return {
         "ticker": ticker,
         "expiration": expiration,
@@ -144,57 +159,25 @@ async def get_option_chain(ticker: str, expiration: str):
 @router.get("/stock/{ticker}/recommendations", tags=["Analyst"])
 async def get_recommendations(ticker: str):
     """Get analyst recommendations history"""
-    t = yf.Ticker(ticker)
-    try:
-        recommendations = t.recommendations
-        return {
-            "ticker": ticker,
-            "recommendations": df_to_dict(recommendations),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "recommendations": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "recommendations", "recommendations")
 
 
 @router.get("/stock/{ticker}/recommendations/summary", tags=["Analyst"])
 async def get_recommendations_summary(ticker: str):
     """Get summary of analyst recommendations (buy/hold/sell counts)"""
-    t = yf.Ticker(ticker)
-    try:
-        summary = t.recommendations_summary
-        return {
-            "ticker": ticker,
-            "recommendations_summary": df_to_dict(summary),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "recommendations_summary": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "recommendations_summary", "recommendations_summary")
 
 
 @router.get("/stock/{ticker}/upgrades-downgrades", tags=["Analyst"])
 async def get_upgrades_downgrades(ticker: str):
     """Get recent analyst upgrades and downgrades"""
-    t = yf.Ticker(ticker)
-    try:
-        upgrades_downgrades = t.upgrades_downgrades
-        return {
-            "ticker": ticker,
-            "upgrades_downgrades": df_to_dict(upgrades_downgrades),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "upgrades_downgrades": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "upgrades_downgrades", "upgrades_downgrades")
 
 
 @router.get("/stock/{ticker}/price-targets", tags=["Analyst"])
 async def get_analyst_price_targets(ticker: str):
     """Get analyst price targets (low, high, mean, current)"""
-    t = yf.Ticker(ticker)
-    try:
-        price_targets = t.analyst_price_targets
-        return {
-            "ticker": ticker,
-            "price_targets": price_targets,
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "price_targets": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "analyst_price_targets", "price_targets", convert=None)
 
 
 # =============================================================================
@@ -204,71 +187,31 @@ async def get_analyst_price_targets(ticker: str):
 @router.get("/stock/{ticker}/estimates/earnings", tags=["Estimates"])
 async def get_earnings_estimate(ticker: str):
     """Get earnings estimates"""
-    t = yf.Ticker(ticker)
-    try:
-        earnings_estimate = t.earnings_estimate
-        return {
-            "ticker": ticker,
-            "earnings_estimate": df_to_dict(earnings_estimate),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "earnings_estimate": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "earnings_estimate", "earnings_estimate")
 
 
 @router.get("/stock/{ticker}/estimates/revenue", tags=["Estimates"])
 async def get_revenue_estimate(ticker: str):
     """Get revenue estimates"""
-    t = yf.Ticker(ticker)
-    try:
-        revenue_estimate = t.revenue_estimate
-        return {
-            "ticker": ticker,
-            "revenue_estimate": df_to_dict(revenue_estimate),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "revenue_estimate": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "revenue_estimate", "revenue_estimate")
 
 
 @router.get("/stock/{ticker}/estimates/eps-trend", tags=["Estimates"])
 async def get_eps_trend(ticker: str):
     """Get EPS trend data"""
-    t = yf.Ticker(ticker)
-    try:
-        eps_trend = t.eps_trend
-        return {
-            "ticker": ticker,
-            "eps_trend": df_to_dict(eps_trend),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "eps_trend": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "eps_trend", "eps_trend")
 
 
 @router.get("/stock/{ticker}/estimates/eps-revisions", tags=["Estimates"])
 async def get_eps_revisions(ticker: str):
     """Get EPS revisions data"""
-    t = yf.Ticker(ticker)
-    try:
-        eps_revisions = t.eps_revisions
-        return {
-            "ticker": ticker,
-            "eps_revisions": df_to_dict(eps_revisions),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "eps_revisions": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "eps_revisions", "eps_revisions")
 
 
 @router.get("/stock/{ticker}/estimates/growth", tags=["Estimates"])
 async def get_growth_estimates(ticker: str):
     """Get growth estimates"""
-    t = yf.Ticker(ticker)
-    try:
-        growth_estimates = t.growth_estimates
-        return {
-            "ticker": ticker,
-            "growth_estimates": df_to_dict(growth_estimates),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "growth_estimates": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "growth_estimates", "growth_estimates")
 
 
 # =============================================================================
@@ -278,43 +221,19 @@ async def get_growth_estimates(ticker: str):
 @router.get("/stock/{ticker}/holders/major", tags=["Holders"])
 async def get_major_holders(ticker: str):
     """Get major holders breakdown (% held by insiders, institutions, etc.)"""
-    t = yf.Ticker(ticker)
-    try:
-        major_holders = t.major_holders
-        return {
-            "ticker": ticker,
-            "major_holders": df_to_dict(major_holders),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "major_holders": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "major_holders", "major_holders")
 
 
 @router.get("/stock/{ticker}/holders/institutional", tags=["Holders"])
 async def get_institutional_holders(ticker: str):
     """Get list of institutional holders"""
-    t = yf.Ticker(ticker)
-    try:
-        institutional_holders = t.institutional_holders
-        return {
-            "ticker": ticker,
-            "institutional_holders": df_to_dict(institutional_holders),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "institutional_holders": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "institutional_holders", "institutional_holders")
 
 
 @router.get("/stock/{ticker}/holders/mutualfund", tags=["Holders"])
 async def get_mutualfund_holders(ticker: str):
     """Get list of mutual fund holders"""
-    t = yf.Ticker(ticker)
-    try:
-        mutualfund_holders = t.mutualfund_holders
-        return {
-            "ticker": ticker,
-            "mutualfund_holders": df_to_dict(mutualfund_holders),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "mutualfund_holders": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "mutualfund_holders", "mutualfund_holders")
 
 
 # =============================================================================
@@ -324,43 +243,19 @@ async def get_mutualfund_holders(ticker: str):
 @router.get("/stock/{ticker}/insider/transactions", tags=["Insider"])
 async def get_insider_transactions(ticker: str):
     """Get all insider transactions"""
-    t = yf.Ticker(ticker)
-    try:
-        insider_transactions = t.insider_transactions
-        return {
-            "ticker": ticker,
-            "insider_transactions": df_to_dict(insider_transactions),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "insider_transactions": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "insider_transactions", "insider_transactions")
 
 
 @router.get("/stock/{ticker}/insider/purchases", tags=["Insider"])
 async def get_insider_purchases(ticker: str):
     """Get insider purchases summary"""
-    t = yf.Ticker(ticker)
-    try:
-        insider_purchases = t.insider_purchases
-        return {
-            "ticker": ticker,
-            "insider_purchases": df_to_dict(insider_purchases),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "insider_purchases": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "insider_purchases", "insider_purchases")
 
 
 @router.get("/stock/{ticker}/insider/roster", tags=["Insider"])
 async def get_insider_roster(ticker: str):
     """Get list of insiders and their holdings"""
-    t = yf.Ticker(ticker)
-    try:
-        insider_roster = t.insider_roster_holders
-        return {
-            "ticker": ticker,
-            "insider_roster": df_to_dict(insider_roster),
-        }
-    except Exception as e:
-        return {"ticker": ticker, "error": str(e), "insider_roster": None}
+    return await route_offloader.run(_ticker_attribute, ticker, "insider_roster_holders", "insider_roster")
 
 
 # =============================================================================
@@ -373,10 +268,51 @@ async def get_ticker_snapshot(ticker: str):
     Get comprehensive ticker snapshot with all key financial metrics.
     Aggregates data from multiple yfinance sources in one call.
     """
-    t = yf.Ticker(ticker.upper())
+    ticker = ticker.upper()
+    info, earnings_dates = await asyncio.gather(
+        ticker_data.info(ticker), ticker_data.earnings_dates(ticker), return_exceptions=True
+    )
+    return _snapshot_response(ticker, info, earnings_dates)
+
+
+@router.get("/stock/{ticker}/overview", tags=["Snapshot"])
+async def get_ticker_overview(
+    ticker: str,
+    period: str = Query("1m", description="Chart period, as for /history"),
+    news_limit: int = Query(5, le=20, description="Number of news articles to return"),
+    filings_limit: int = Query(5, le=50, description="Number of filings to return"),
+):
+    """
+    Get everything the snapshot page shows in one call: the snapshot, price
+    history, news and SEC filings, each in its own endpoint's format.
+    Their upstream data is fetched in parallel.
+    """
+    ticker = ticker.upper()
+    yf_period, interval = _history_params(period)
+    info, earnings_dates, hist, news, filings = await asyncio.gather(
+        ticker_data.info(ticker),
+        ticker_data.earnings_dates(ticker),
+        ticker_data.history(ticker, yf_period, interval),
+        ticker_data.news(ticker),
+        ticker_data.sec_filings(ticker),
+        return_exceptions=True,
+    )
+    return {
+        "ticker": ticker,
+        "snapshot": _snapshot_response(ticker, info, earnings_dates),
+        "history": _history_response(ticker, period, hist),
+        "news": _news_response(ticker, news, news_limit),
+        "filings": _filings_response(ticker, filings, filings_limit),
+    }
+
+
+# The response builders below take a fetched dataset, or the error fetching
+# it, and render either in the endpoint's format.
 
+def _snapshot_response(ticker: str, info, earnings_dates) -> dict:
     try:
-        info = t.info
+        if isinstance(info, Exception):
+            raise info
 
         # Handle case where ticker doesn't exist
         if not info or info.get("regularMarketPrice") is None:
@@ -499,8 +435,7 @@ async def get_ticker_snapshot(ticker: str):
         }
 
         try:
-            earnings_dates = t.earnings_dates
-            if earnings_dates is not None and not earnings_dates.empty:
+            if isinstance(earnings_dates, pd.DataFrame) and not earnings_dates.empty:
                 # Get future earnings (next date)
                 import datetime
                 now = datetime.datetime.now(datetime.timezone.utc)
@@ -550,36 +485,45 @@ async def get_price_history(
     period: str = Query("1mo", description="Period: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max"),
 ):
     """Get historical price data for charting."""
-    t = yf.Ticker(ticker.upper())
+    ticker = ticker.upper()
+    yf_period, interval = _history_params(period)
+    hist = await _fetched(ticker_data.history(ticker, yf_period, interval))
+    return _history_response(ticker, period, hist)
+
+
+def _history_params(period: str) -> tuple[str, str]:
+    """The yfinance (period, interval) for a chart period."""
+    # Map frontend periods to yfinance periods
+    period_map = {
+        "1d": "1d",
+        "1w": "5d",
+        "1m": "1mo",
+        "3m": "3mo",
+        "6m": "6mo",
+        "1y": "1y",
+        "5y": "5y",
+        "max": "max",
+    }
+    yf_period = period_map.get(period, period)
+
+    # Use appropriate interval based on period
+    interval_map = {
+        "1d": "5m",
+        "5d": "15m",
+        "1mo": "1d",
+        "3mo": "1d",
+        "6mo": "1d",
+        "1y": "1d",
+        "5y": "1wk",
+        "max": "1mo",
+    }
+    return yf_period, interval_map.get(yf_period, "1d")
 
-    try:
-        # Map frontend periods to yfinance periods
-        period_map = {
-            "1d": "1d",
-            "1w": "5d",
-            "1m": "1mo",
-            "3m": "3mo",
-            "6m": "6mo",
-            "1y": "1y",
-            "5y": "5y",
-            "max": "max",
-        }
-        yf_period = period_map.get(period, period)
-
-        # Use appropriate interval based on period
-        interval_map = {
-            "1d": "5m",
-            "5d": "15m",
-            "1mo": "1d",
-            "3mo": "1d",
-            "6mo": "1d",
-            "1y": "1d",
-            "5y": "1wk",
-            "max": "1mo",
-        }
-        interval = interval_map.get(yf_period, "1d")
 
-        hist = t.history(period=yf_period, interval=interval)
+def _history_response(ticker: str, period: str, hist) -> dict:
+    try:
+        if isinstance(hist, Exception):
+            raise hist
 
         if hist.empty:
             return {"ticker": ticker.upper(), "period": period, "history": [], "error": "No data"}
@@ -611,10 +555,15 @@ async def get_ticker_news(
     limit: int = Query(5, le=20, description="Number of news articles to return"),
 ):
     """Get recent news articles for a ticker."""
-    t = yf.Ticker(ticker.upper())
+    ticker = ticker.upper()
+    news = await _fetched(ticker_data.news(ticker))
+    return _news_response(ticker, news, limit)
 
+
+def _news_response(ticker: str, news, limit: int) -> dict:
     try:
-        news = t.news
+        if isinstance(news, Exception):
+            raise news
 
         if not news:
             return {"ticker": ticker.upper(), "news": []}
@@ -654,10 +603,15 @@ async def get_sec_filings(
     limit: int = Query(10, le=50, description="Number of filings to return"),
 ):
     """Get recent SEC filings for a ticker."""
-    t = yf.Ticker(ticker.upper())
+    ticker = ticker.upper()
+    filings = await _fetched(ticker_data.sec_filings(ticker))
+    return _filings_response(ticker, filings, limit)
+
 
+def _filings_response(ticker: str, filings, limit: int) -> dict:
     try:
-        filings = t.sec_filings
+        if isinstance(filings, Exception):
+            raise filings
 
         if not filings:
             return {"ticker": ticker.upper(), "filings": []}
@@ -684,10 +638,15 @@ async def get_sec_filings(
 @router.get("/stock/{ticker}/earnings-history", tags=["Snapshot"])
 async def get_earnings_history(ticker: str):
     """Get historical earnings data with estimates vs actuals."""
-    t = yf.Ticker(ticker.upper())
+    ticker = ticker.upper()
+    earnings_dates = await _fetched(ticker_data.earnings_dates(ticker))
+    return _earnings_response(ticker, earnings_dates)
 
+
+def _earnings_response(ticker: str, earnings_dates) -> dict:
     try:
-        earnings_dates = t.earnings_dates
+        if isinstance(earnings_dates, Exception):
+            raise earnings_dates
 
         if earnings_dates is None or earnings_dates.empty:
             return {"ticker": ticker.upper(), "earnings": []}
@@ -719,11 +678,24 @@ async def get_earnings_history(ticker: str):
 # =============================================================================
 
 @router.post("/scan", tags=["Scanner"])
-async def scan_options(request: ScanRequest):
+async def scan_options(
+    request: ScanRequest,
+    batch: bool = Query(False, description="Send results as arrays in `results` events and throttle progress"),
+    batch_size: int = Query(200, ge=1, le=5000, description="Max results per batch"),
+    batch_ms: int = Query(100, ge=0, le=5000, description="Max milliseconds a result waits in a batch"),
+    sort_by: Optional[Literal["annualized_roi", "roi"]] = Query(
+        None, description="Stream only the top `limit` results by this field, as `topk` events"
+    ),
+    limit: int = Query(100, ge=1, le=1000, description="Results kept when sort_by is set"),
+):
     """Stream scan results using Server-Sent Events."""
     async def event_generator():
-        async for event in scanner_service.scan_options(request):
-            yield {"event": event["type"], "data": json.dumps(event["data"])}
+        ranking = TopK(sort_by, limit) if sort_by else None
+        events = scanner_service.scan_options(request, ranking=ranking)
+        if batch:
+            events = batch_scan_events(events, max_rows=batch_size, max_delay=batch_ms / 1000)
+        async for event in events:
+            yield {"event": event["type"], "data": fast_json.dumps(event["data"])}
 
     return EventSourceResponse(event_generator())
 
@@ -744,15 +716,40 @@ async def get_universes():
 # Heatmap Endpoints
 # =============================================================================
 
-@router.get("/heatmap", tags=["Heatmap"])
+@router.get("/heatmap", tags=["Heatmap"], response_model=HeatmapResponse)
 async def get_heatmap(
+    request: Request,
     period: str = Query("1d", description="Time period: 1d, 1w, 1m, 3m, ytd"),
 ):
     """
     Get S&P 500 sector heatmap data with stock performance grouped by sector.
     Returns stocks with price changes and market cap for treemap visualization.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
     """
-    return await heatmap_service.get_heatmap(period=period)
+    payload = await heatmap_service.get_heatmap_payload(period=period)
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if _etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+
+    # Stored gzipped; only clients that can't take gzip cost a decompress
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            payload.body,
+            media_type="application/json",
+            headers={**headers, "Content-Encoding": "gzip"},
+        )
+    return Response(gzip.decompress(payload.body), media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
 
 
 # =============================================================================
@@ -763,6 +760,7 @@ async def get_heatmap(
 async def clear_cache():
     """Clear the cache."""
     cache_service.clear()
+    scan_result_cache.clear()
     return {"status": "ok", "message": "Cache cleared"}
 
 
@@ -778,27 +776,56 @@ async def get_memory_usage():
     import psutil
     import os
     import gc
-    import sys
 
     process = psutil.Process(os.getpid())
     mem = process.memory_info()
 
-    # Access cache with lock to avoid race condition
-    with cache_service._lock:
-        cache_keys = list(cache_service._cache.keys())
-        cache_size_bytes = sum(
-            sys.getsizeof(v) for v, _ in cache_service._cache.values()
-        )
+    cache_keys = cache_service.keys()
+    cache_stats = cache_service.stats()
+    scan_cache_stats = scan_result_cache.stats()
 
     return {
         "rss_mb": round(mem.rss / 1024 / 1024, 2),  # Actual RAM used
         "cache_keys": cache_keys,
-        "cache_count": len(cache_keys),
-        "cache_size_kb": round(cache_size_bytes / 1024, 2),
+        "cache_count": cache_stats["entries"],
+        "cache_size_kb": round(cache_stats["bytes"] / 1024, 2),  # Estimated deep size
+        "cache_limits": {
+            "max_entries": cache_stats["max_entries"],
+            "max_kb": round(cache_stats["max_bytes"] / 1024, 2),
+        },
+        # cache_service plus the scan result cache, which has its own budget
+        "total_cache_size_kb": round((cache_stats["bytes"] + scan_cache_stats["bytes"]) / 1024, 2),
+        "total_cache_max_kb": round((cache_stats["max_bytes"] + scan_cache_stats["max_bytes"]) / 1024, 2),
+        "cache_namespaces": cache_stats["namespaces"],
+        "chain_cache": option_chain_cache.stats(),
+        "price_store": price_store.stats(),
+        "disk_cache": cache_stats["disk"],
+        "scan_result_cache": scan_cache_stats,
         "gc_counts": gc.get_count(),  # (gen0, gen1, gen2) object counts
     }
 
 
+@router.get("/debug/concurrency", tags=["System"])
+async def get_concurrency_stats():
+    """Get the scanner's adaptive concurrency window and upstream rate budget."""
+    return {
+        "scan_limiter": scan_limiter.stats(),
+        "upstream_rate_limiter": upstream_rate_limiter.stats(),
+        "route_offloader": route_offloader.stats(),
+    }
+
+
+@router.get("/prefetch/status", tags=["System"])
+async def get_prefetch_status(
+    ticker: str | None = Query(None, description="Only this ticker's status"),
+):
+    """
+    Get the background prefetch scheduler's status and the last refresh of
+    each ticker, or of one ticker when given.
+    """
+    return prefetch_scheduler.status(ticker)
+
+
 @router.post("/debug/gc", tags=["System"])
 async def force_garbage_collection():
     """Force garbage collection and return memory before/after."""
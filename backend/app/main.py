@@ -1,15 +1,31 @@
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api.routes.scanner import router as scanner_router
+from app.services.concurrency import OffloadBusy, OffloadTimeout
+from app.services.prefetch_service import PREFETCH_ENABLED, prefetch_scheduler
+from app.services.scanner_service import scanner_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the built-in universes warm in the background
+    if PREFETCH_ENABLED:
+        prefetch_scheduler.start()
+    yield
+    await prefetch_scheduler.stop()
+    scanner_service.shutdown()
 
 
 app = FastAPI(
     title="Options Scanner API",
     description="API for scanning options chains",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS - use environment variable or default to localhost
@@ -26,6 +42,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Blocking upstream calls that can't get a thread or don't return in time
+@app.exception_handler(OffloadBusy)
+async def offload_busy_handler(request: Request, exc: OffloadBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(OffloadTimeout)
+async def offload_timeout_handler(request: Request, exc: OffloadTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
 # Include routers
 app.include_router(scanner_router)
 
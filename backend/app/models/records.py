@@ -0,0 +1,49 @@
+from typing import NamedTuple, Optional
+
+
+class OptionRecord(NamedTuple):
+    """
+    Scanner-internal option result: a plain tuple, built without validation.
+    The leading fields mirror OptionResult in order, with dates already as
+    ISO strings, so to_dict() is the JSON shape of an OptionResult. The
+    trailing fields are the unrounded values the scan filters saw, kept so
+    cached results can be re-filtered exactly.
+    """
+    ticker: str
+    stock_price: float
+    strike: float
+    expiration: str
+    dte: int
+    option_type: str
+    premium: float
+    bid: Optional[float]
+    ask: Optional[float]
+    volume: int
+    open_interest: int
+    implied_volatility: Optional[float]
+    collateral: float
+    roi: float
+    annualized_roi: float
+    moneyness: str
+    pe_ratio: Optional[float]
+    next_earnings_date: Optional[str]
+    data_age_seconds: Optional[float]
+
+    # Unrounded filter inputs, not part of the API
+    raw_stock_price: float
+    raw_pe_ratio: Optional[float]
+    raw_collateral: float
+    raw_roi: float
+
+    def to_dict(self) -> dict:
+        """The OptionResult fields, ready for JSON."""
+        return dict(zip(API_FIELDS, self))
+
+    @property
+    def filter_values(self) -> tuple:
+        """(stock_price, pe_ratio, collateral, roi), unrounded."""
+        return self[len(API_FIELDS):]
+
+
+# Fields sent to clients, in OptionResult order
+API_FIELDS = OptionRecord._fields[:OptionRecord._fields.index("raw_stock_price")]
@@ -30,6 +30,7 @@ class OptionResult(BaseModel):
     moneyness: str  # "ITM" or "OTM"
     pe_ratio: Optional[float] = None
     next_earnings_date: Optional[date] = None
+    data_age_seconds: Optional[float] = None  # Age of the snapshot it came from; None when fetched live
 
 
 class ScanProgressEvent(BaseModel):
@@ -1,37 +1,426 @@
-from typing import Optional, Any
-from datetime import datetime, timedelta
+from typing import Optional, Any, Awaitable, Callable
+from collections import OrderedDict, defaultdict
+import asyncio
+import os
+import sys
 import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.disk_cache import DiskCache, create_disk_cache
+
+
+# Bounds for the whole cache, split evenly across shards
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "20000"))
+CACHE_MAX_MB = float(os.environ.get("CACHE_MAX_MB", "256"))
+CACHE_SHARDS = int(os.environ.get("CACHE_SHARDS", "16"))
+CACHE_SWEEP_INTERVAL = float(os.environ.get("CACHE_SWEEP_INTERVAL", "60"))
+
+# How often a process waiting on another's load checks for its result
+LEASE_POLL_SECONDS = 0.1
+
+# Containers larger than this are sized from a sample of their items
+_SIZE_SAMPLE = 100
+
+
+def estimate_size(value: Any, depth: int = 0) -> int:
+    """Rough deep size of a cached value in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return sys.getsizeof(value)
+    if depth >= 4:
+        return sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        items = list(value.items())
+        sample = items[:_SIZE_SAMPLE]
+        sampled = sum(estimate_size(k, depth + 1) + estimate_size(v, depth + 1) for k, v in sample)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        sample = items[:_SIZE_SAMPLE]
+        sampled = sum(estimate_size(v, depth + 1) for v in sample)
+    elif hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + estimate_size(vars(value), depth + 1)
+    else:
+        return sys.getsizeof(value)
+
+    if len(items) > len(sample):
+        sampled = sampled * len(items) // len(sample)
+    return sys.getsizeof(value) + sampled
+
+
+def namespace_of(key: str) -> str:
+    """Keys are namespaced by their prefix, e.g. prices_..., chain_..."""
+    return key.split("_", 1)[0]
+
+
+class _Shard:
+    """One lock-protected LRU segment of the cache."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # key -> (value, expires_at monotonic, size in bytes)
+        self.entries: OrderedDict[str, tuple[Any, float, int]] = OrderedDict()
+        self.bytes = 0
+        self.stats: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "expired": 0}
+        )
+
+    def remove(self, key: str) -> tuple[Any, float, int]:
+        entry = self.entries.pop(key)
+        self.bytes -= entry[2]
+        return entry
 
 
 class CacheService:
-    """Simple in-memory cache with TTL support."""
+    """
+    In-memory LRU cache with TTL support, bounded by entry count and
+    estimated bytes. Keys are spread over independently locked shards so the
+    executor threads don't contend on one lock; expired entries are swept
+    periodically rather than only when read.
 
-    def __init__(self):
-        self._cache: dict[str, tuple[Any, datetime]] = {}
-        self._lock = threading.Lock()
+    With a DiskCache attached, writes also go to disk and memory misses are
+    read through from it, so a restarted process comes up warm. Processes
+    sharing the disk tier also share loads: get_or_compute() and load() take
+    a per-key lease, so one worker loads an entry and the rest wait for it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024),
+        shards: int = CACHE_SHARDS,
+        sweep_interval: float = CACHE_SWEEP_INTERVAL,
+        disk: Optional[DiskCache] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.disk = disk
+        self._shards = [
+            _Shard(max(1, max_entries // shards), max(1, max_bytes // shards))
+            for _ in range(shards)
+        ]
+        self._last_sweep = time.monotonic()
+        # key -> in-flight load task, for get_or_compute (event loop only)
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
 
     def get(self, key: str) -> Optional[Any]:
-        with self._lock:
-            if key not in self._cache:
-                return None
+        """
+        Get a live value, reading through to disk on a memory miss. The disk
+        read blocks, so from the event loop use get_async() instead.
+        """
+        value = self._get_memory(key)
+        if value is None and self.disk is not None:
+            value = self._get_disk(key)
+        return value
 
-            value, expires_at = self._cache[key]
-            if datetime.now() > expires_at:
-                del self._cache[key]
-                return None
+    async def get_async(self, key: str) -> Optional[Any]:
+        """get() for the event loop: a disk read runs on the default executor."""
+        return (await self.get_many_async([key])).get(key)
+
+    async def get_many_async(self, keys: list[str]) -> dict[str, Any]:
+        """
+        The live values of several keys, missing ones left out. Memory hits
+        are read inline and the misses from disk in one executor call.
+        """
+        found = {}
+        misses = []
+        for key in keys:
+            value = self._get_memory(key)
+            if value is not None:
+                found[key] = value
+            else:
+                misses.append(key)
+
+        if misses and self.disk is not None:
+            loop = asyncio.get_running_loop()
+            from_disk = await loop.run_in_executor(None, self._get_disk_many, misses)
+            found.update(from_disk)
+        return found
+
+    def _get_memory(self, key: str) -> Optional[Any]:
+        shard = self._shard(key)
+        with shard.lock:
+            stats = shard.stats[namespace_of(key)]
+            entry = shard.entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if time.monotonic() <= expires_at:
+                    shard.entries.move_to_end(key)
+                    stats["hits"] += 1
+                    return value
+                shard.remove(key)
+                stats["expired"] += 1
+            stats["misses"] += 1
+        return None
+
+    def _get_disk(self, key: str) -> Optional[Any]:
+        """Read through to disk and promote the entry for its remaining TTL."""
+        found = self.disk.get(key)
+        if found is None:
+            return None
+        value, remaining = found
+        self._set_memory(key, value, remaining)
+        shard = self._shard(key)
+        with shard.lock:
+            shard.stats[namespace_of(key)]["disk_hits"] += 1
+        return value
+
+    def _get_disk_many(self, keys: list[str]) -> dict[str, Any]:
+        found = {}
+        for key in keys:
+            value = self._get_disk(key)
+            if value is not None:
+                found[key] = value
+        return found
 
+    def set(self, key: str, value: Any, ttl: int = 300, persist: bool = True):
+        """
+        Set value with TTL in seconds. persist=False keeps it out of the disk
+        tier, for values that can't or shouldn't outlive the process.
+        """
+        self._set_memory(key, value, ttl)
+        if persist and self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+        if time.monotonic() - self._last_sweep > self.sweep_interval:
+            self.sweep_expired()
+
+    def _set_memory(self, key: str, value: Any, ttl: float):
+        size = estimate_size(value)
+        shard = self._shard(key)
+        namespace = namespace_of(key)
+
+        with shard.lock:
+            if key in shard.entries:
+                shard.remove(key)
+
+            if size > shard.max_bytes:
+                # Would evict the whole shard and still not fit
+                shard.stats[namespace]["evictions"] += 1
+                return
+
+            shard.entries[key] = (value, time.monotonic() + ttl, size)
+            shard.bytes += size
+
+            # Evict least recently used entries until within bounds
+            while len(shard.entries) > shard.max_entries or shard.bytes > shard.max_bytes:
+                evicted_key, _ = next(iter(shard.entries.items()))
+                shard.remove(evicted_key)
+                shard.stats[namespace_of(evicted_key)]["evictions"] += 1
+
+    async def get_or_compute(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int = 300,
+        refresh: bool = False,
+    ) -> Any:
+        """
+        Get a cached value, or load it with `await loader()` and cache it.
+        Concurrent callers for the same key share one in-flight load instead
+        of starting duplicates, and a loader error is raised to all of them.
+        A None result is returned to every caller but not cached.
+        refresh=True skips the cached value and reloads it.
+        """
+        if not refresh:
+            cached = await self.get_async(key)
+            if cached is not None:
+                return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            async def load():
+                if self.disk is not None:
+                    return await self._load_leased(key, loader, ttl)
+                value = await loader()
+                if value is not None:
+                    self.set(key, value, ttl=ttl)
+                return value
+
+            # A separate task, so one caller going away doesn't cancel the
+            # load for everyone else waiting on it
+            task = asyncio.ensure_future(load())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    async def _load_leased(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int) -> Any:
+        """
+        get_or_compute()'s load, coordinated with other processes through the
+        disk tier. Every SQLite call runs on the default executor, since the
+        database can be locked by another worker for up to its busy timeout.
+        """
+        loop = asyncio.get_running_loop()
+        seen = await loop.run_in_executor(None, self.disk.expiry, key)
+        while True:
+            token = await loop.run_in_executor(None, self.disk.try_lease, key)
+            if token is not None:
+                try:
+                    value = await loader()
+                    if value is not None:
+                        # On disk before the lease is released, so waiters find it
+                        await loop.run_in_executor(None, self._set_shared, key, value, ttl)
+                    return value
+                finally:
+                    # Submitted at once, so the release runs even if this
+                    # task is cancelled while awaiting it
+                    await loop.run_in_executor(None, self.disk.release_lease, key, token)
+
+            # Another process (or thread) is loading it: wait for its write
+            while await loop.run_in_executor(None, self._lease_pending, key, seen):
+                await asyncio.sleep(LEASE_POLL_SECONDS)
+            value = await loop.run_in_executor(None, self._take_shared, key, seen)
+            if value is not None:
+                return value
+
+    def _lease_pending(self, key: str, seen: Optional[float]) -> bool:
+        """Whether a lease on key is held and nothing new was written since `seen`."""
+        return self.disk.lease_held(key) and self.disk.expiry(key) == seen
+
+    def load(self, key: str, loader: Callable[[], Any], ttl: int = 300) -> Any:
+        """
+        Call loader() and cache its result; for worker threads. With a disk
+        tier, a key another process or thread is already loading is waited
+        for and read from disk rather than loaded again. Like get_or_compute(),
+        a None result isn't cached.
+        """
+        if self.disk is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl=ttl)
             return value
 
-    def set(self, key: str, value: Any, ttl: int = 300):
-        """Set value with TTL in seconds."""
-        with self._lock:
-            expires_at = datetime.now() + timedelta(seconds=ttl)
-            self._cache[key] = (value, expires_at)
+        seen = self.disk.expiry(key)
+        while True:
+            token = self.disk.try_lease(key)
+            if token is not None:
+                try:
+                    value = loader()
+                    if value is not None:
+                        self._set_shared(key, value, ttl)
+                    return value
+                finally:
+                    self.disk.release_lease(key, token)
+
+            while self._lease_pending(key, seen):
+                time.sleep(LEASE_POLL_SECONDS)
+            value = self._take_shared(key, seen)
+            if value is not None:
+                return value
+
+    def _set_shared(self, key: str, value: Any, ttl: int):
+        self._set_memory(key, value, ttl)
+        self.disk.set(key, value, ttl, wait=True)
+
+    def _take_shared(self, key: str, seen: Optional[float]) -> Optional[Any]:
+        """The disk entry for key if it was rewritten since `seen`, promoted to memory."""
+        if self.disk.expiry(key) == seen:
+            return None
+        found = self.disk.get(key)
+        if found is None:
+            return None
+        value, remaining = found
+        self._set_memory(key, value, remaining)
+        return value
+
+    def expires_at(self, key: str) -> Optional[float]:
+        """
+        Monotonic expiry of a live in-memory entry, or None. A refreshed
+        entry gets a new expiry, so this also tells whether it was replaced.
+        Doesn't count as a hit or miss.
+        """
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None or time.monotonic() > entry[1]:
+                return None
+            return entry[1]
+
+    def delete(self, key: str):
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.entries:
+                shard.remove(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def sweep_expired(self) -> int:
+        """Drop every expired entry. Returns the number removed from memory."""
+        self._last_sweep = time.monotonic()
+        if self.disk is not None:
+            self.disk.sweep_expired()
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                now = time.monotonic()
+                expired = [k for k, (_, expires_at, _) in shard.entries.items() if now > expires_at]
+                for key in expired:
+                    shard.remove(key)
+                    shard.stats[namespace_of(key)]["expired"] += 1
+                removed += len(expired)
+        return removed
 
     def clear(self):
-        with self._lock:
-            self._cache.clear()
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.bytes = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+    def keys(self) -> list[str]:
+        keys = []
+        for shard in self._shards:
+            with shard.lock:
+                keys.extend(shard.entries.keys())
+        return keys
+
+    def stats(self) -> dict:
+        """Totals plus per-namespace entries, bytes, hits, misses and evictions."""
+        namespaces: dict[str, dict[str, int]] = defaultdict(
+            lambda: {
+                "entries": 0, "bytes": 0, "hits": 0, "misses": 0,
+                "disk_hits": 0, "evictions": 0, "expired": 0,
+            }
+        )
+        entries = 0
+        total_bytes = 0
+
+        for shard in self._shards:
+            with shard.lock:
+                entries += len(shard.entries)
+                total_bytes += shard.bytes
+                for key, (_, _, size) in shard.entries.items():
+                    ns = namespaces[namespace_of(key)]
+                    ns["entries"] += 1
+                    ns["bytes"] += size
+                for name, counters in shard.stats.items():
+                    for counter, count in counters.items():
+                        namespaces[name][counter] += count
+
+        return {
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "namespaces": dict(namespaces),
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
 
 
 # Global cache instance
-cache_service = CacheService()
+cache_service = CacheService(disk=create_disk_cache())
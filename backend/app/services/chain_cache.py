@@ -0,0 +1,94 @@
+import os
+import threading
+from typing import Optional
+
+from app.services.cache_service import cache_service
+from app.services.market_data import OptionChain, market_data
+
+
+# TTLs in seconds, configurable per deployment
+CHAIN_TTL = int(os.environ.get("CHAIN_CACHE_TTL", "300"))
+EXPIRATIONS_TTL = int(os.environ.get("EXPIRATIONS_CACHE_TTL", "3600"))
+
+
+class OptionChainCache:
+    """
+    Read-through cache for option expirations and chains, keyed by ticker and
+    (ticker, expiration). Shared by the scanner and the options endpoints.
+    Calls block on the market data provider on a miss, so run them in an executor.
+    """
+
+    def __init__(self, chain_ttl: int = CHAIN_TTL, expirations_ttl: int = EXPIRATIONS_TTL):
+        self.chain_ttl = chain_ttl
+        self.expirations_ttl = expirations_ttl
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "chain_hits": 0,
+            "chain_misses": 0,
+            "expirations_hits": 0,
+            "expirations_misses": 0,
+        }
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def expirations_key(ticker: str) -> str:
+        return f"expirations_{ticker.upper()}"
+
+    @staticmethod
+    def chain_key(ticker: str, expiration: str) -> str:
+        return f"chain_{ticker.upper()}_{expiration}"
+
+    def get_expirations(
+        self, ticker: str, refresh: bool = False, ttl: Optional[int] = None
+    ) -> list[str]:
+        """
+        Get available expiration dates (YYYY-MM-DD) for a ticker.
+        refresh=True refetches even when cached; ttl overrides the default.
+        """
+        ticker = ticker.upper()
+        key = self.expirations_key(ticker)
+        if not refresh:
+            cached = cache_service.get(key)
+            if cached is not None:
+                self._count("expirations_hits")
+                return cached
+            self._count("expirations_misses")
+
+        # One process fetches a key at a time; the others wait and read its result
+        return cache_service.load(
+            key, lambda: list(market_data.options(ticker)), ttl=ttl or self.expirations_ttl
+        )
+
+    def get_chain(
+        self, ticker: str, expiration: str, refresh: bool = False, ttl: Optional[int] = None
+    ) -> OptionChain:
+        """
+        Get the calls/puts chain for one expiration date.
+        refresh=True refetches even when cached; ttl overrides the default.
+        """
+        ticker = ticker.upper()
+        key = self.chain_key(ticker, expiration)
+        if not refresh:
+            cached = cache_service.get(key)
+            if cached is not None:
+                self._count("chain_hits")
+                return cached
+            self._count("chain_misses")
+
+        return cache_service.load(
+            key, lambda: market_data.option_chain(ticker, expiration), ttl=ttl or self.chain_ttl
+        )
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["chain_ttl"] = self.chain_ttl
+        stats["expirations_ttl"] = self.expirations_ttl
+        return stats
+
+
+# Global chain cache instance
+option_chain_cache = OptionChainCache()
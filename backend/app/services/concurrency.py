@@ -0,0 +1,374 @@
+"""
+Concurrency control for upstream market data calls.
+
+TokenBucket caps the rate of individual upstream calls across all threads.
+AdaptiveConcurrencyLimiter keeps a sliding window of in-flight jobs whose size
+adapts AIMD-style: it grows by one per window of successes and is cut
+multiplicatively when upstream throttles or errors.
+BlockingOffloader runs the routes' blocking upstream calls on a bounded
+thread pool, with a cap on calls in progress and a per-call timeout.
+
+Configured with environment variables:
+    UPSTREAM_RATE_PER_SEC   sustained upstream calls per second (default 10, 0 disables)
+    UPSTREAM_BURST          token bucket capacity (default 20)
+    SCAN_CONCURRENCY_INITIAL / SCAN_CONCURRENCY_MIN / SCAN_CONCURRENCY_MAX
+                            in-flight window bounds (default 4 / 1 / 10)
+    OFFLOAD_WORKERS         threads for the routes' blocking calls (default 16)
+    OFFLOAD_MAX_CONCURRENT  route calls running or queued for a thread (default 32)
+    OFFLOAD_TIMEOUT         seconds a route call may wait and run (default 20)
+"""
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterable, Awaitable, Callable, Optional, Union
+
+
+class TokenBucket:
+    """Thread-safe token bucket. acquire() blocks, so call it from worker threads."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._acquired = 0
+        self._waited_seconds = 0.0
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Take tokens, sleeping until they are available. Returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Reserve the tokens now (balance may go negative) and sleep off the debt
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self._acquired += tokens
+            self._waited_seconds += wait
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            return {
+                "rate_per_sec": self.rate,
+                "burst": self.burst,
+                "tokens_available": round(tokens, 2),
+                "acquired": self._acquired,
+                "waited_seconds": round(self._waited_seconds, 2),
+            }
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit for async jobs. Not thread-safe: use it from the
+    event loop only.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 10,
+        throttle_backoff: float = 0.5,
+        error_backoff: float = 0.9,
+        cooldown_seconds: float = 1.0,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.throttle_backoff = throttle_backoff
+        self.error_backoff = error_backoff
+        self.cooldown_seconds = cooldown_seconds
+        self._limit = float(max(min_limit, min(initial, max_limit)))
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._stats = {"success": 0, "throttled": 0, "error": 0}
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Wait for a free slot in the window."""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted just before cancellation - hand it back
+                self._in_flight -= 1
+                self._wake()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    @asynccontextmanager
+    async def slot(self, classify_error: Optional[Callable[[Exception], str]] = None):
+        """Hold one slot for the duration of the block, adapting on its outcome."""
+        await self.acquire()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.release("cancelled")
+            raise
+        except Exception as e:
+            self.release(classify_error(e) if classify_error else "error")
+            raise
+        self.release("success")
+
+    def release(self, outcome: str = "success"):
+        """
+        Free a slot and adapt the limit.
+        outcome: success, throttled, error, or cancelled (no adaptation).
+        """
+        self._in_flight -= 1
+        if outcome == "cancelled":
+            self._wake()
+            return
+        self._stats[outcome] += 1
+
+        if outcome == "success":
+            # Additive increase: +1 per window of successful jobs
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        else:
+            now = time.monotonic()
+            # One multiplicative decrease per congestion event
+            if now - self._last_decrease >= self.cooldown_seconds:
+                backoff = self.throttle_backoff if outcome == "throttled" else self.error_backoff
+                self._limit = max(self.min_limit, self._limit * backoff)
+                self._last_decrease = now
+
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    async def map_unordered(
+        self,
+        items: Union[list, AsyncIterable],
+        job: Callable[[Any], Awaitable[Any]],
+        classify_error: Optional[Callable[[Exception], str]] = None,
+    ) -> AsyncGenerator[tuple[Any, Any], None]:
+        """
+        Run job(item) for every item, keeping the window full, and yield
+        (item, result) as each finishes. Failed jobs yield their exception.
+
+        A list is queued up front. An async iterable is only pulled from when
+        a slot is free, so a bounded queue feeding it keeps its backpressure.
+        """
+        done: asyncio.Queue = asyncio.Queue()
+        tasks: list[asyncio.Task] = []
+        feed_finished = object()
+
+        async def run(item, started: Optional[asyncio.Future] = None):
+            await self.acquire()
+            if started is not None and not started.done():
+                started.set_result(None)
+            try:
+                result = await job(item)
+            except asyncio.CancelledError:
+                self.release("cancelled")
+                raise
+            except Exception as e:
+                self.release(classify_error(e) if classify_error else "error")
+                await done.put((item, e))
+                return
+            self.release("success")
+            await done.put((item, result))
+
+        async def feed():
+            error = None
+            try:
+                async for item in items:
+                    # Don't pull the next item until this one holds a slot
+                    started = asyncio.get_running_loop().create_future()
+                    tasks.append(asyncio.create_task(run(item, started)))
+                    await started
+            except Exception as e:
+                error = e
+            await done.put((feed_finished, error))
+
+        if isinstance(items, AsyncIterable):
+            feeder = asyncio.create_task(feed())
+            feeding = True
+        else:
+            feeder = None
+            feeding = False
+            tasks = [asyncio.create_task(run(item)) for item in items]
+
+        yielded = 0
+        try:
+            while feeding or yielded < len(tasks):
+                entry = await done.get()
+                if entry[0] is feed_finished:
+                    feeding = False
+                    if entry[1] is not None:
+                        raise entry[1]
+                    continue
+                yielded += 1
+                yield entry
+        finally:
+            if feeder:
+                feeder.cancel()
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            **self._stats,
+        }
+
+
+class OffloadBusy(Exception):
+    """No offload slot freed up within the call's timeout."""
+
+
+class OffloadTimeout(Exception):
+    """An offloaded call didn't finish within its timeout."""
+
+
+class BlockingOffloader:
+    """
+    Runs blocking calls for async handlers on a bounded thread pool, so a slow
+    upstream call never holds up the event loop.
+
+    At most max_concurrent calls run or wait for a thread at once; beyond
+    that, callers queue for a slot. The timeout covers queueing and running:
+    OffloadBusy if no slot frees up in time, OffloadTimeout if the call
+    doesn't return. A thread can't be interrupted, so a timed-out call keeps
+    its slot until it really returns. Not thread-safe: use it from the event
+    loop only.
+    """
+
+    def __init__(self, workers: int = 16, max_concurrent: int = 32, timeout: float = 20.0):
+        self.workers = workers
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="offload")
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._stats = {"completed": 0, "failed": 0, "timeouts": 0, "rejected": 0}
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Call fn(*args, **kwargs) on the pool and return its result."""
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        name = getattr(fn, "__name__", "call")
+
+        await self._acquire(timeout, name)
+        try:
+            future = loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._finished)
+
+        try:
+            # Shielded so a timeout or disconnect doesn't drop the slot early
+            return await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise OffloadTimeout(f"{name} timed out after {timeout:g}s") from None
+
+    async def _acquire(self, timeout: float, name: str):
+        if self._in_flight < self.max_concurrent and not self._waiters:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter,), timeout=timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # Slot was granted just before cancellation - hand it back
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            self._stats["rejected"] += 1
+            raise OffloadBusy(f"{name} waited {timeout:g}s for a free slot")
+
+    def _finished(self, future: asyncio.Future):
+        # Retrieve the outcome so abandoned calls don't log unretrieved errors
+        self._stats["failed" if future.exception() is not None else "completed"] += 1
+        self._release()
+
+    def _release(self):
+        self._in_flight -= 1
+        while self._waiters and self._in_flight < self.max_concurrent:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_concurrent": self.max_concurrent,
+            "timeout_seconds": self.timeout,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            **self._stats,
+        }
+
+
+# Global rate budget for upstream calls, shared by every service
+upstream_rate_limiter = TokenBucket(
+    rate=float(os.environ.get("UPSTREAM_RATE_PER_SEC", "10")),
+    burst=int(os.environ.get("UPSTREAM_BURST", "20")),
+)
+
+# Global in-flight window for scanner jobs, shared by concurrent scans
+scan_limiter = AdaptiveConcurrencyLimiter(
+    initial=int(os.environ.get("SCAN_CONCURRENCY_INITIAL", "4")),
+    min_limit=int(os.environ.get("SCAN_CONCURRENCY_MIN", "1")),
+    max_limit=int(os.environ.get("SCAN_CONCURRENCY_MAX", "10")),
+)
+
+# Thread pool and in-progress cap for blocking calls made by API routes
+route_offloader = BlockingOffloader(
+    workers=int(os.environ.get("OFFLOAD_WORKERS", "16")),
+    max_concurrent=int(os.environ.get("OFFLOAD_MAX_CONCURRENT", "32")),
+    timeout=float(os.environ.get("OFFLOAD_TIMEOUT", "20")),
+)
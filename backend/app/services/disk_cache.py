@@ -0,0 +1,234 @@
+"""
+Persistent second cache tier under CacheService, backed by a local SQLite file.
+
+Values are pickled and zlib-compressed, so DataFrames and option chains are
+stored in a compact binary form. Expiry uses wall-clock time, so TTLs carry
+over a restart. Writes go through a background thread so a set() never waits
+on disk; reads are synchronous point lookups.
+
+Every uvicorn worker on a host opens the same file, so it is also the cache
+the workers share. Per-key leases let one process load a missing or stale
+entry while the others wait for it, instead of all of them hitting upstream.
+
+Configured with environment variables:
+    CACHE_DISK_PATH      SQLite file (default backend/.cache/cache.sqlite3, empty disables)
+    CACHE_DISK_MAX_MB    size budget; entries closest to expiry are dropped first (default 512)
+    CACHE_LEASE_SECONDS  longest a load may hold a key before others take over (default 120)
+"""
+import atexit
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, Optional
+
+
+DEFAULT_PATH = Path(__file__).parent.parent.parent / ".cache" / "cache.sqlite3"
+CACHE_DISK_PATH = os.environ.get("CACHE_DISK_PATH", str(DEFAULT_PATH))
+CACHE_DISK_MAX_MB = float(os.environ.get("CACHE_DISK_MAX_MB", "512"))
+CACHE_LEASE_SECONDS = float(os.environ.get("CACHE_LEASE_SECONDS", "120"))
+
+# Fast compression: the goal is fewer bytes on disk, not the smallest file
+_COMPRESS_LEVEL = 1
+
+
+class DiskCache:
+    """SQLite key/value store with TTLs. Safe to share between threads."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            " key TEXT PRIMARY KEY,"
+            " token TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+        # Writes are applied in order by one background thread. clear() bumps
+        # the generation so writes queued before it are dropped.
+        self._queue: queue.Queue = queue.Queue()
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0, "leases": 0, "lease_conflicts": 0}
+        self._writer = threading.Thread(target=self._write_loop, name="disk-cache-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def get(self, key: str) -> Optional[tuple[Any, float]]:
+        """Returns (value, remaining ttl in seconds), or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+
+        try:
+            return pickle.loads(zlib.decompress(row[0])), row[1] - now
+        except Exception as e:
+            print(f"Error reading disk cache entry {key}: {e}")
+            self.delete(key)
+            return None
+
+    def expiry(self, key: str) -> Optional[float]:
+        """Wall-clock expiry of a live entry, or None. Changes when it's rewritten."""
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] <= time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: Any, ttl: float, wait: bool = False):
+        """
+        Queue a write. Serialization happens on the writer thread, unless
+        wait=True, which writes from the calling thread before returning.
+        """
+        if wait:
+            self._write(self._generation, key, value, time.time() + ttl)
+        else:
+            self._queue.put(("set", self._generation, key, value, time.time() + ttl))
+
+    def try_lease(self, key: str, ttl: float = CACHE_LEASE_SECONDS) -> Optional[str]:
+        """
+        Take the key's lease unless another holder's is still live, in this or
+        another process. Returns a token for release_lease(), or None.
+        """
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO leases (key, token, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at"
+                " WHERE leases.expires_at <= ?",
+                (key, token, now + ttl, now),
+            )
+            if cursor.rowcount != 1:
+                self._stats["lease_conflicts"] += 1
+                return None
+            self._stats["leases"] += 1
+        return token
+
+    def lease_held(self, key: str) -> bool:
+        """Whether anyone holds a live lease on the key."""
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at FROM leases WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def release_lease(self, key: str, token: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE key = ? AND token = ?", (key, token))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._conn.execute("DELETE FROM cache")
+
+    def sweep_expired(self):
+        """Queue removal of expired entries and trimming to the size budget."""
+        self._queue.put(("sweep",))
+
+    def flush(self):
+        """Block until every queued write has been applied."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+
+    def _write_loop(self):
+        while True:
+            op = self._queue.get()
+            try:
+                if op is None:
+                    return
+                if op[0] == "set":
+                    self._write(*op[1:])
+                else:
+                    self._sweep()
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Error writing disk cache: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, generation: int, key: str, value: Any, expires_at: float):
+        blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), _COMPRESS_LEVEL)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, size) VALUES (?, ?, ?, ?)",
+                (key, blob, expires_at, len(blob)),
+            )
+            self._stats["writes"] += 1
+
+    def _sweep(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.execute("DELETE FROM leases WHERE expires_at <= ?", (time.time(),))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            # Over budget: drop the entries that would expire soonest
+            excess = total - self.max_bytes
+            doomed = []
+            for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY expires_at"):
+                doomed.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "pending_writes": self._queue.qsize(),
+                **self._stats,
+            }
+
+
+def create_disk_cache() -> Optional[DiskCache]:
+    """Build the disk tier from the environment, or None when disabled."""
+    if not CACHE_DISK_PATH:
+        return None
+    try:
+        return DiskCache(CACHE_DISK_PATH, int(CACHE_DISK_MAX_MB * 1024 * 1024))
+    except Exception as e:
+        print(f"Error opening disk cache at {CACHE_DISK_PATH}, continuing without it: {e}")
+        return None
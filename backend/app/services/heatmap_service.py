@@ -1,36 +1,95 @@
 import asyncio
 import gc
+import gzip
+import hashlib
 import json
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
-from collections import defaultdict
-from pathlib import Path
+from datetime import date, datetime
+from typing import NamedTuple, Optional
 
-import yfinance as yf
+import numpy as np
 import pandas as pd
 
 from app.models.responses import HeatmapStock, HeatmapSector, HeatmapResponse
-from app.utils.ticker_lists import SP500_TICKERS
+from app.utils.reference_data import reference_data
+from app.utils.ticker_lists import get_tickers
 from app.services.cache_service import cache_service
-
-
-# Period mapping for yfinance
-PERIOD_MAP = {
-    "1d": "2d",    # Need 2 days to calculate 1 day change
-    "1w": "7d",
-    "1m": "1mo",
-    "3m": "3mo",
-    "ytd": "ytd",
-}
-
-# Load static stock info (sector, name, market_cap)
-STATIC_INFO_PATH = Path(__file__).parent.parent / "data" / "sp500_info.json"
-STATIC_STOCK_INFO = {}
-
-if STATIC_INFO_PATH.exists():
-    with open(STATIC_INFO_PATH) as f:
-        data = json.load(f)
-        STATIC_STOCK_INFO = data.get("stocks", {})
+from app.services.market_data import market_data
+from app.utils import fast_json
+
+
+# Heatmap periods. One daily history download covers all of them; each
+# period's change is measured over the same window yfinance's matching
+# `period` would have returned: 2 and 7 trading days, 1 and 3 months, and
+# the calendar year to date. Unknown periods fall back to 1d.
+HEATMAP_PERIODS = ("1d", "1w", "1m", "3m", "ytd")
+
+# Cached for 3 hours to minimize memory-leaking yf.download calls
+HEATMAP_TTL = 10800
+
+
+def history_start(today: date) -> date:
+    """First date to download so every period's window is covered."""
+    # A week's slack so the 3 month window starts on a trading day
+    three_months = (pd.Timestamp(today) - pd.DateOffset(months=3, days=7)).date()
+    return min(three_months, date(today.year, 1, 1))
+
+
+def compute_period_changes(close: pd.DataFrame) -> pd.DataFrame:
+    """
+    Latest price and percent change over every heatmap period, from a daily
+    close matrix (dates x tickers). Returns one row per ticker with a `price`
+    column and one column per period. A change needs at least two closes in
+    the period's window; otherwise it is NaN.
+    """
+    close = close.sort_index()
+    index = close.index
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    last_day = index[-1]
+
+    # Row each period's window starts at
+    starts = {
+        "1d": max(len(index) - 2, 0),
+        "1w": max(len(index) - 7, 0),
+        "1m": index.searchsorted(last_day - pd.DateOffset(months=1), side="right"),
+        "3m": index.searchsorted(last_day - pd.DateOffset(months=3), side="right"),
+        "ytd": index.searchsorted(pd.Timestamp(year=last_day.year, month=1, day=1)),
+    }
+
+    values = close.to_numpy(dtype=float)
+    latest = close.ffill().to_numpy(dtype=float)[-1]
+    # First close on or after each row, and closes seen before each row
+    first_from = close.bfill().to_numpy(dtype=float)
+    seen_before = np.vstack([
+        np.zeros((1, values.shape[1])),
+        np.cumsum(~np.isnan(values), axis=0),
+    ])
+
+    changes = {"price": latest}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for period, start in starts.items():
+            if start >= len(index):
+                changes[period] = np.full(len(latest), np.nan)
+                continue
+            first = first_from[start]
+            in_window = seen_before[-1] - seen_before[start]
+            changes[period] = np.where(in_window >= 2, (latest - first) / first * 100, np.nan)
+
+    return pd.DataFrame(changes, index=close.columns)
+
+
+class HeatmapPayload(NamedTuple):
+    """A heatmap response serialized once: gzipped JSON and a weak ETag of it."""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_response(cls, response: HeatmapResponse) -> "HeatmapPayload":
+        raw = fast_json.dumps(response.model_dump()).encode()
+        # mtime=0 so the same content always compresses to the same bytes
+        body = gzip.compress(raw, compresslevel=6, mtime=0)
+        return cls(body=body, etag=f'W/"{hashlib.sha1(raw).hexdigest()[:24]}"')
 
 
 class HeatmapService:
@@ -41,62 +100,66 @@ class HeatmapService:
         """
         Generate S&P 500 heatmap data grouped by sector.
         """
-        cache_key = f"heatmap_sp500_{period}"
-        cached = cache_service.get(cache_key)
-        if cached:
-            return HeatmapResponse(**cached)
+        payload = await self.get_heatmap_payload(period)
+        return HeatmapResponse.model_validate_json(gzip.decompress(payload.body))
 
-        tickers = SP500_TICKERS
+    async def get_heatmap_payload(self, period: str = "1d") -> HeatmapPayload:
+        """
+        The heatmap for a period as ready-to-send gzipped JSON and its ETag.
+        Cached payloads are returned as is, without rebuilding any models.
+        """
+        # Every period is built from one download; concurrent requests share it
+        heatmaps = await cache_service.get_or_compute(
+            "heatmap_sp500",
+            self._build_heatmaps,
+            ttl=HEATMAP_TTL,
+        )
+        if heatmaps and period in heatmaps:
+            return heatmaps[period]
 
-        loop = asyncio.get_event_loop()
+        if heatmaps:
+            # Unknown periods get the 1d data under their own label
+            data = json.loads(gzip.decompress(heatmaps["1d"].body))
+            return HeatmapPayload.from_response(HeatmapResponse(**{**data, "period": period}))
 
-        def fetch_data():
-            # Step 1: Fetch price history for all tickers
-            yf_period = PERIOD_MAP.get(period, "2d")
+        now = datetime.now()
+        return HeatmapPayload.from_response(HeatmapResponse(
+            sectors=[],
+            period=period,
+            universe="sp500",
+            generated_at=now.isoformat(),
+            cached_at=int(now.timestamp() * 1000),
+        ))
 
-            data = yf.download(
-                tickers,
-                period=yf_period,
-                progress=False,
-                threads=True,
-                auto_adjust=False,
-            )
+    async def _build_heatmaps(self) -> Optional[dict]:
+        """
+        Build the heatmap response for every period, as {period: HeatmapPayload} to cache.
+        Returns None when no price data came back, so it isn't cached.
+        """
+        tickers = get_tickers("sp500")
+
+        loop = asyncio.get_event_loop()
+
+        def fetch_data() -> Optional[pd.DataFrame]:
+            # Step 1: Fetch price history for all tickers, far enough back for every period
+            start = history_start(datetime.now().date())
+            data = market_data.download(tickers, start=start.isoformat())
 
             if data.empty:
-                return {}
+                return None
 
-            # Calculate changes
-            changes = {}
             if isinstance(data.columns, pd.MultiIndex):
-                close_data = data["Close"]
-                for ticker in tickers:
-                    try:
-                        if ticker in close_data.columns:
-                            prices = close_data[ticker].dropna()
-                            if len(prices) >= 2:
-                                current = prices.iloc[-1]
-                                previous = prices.iloc[0]
-                                pct_change = ((current - previous) / previous) * 100
-                                changes[ticker] = {
-                                    "price": float(current),
-                                    "change": float(pct_change),
-                                }
-                    except (KeyError, IndexError):
-                        pass
+                close = data["Close"]
             else:
                 # Single ticker
-                prices = data["Close"].dropna()
-                if len(prices) >= 2:
-                    current = prices.iloc[-1]
-                    previous = prices.iloc[0]
-                    pct_change = ((current - previous) / previous) * 100
-                    changes[tickers[0]] = {
-                        "price": float(current),
-                        "change": float(pct_change),
-                    }
+                close = data[["Close"]].set_axis([tickers[0]], axis=1)
+
+            # Step 2: Changes for all periods at once, in universe order
+            changes = compute_period_changes(close)
+            changes = changes.reindex([t for t in tickers if t in changes.index])
 
             # Explicitly delete DataFrame to help GC
-            del data
+            del data, close
             return changes
 
         def fetch_info(tickers_to_fetch):
@@ -105,8 +168,7 @@ class HeatmapService:
 
             for ticker in tickers_to_fetch:
                 try:
-                    t = yf.Ticker(ticker)
-                    info = t.info
+                    info = market_data.info(ticker)
                     info_data[ticker] = {
                         "sector": info.get("sector", "Other"),
                         "name": info.get("shortName", ticker),
@@ -127,73 +189,83 @@ class HeatmapService:
         # Force garbage collection to free DataFrame memory
         gc.collect()
 
-        if not changes:
-            now = datetime.now()
-            return HeatmapResponse(
-                sectors=[],
-                period=period,
-                universe="sp500",
-                generated_at=now.isoformat(),
-                cached_at=int(now.timestamp() * 1000),
-            )
-
-        # Use static info data (loaded from sp500_info.json at startup)
-        # Falls back to fetching if static data not available
-        info_data = STATIC_STOCK_INFO
-
-        if not info_data:
+        if changes is None or changes.empty:
+            return None
+
+        # Step 3: Static per-ticker columns, largest market cap first.
+        # Use the static reference data; fall back to fetching if it's missing.
+        ref = reference_data()
+        if ref:
+            names = [n or t for n, t in zip(ref.values("name", changes.index), changes.index)]
+            sectors = [s or "Other" for s in ref.values("sector", changes.index)]
+            market_caps = ref.values("market_cap", changes.index)
+        else:
             # Fallback: fetch info dynamically (slow)
             info_cache_key = "heatmap_info_sp500"
-            info_data = cache_service.get(info_cache_key)
+            info_data = await cache_service.get_async(info_cache_key)
 
             if not info_data:
                 info_data = await loop.run_in_executor(
                     self.executor,
                     fetch_info,
-                    list(changes.keys())
+                    list(changes.index)
                 )
                 cache_service.set(info_cache_key, info_data, ttl=3600)
 
-        # Group by sector
-        sectors_dict = defaultdict(list)
-
-        for ticker, price_data in changes.items():
-            info = info_data.get(ticker, {})
-            sector = info.get("sector", "Other")
-
-            stock = HeatmapStock(
-                ticker=ticker,
-                name=info.get("name", ticker),
-                price=round(price_data["price"], 2),
-                change=round(price_data["change"], 2),
-                market_cap=info.get("market_cap"),
-            )
-            sectors_dict[sector].append(stock)
-
-        # Build sector list with averages
-        sectors = []
-        for sector_name, stocks in sectors_dict.items():
-            # Sort stocks by market cap (largest first)
-            stocks.sort(key=lambda s: s.market_cap or 0, reverse=True)
-
-            # Calculate average change for sector
-            avg_change = sum(s.change for s in stocks) / len(stocks) if stocks else 0
-
-            sectors.append(HeatmapSector(
-                name=sector_name,
-                change=round(avg_change, 2),
-                stocks=stocks,
-            ))
-
-        # Sort sectors by total market cap
-        sectors.sort(
-            key=lambda s: sum(st.market_cap or 0 for st in s.stocks),
-            reverse=True
-        )
+            info = [info_data.get(ticker, {}) for ticker in changes.index]
+            names = [i.get("name", t) for i, t in zip(info, changes.index)]
+            sectors = [i.get("sector", "Other") for i in info]
+            market_caps = [i.get("market_cap") for i in info]
+
+        stocks = pd.DataFrame({
+            "ticker": changes.index,
+            "name": names,
+            "sector": sectors,
+            "market_cap": market_caps,
+            "price": [round(p, 2) for p in changes["price"].tolist()],
+        })
+        stocks["cap"] = stocks["market_cap"].fillna(0).astype(float)
+        stocks = stocks.sort_values("cap", ascending=False, kind="stable")
 
         now = datetime.now()
         cached_at = int(now.timestamp() * 1000)  # Unix timestamp in ms
 
+        heatmaps = {}
+        for period in HEATMAP_PERIODS:
+            period_changes = changes[period].loc[stocks["ticker"]].to_numpy()
+            has_change = ~np.isnan(period_changes)
+            period_stocks = stocks[has_change].assign(
+                change=[round(c, 2) for c in period_changes[has_change].tolist()]
+            )
+            heatmaps[period] = self._build_response(period_stocks, period, now, cached_at)
+
+        return heatmaps
+
+    def _build_response(
+        self, stocks: pd.DataFrame, period: str, now: datetime, cached_at: int
+    ) -> HeatmapPayload:
+        """Group one period's stocks (sorted by market cap) into sectors."""
+        # Sector averages and sizes as grouped reductions, in first-seen order
+        grouped = stocks.groupby("sector", sort=False)
+        sector_change = grouped["change"].mean()
+        sector_cap = grouped["cap"].sum().sort_values(ascending=False, kind="stable")
+
+        records = stocks[["ticker", "name", "price", "change", "market_cap"]].astype(object)
+        records = records.where(records.notna(), None)
+        stocks_by_sector = {
+            name: [HeatmapStock(**row) for row in group.to_dict("records")]
+            for name, group in records.groupby(stocks["sector"], sort=False)
+        }
+
+        sectors = [
+            HeatmapSector(
+                name=name,
+                change=round(float(sector_change[name]), 2),
+                stocks=stocks_by_sector[name],
+            )
+            for name in sector_cap.index
+        ]
+
         response = HeatmapResponse(
             sectors=sectors,
             period=period,
@@ -202,10 +274,7 @@ class HeatmapService:
             cached_at=cached_at,
         )
 
-        # Cache for 3 hours to minimize memory-leaking yf.download calls
-        cache_service.set(cache_key, response.model_dump(), ttl=10800)
-
-        return response
+        return HeatmapPayload.from_response(response)
 
 
 # Global service instance
@@ -0,0 +1,497 @@
+"""
+Market data provider layer.
+
+All upstream market data (bulk prices, Ticker.info, option expirations and
+chains, price history, calendar, news, SEC filings, earnings dates and the
+other Ticker attributes the stock routes read) goes through a
+MarketDataProvider, so the
+scanner, heatmap and API routes can run against live yfinance or against a
+local recording with no network access.
+
+Select the provider with environment variables:
+    MARKET_DATA_PROVIDER    yfinance (default), record or replay
+    MARKET_DATA_DIR         recording directory (default backend/.market_data)
+    MARKET_DATA_LATENCY_MS  injected latency per replayed call (default 0)
+    MARKET_DATA_JITTER_MS   extra random latency per replayed call (default 0)
+
+Every live upstream call made through the global provider first takes a token
+from the shared upstream rate budget (see concurrency.py).
+"""
+import json
+import os
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import yfinance as yf
+import pandas as pd
+from yfinance.exceptions import YFRateLimitError
+
+from app.services.cache_service import cache_service
+from app.services.concurrency import TokenBucket, upstream_rate_limiter
+
+
+DEFAULT_DATA_DIR = Path(__file__).parent.parent.parent / ".market_data"
+
+# How long the yf.Ticker used for option chains (and the expiration list it
+# has fetched) is reused
+TICKER_TTL = 3600
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class OptionChain(NamedTuple):
+    calls: pd.DataFrame
+    puts: pd.DataFrame
+
+
+class MarketDataProvider(ABC):
+    """Interface for every upstream market data call. Methods block."""
+
+    @abstractmethod
+    def download(
+        self,
+        tickers: list[str],
+        period: Optional[str] = None,
+        start: Optional[str] = None,
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        """Bulk OHLCV download (yf.download with auto_adjust=False)."""
+
+    @abstractmethod
+    def info(self, ticker: str) -> dict:
+        """Ticker.info"""
+
+    @abstractmethod
+    def options(self, ticker: str) -> list[str]:
+        """Ticker.options - available expiration dates (YYYY-MM-DD)."""
+
+    @abstractmethod
+    def option_chain(self, ticker: str, expiration: str) -> OptionChain:
+        """Ticker.option_chain(expiration)"""
+
+    @abstractmethod
+    def history(self, ticker: str, period: str, interval: str) -> pd.DataFrame:
+        """Ticker.history(period, interval)"""
+
+    @abstractmethod
+    def calendar(self, ticker: str) -> dict:
+        """Ticker.calendar"""
+
+    @abstractmethod
+    def news(self, ticker: str) -> list[dict]:
+        """Ticker.news"""
+
+    @abstractmethod
+    def sec_filings(self, ticker: str) -> list[dict]:
+        """Ticker.sec_filings"""
+
+    @abstractmethod
+    def earnings_dates(self, ticker: str) -> pd.DataFrame:
+        """Ticker.earnings_dates, indexed by timezone-aware report time."""
+
+    @abstractmethod
+    def ticker_attribute(self, ticker: str, attribute: str):
+        """
+        Any other Ticker attribute (recommendations, major_holders, ...):
+        a DataFrame, a dict, or None when Yahoo has none.
+        """
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance via yfinance."""
+
+    @staticmethod
+    def _chain_ticker_key(ticker: str) -> str:
+        return f"yfticker_{ticker}"
+
+    def _chain_ticker(self, ticker: str) -> yf.Ticker:
+        """
+        Reuse one yf.Ticker per symbol for chain fetches, so a chain fetch
+        doesn't refetch the expiration list that option_chain() needs
+        internally. yf.Ticker memoizes what it fetches, so every other call
+        gets a fresh one and callers' cache TTLs decide how fresh data is.
+        """
+        key = self._chain_ticker_key(ticker)
+        t = cache_service.get(key)
+        if t is None:
+            t = yf.Ticker(ticker)
+            cache_service.set(key, t, ttl=TICKER_TTL, persist=False)
+        return t
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        kwargs = {"start": start} if start else {"period": period or "1mo"}
+        data = yf.download(
+            tickers,
+            interval=interval,
+            progress=False,
+            threads=True,
+            auto_adjust=False,
+            **kwargs,
+        )
+        return data if data is not None else pd.DataFrame()
+
+    def info(self, ticker):
+        return yf.Ticker(ticker).info
+
+    def options(self, ticker):
+        # Always a live fetch: a fresh Ticker, which then replaces the cached
+        # one so chain fetches see the same expiration list
+        t = yf.Ticker(ticker)
+        expirations = list(t.options)
+        cache_service.set(self._chain_ticker_key(ticker), t, ttl=TICKER_TTL, persist=False)
+        return expirations
+
+    def option_chain(self, ticker, expiration):
+        chain = self._chain_ticker(ticker).option_chain(expiration)
+        return OptionChain(calls=chain.calls, puts=chain.puts)
+
+    def history(self, ticker, period, interval):
+        return yf.Ticker(ticker).history(period=period, interval=interval)
+
+    def calendar(self, ticker):
+        return yf.Ticker(ticker).calendar
+
+    def news(self, ticker):
+        return yf.Ticker(ticker).news or []
+
+    def sec_filings(self, ticker):
+        return yf.Ticker(ticker).sec_filings or []
+
+    def earnings_dates(self, ticker):
+        data = yf.Ticker(ticker).earnings_dates
+        return data if data is not None else pd.DataFrame()
+
+    def ticker_attribute(self, ticker, attribute):
+        return getattr(yf.Ticker(ticker), attribute)
+
+
+class RateLimitedProvider(MarketDataProvider):
+    """Take a token from a shared TokenBucket before every upstream call."""
+
+    def __init__(self, inner: MarketDataProvider, bucket: TokenBucket):
+        self.inner = inner
+        self.bucket = bucket
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        self.bucket.acquire()
+        return self.inner.download(tickers, period=period, start=start, interval=interval)
+
+    def info(self, ticker):
+        self.bucket.acquire()
+        return self.inner.info(ticker)
+
+    def options(self, ticker):
+        self.bucket.acquire()
+        return self.inner.options(ticker)
+
+    def option_chain(self, ticker, expiration):
+        self.bucket.acquire()
+        return self.inner.option_chain(ticker, expiration)
+
+    def history(self, ticker, period, interval):
+        self.bucket.acquire()
+        return self.inner.history(ticker, period, interval)
+
+    def calendar(self, ticker):
+        self.bucket.acquire()
+        return self.inner.calendar(ticker)
+
+    def news(self, ticker):
+        self.bucket.acquire()
+        return self.inner.news(ticker)
+
+    def sec_filings(self, ticker):
+        self.bucket.acquire()
+        return self.inner.sec_filings(ticker)
+
+    def earnings_dates(self, ticker):
+        self.bucket.acquire()
+        return self.inner.earnings_dates(ticker)
+
+    def ticker_attribute(self, ticker, attribute):
+        self.bucket.acquire()
+        return self.inner.ticker_attribute(ticker, attribute)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an upstream error means we are being throttled."""
+    if isinstance(error, YFRateLimitError):
+        return True
+    message = str(error)
+    return "429" in message or "Too Many Requests" in message or "Rate limit" in message
+
+
+# =============================================================================
+# Record / Replay
+# =============================================================================
+#
+# Recording layout under the data directory:
+#   prices/{TICKER}.csv                    daily OHLCV, merged across downloads
+#   info/{TICKER}.json
+#   options/{TICKER}.json                  list of expirations
+#   chains/{TICKER}/{EXPIRATION}_calls.csv
+#   chains/{TICKER}/{EXPIRATION}_puts.csv
+#   history/{TICKER}/{PERIOD}_{INTERVAL}.csv
+#   calendar/{TICKER}.json
+#   news/{TICKER}.json
+#   sec_filings/{TICKER}.json
+#   earnings_dates/{TICKER}.csv
+#   attributes/{TICKER}/{ATTRIBUTE}.csv    other Ticker attributes that are
+#   attributes/{TICKER}/{ATTRIBUTE}.json   DataFrames, or anything else
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _decode_dates(value):
+    """Turn ISO date strings written by _json_default back into dates."""
+    if isinstance(value, str) and _DATE_RE.match(value):
+        return date.fromisoformat(value)
+    if isinstance(value, list):
+        return [_decode_dates(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _decode_dates(v) for k, v in value.items()}
+    return value
+
+
+def _split_download(data: pd.DataFrame, tickers: list[str]) -> dict[str, pd.DataFrame]:
+    """Split a yf.download frame into one OHLCV frame per ticker."""
+    if data.empty:
+        return {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {tickers[0]: data}
+
+    frames = {}
+    for ticker in data.columns.get_level_values(1).unique():
+        frames[ticker] = data.xs(ticker, axis=1, level=1).dropna(how="all")
+    return frames
+
+
+def _slice_period(df: pd.DataFrame, period: Optional[str], start: Optional[str]) -> pd.DataFrame:
+    """Apply a yfinance period/start to a recorded daily history."""
+    if df.empty:
+        return df
+    if start:
+        return df[df.index >= pd.Timestamp(start)]
+    if not period or period == "max":
+        return df
+
+    last = df.index[-1]
+    if period == "ytd":
+        return df[df.index.year == last.year]
+    if period.endswith("d"):
+        # Day periods count trading days, like Yahoo's range parameter
+        return df.iloc[-int(period[:-1]):]
+    if period.endswith("mo"):
+        return df[df.index > last - pd.DateOffset(months=int(period[:-2]))]
+    if period.endswith("y"):
+        return df[df.index > last - pd.DateOffset(years=int(period[:-1]))]
+    return df
+
+
+class RecordingProvider(MarketDataProvider):
+    """Pass calls through to another provider and record every response."""
+
+    def __init__(self, inner: MarketDataProvider, root: Path):
+        self.inner = inner
+        self.root = Path(root)
+
+    def _path(self, *parts: str) -> Path:
+        path = self.root.joinpath(*parts)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _write_json(self, path: Path, value):
+        with open(path, "w") as f:
+            json.dump(value, f, default=_json_default)
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        data = self.inner.download(tickers, period=period, start=start, interval=interval)
+        if interval != "1d":
+            return data
+
+        ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
+        for ticker, frame in _split_download(data, ticker_list).items():
+            path = self._path("prices", f"{ticker}.csv")
+            if path.exists():
+                existing = pd.read_csv(path, index_col=0, parse_dates=True)
+                frame = frame.combine_first(existing)
+            frame.sort_index().to_csv(path)
+        return data
+
+    def info(self, ticker):
+        info = self.inner.info(ticker)
+        self._write_json(self._path("info", f"{ticker}.json"), info)
+        return info
+
+    def options(self, ticker):
+        expirations = self.inner.options(ticker)
+        self._write_json(self._path("options", f"{ticker}.json"), list(expirations))
+        return expirations
+
+    def option_chain(self, ticker, expiration):
+        chain = self.inner.option_chain(ticker, expiration)
+        chain.calls.to_csv(self._path("chains", ticker, f"{expiration}_calls.csv"), index=False)
+        chain.puts.to_csv(self._path("chains", ticker, f"{expiration}_puts.csv"), index=False)
+        return chain
+
+    def history(self, ticker, period, interval):
+        hist = self.inner.history(ticker, period, interval)
+        hist.to_csv(self._path("history", ticker, f"{period}_{interval}.csv"))
+        return hist
+
+    def calendar(self, ticker):
+        calendar = self.inner.calendar(ticker)
+        self._write_json(self._path("calendar", f"{ticker}.json"), calendar or {})
+        return calendar
+
+    def news(self, ticker):
+        news = self.inner.news(ticker)
+        self._write_json(self._path("news", f"{ticker}.json"), news)
+        return news
+
+    def sec_filings(self, ticker):
+        filings = self.inner.sec_filings(ticker)
+        self._write_json(self._path("sec_filings", f"{ticker}.json"), filings)
+        return filings
+
+    def earnings_dates(self, ticker):
+        data = self.inner.earnings_dates(ticker)
+        data.to_csv(self._path("earnings_dates", f"{ticker}.csv"))
+        return data
+
+    def ticker_attribute(self, ticker, attribute):
+        value = self.inner.ticker_attribute(ticker, attribute)
+        if isinstance(value, pd.DataFrame):
+            value.to_csv(self._path("attributes", ticker, f"{attribute}.csv"))
+        else:
+            self._write_json(self._path("attributes", ticker, f"{attribute}.json"), value)
+        return value
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serve recorded data from local files, with optional injected latency.
+    Missing recordings behave like yfinance does for an unknown ticker.
+    """
+
+    def __init__(self, root: Path, latency_ms: float = 0, jitter_ms: float = 0):
+        self.root = Path(root)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def _delay(self):
+        delay = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _read_json(self, *parts: str, default=None):
+        path = self.root.joinpath(*parts)
+        if not path.exists():
+            return default
+        with open(path) as f:
+            return json.load(f)
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        self._delay()
+        ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
+
+        frames = {}
+        for ticker in ticker_list:
+            path = self.root / "prices" / f"{ticker}.csv"
+            if path.exists():
+                frame = pd.read_csv(path, index_col=0, parse_dates=True)
+                frames[ticker] = _slice_period(frame, period, start)
+
+        if not frames:
+            return pd.DataFrame()
+
+        # Same (Price, Ticker) column layout as yf.download
+        data = pd.concat(frames, axis=1, names=["Ticker", "Price"])
+        return data.swaplevel(0, 1, axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
+    def info(self, ticker):
+        self._delay()
+        return self._read_json("info", f"{ticker}.json", default={})
+
+    def options(self, ticker):
+        self._delay()
+        return self._read_json("options", f"{ticker}.json", default=[])
+
+    def option_chain(self, ticker, expiration):
+        self._delay()
+        calls_path = self.root / "chains" / ticker / f"{expiration}_calls.csv"
+        puts_path = self.root / "chains" / ticker / f"{expiration}_puts.csv"
+        if not calls_path.exists() or not puts_path.exists():
+            raise ValueError(f"Expiration `{expiration}` cannot be found for {ticker}")
+        return OptionChain(calls=pd.read_csv(calls_path), puts=pd.read_csv(puts_path))
+
+    def history(self, ticker, period, interval):
+        self._delay()
+        path = self.root / "history" / ticker / f"{period}_{interval}.csv"
+        if path.exists():
+            return pd.read_csv(path, index_col=0, parse_dates=True)
+
+        # Fall back to slicing recorded daily prices
+        prices_path = self.root / "prices" / f"{ticker}.csv"
+        if interval == "1d" and prices_path.exists():
+            return _slice_period(pd.read_csv(prices_path, index_col=0, parse_dates=True), period, None)
+        return pd.DataFrame()
+
+    def calendar(self, ticker):
+        self._delay()
+        return _decode_dates(self._read_json("calendar", f"{ticker}.json", default={}))
+
+    def news(self, ticker):
+        self._delay()
+        return self._read_json("news", f"{ticker}.json", default=[])
+
+    def sec_filings(self, ticker):
+        self._delay()
+        return _decode_dates(self._read_json("sec_filings", f"{ticker}.json", default=[]))
+
+    def earnings_dates(self, ticker):
+        self._delay()
+        path = self.root / "earnings_dates" / f"{ticker}.csv"
+        if not path.exists():
+            return pd.DataFrame()
+        data = pd.read_csv(path, index_col=0)
+        # Report times mix EST and EDT offsets, so parse them as UTC
+        data.index = pd.to_datetime(data.index, utc=True)
+        return data
+
+    def ticker_attribute(self, ticker, attribute):
+        self._delay()
+        path = self.root / "attributes" / ticker / f"{attribute}.csv"
+        if path.exists():
+            return pd.read_csv(path, index_col=0)
+        return self._read_json("attributes", ticker, f"{attribute}.json")
+
+
+def create_provider() -> MarketDataProvider:
+    """Build the provider selected by MARKET_DATA_PROVIDER."""
+    kind = os.environ.get("MARKET_DATA_PROVIDER", "yfinance").lower()
+    data_dir = Path(os.environ.get("MARKET_DATA_DIR", DEFAULT_DATA_DIR))
+
+    if kind == "replay":
+        # Local files need no rate budget; use injected latency to model upstream
+        return ReplayProvider(
+            data_dir,
+            latency_ms=float(os.environ.get("MARKET_DATA_LATENCY_MS", "0")),
+            jitter_ms=float(os.environ.get("MARKET_DATA_JITTER_MS", "0")),
+        )
+    if kind == "record":
+        return RateLimitedProvider(RecordingProvider(YFinanceProvider(), data_dir), upstream_rate_limiter)
+    return RateLimitedProvider(YFinanceProvider(), upstream_rate_limiter)
+
+
+# Global provider instance
+market_data = create_provider()
@@ -0,0 +1,237 @@
+"""
+Vectorized option-chain filtering.
+
+Computes moneyness, collateral, ROI and annualized ROI for a whole calls/puts
+DataFrame as NumPy column operations, applies every ScanRequest option filter
+as a boolean mask, and only builds result records for the surviving rows.
+"""
+from datetime import date
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from app.models.requests import ScanRequest
+from app.models.records import OptionRecord
+
+
+def _column(df: pd.DataFrame, name: str, fill: Optional[float] = None) -> np.ndarray:
+    """
+    Get a chain column as a float array.
+    Missing columns are all NaN; NaN values are replaced by `fill` if given.
+    """
+    if name in df.columns:
+        values = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    else:
+        values = np.full(len(df), np.nan)
+
+    if fill is not None:
+        values = np.where(np.isnan(values), fill, values)
+
+    return values
+
+
+def compute_option_mask(
+    strike: np.ndarray,
+    premium: np.ndarray,
+    volume: np.ndarray,
+    opt_type: Union[str, np.ndarray],
+    stock_price: Union[float, np.ndarray],
+    dte: Union[int, np.ndarray],
+    request: ScanRequest,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Apply the per-contract ScanRequest filters to whole columns.
+    opt_type is "call"/"put" for a single chain, or a per-row is-call bool
+    array; stock_price and dte may likewise be scalars or per-row arrays.
+    Returns (mask, is_itm, collateral, roi, annualized_roi), all row-aligned.
+    """
+    is_call = opt_type == "call" if isinstance(opt_type, str) else opt_type
+
+    # Calculate moneyness
+    is_itm = np.where(is_call, stock_price > strike, stock_price < strike)
+
+    mask = premium > 0
+
+    # Moneyness filter
+    if request.moneyness == "itm":
+        mask &= is_itm
+    elif request.moneyness == "otm":
+        mask &= ~is_itm
+
+    # Volume filter
+    if request.min_volume:
+        mask &= ~(volume < request.min_volume)
+
+    # Calculate collateral: strike for puts, 100 shares at the current
+    # price for calls (covered call)
+    collateral = np.where(is_call, np.multiply(stock_price, 100, dtype=float), strike * 100)
+
+    # Collateral filter
+    if request.available_collateral:
+        mask &= ~(collateral > request.available_collateral)
+
+    # ROI calculation
+    dte = np.asarray(dte)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(collateral > 0, (premium * 100 / collateral) * 100, 0.0)
+        annualized_roi = np.where(dte > 0, roi * (365 / np.where(dte > 0, dte, 1)), 0.0)
+
+    # ROI filter
+    if request.min_roi:
+        mask &= ~(roi < request.min_roi)
+
+    return mask, is_itm, collateral, roi, annualized_roi
+
+
+def possible_option_types(request: ScanRequest, stock_price: float) -> list[str]:
+    """
+    The option types ("call", "put") that could have contracts passing the
+    request at this stock price, judged before any chain is fetched. A
+    covered call's collateral is 100 shares whatever its strike, and an ITM
+    put's strike, and so its collateral, is above the stock price.
+    """
+    cap = request.available_collateral
+    option_types = []
+    if request.option_type in ("calls", "both"):
+        if not cap or stock_price * 100 <= cap:
+            option_types.append("call")
+    if request.option_type in ("puts", "both"):
+        if not (cap and request.moneyness == "itm" and stock_price * 100 >= cap):
+            option_types.append("put")
+    return option_types
+
+
+# Chain columns in the row order of chain_arrays()
+CHAIN_COLUMNS = ("strike", "lastPrice", "bid", "ask", "volume", "openInterest", "impliedVolatility")
+
+
+def chain_arrays(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """
+    The chain columns filtering needs as one float64 array, one row per
+    CHAIN_COLUMNS entry, or None for an empty chain. Missing last price,
+    volume and open interest become 0; the rest stay NaN.
+    """
+    if df is None or df.empty or "strike" not in df.columns:
+        return None
+
+    return np.vstack([
+        _column(df, "strike"),
+        _column(df, "lastPrice", fill=0),
+        _column(df, "bid"),
+        _column(df, "ask"),
+        _column(df, "volume", fill=0),
+        _column(df, "openInterest", fill=0),
+        _column(df, "impliedVolatility"),
+    ])
+
+
+def filter_option_chain(
+    df: pd.DataFrame,
+    ticker: str,
+    stock_price: float,
+    exp: date,
+    dte: int,
+    opt_type: str,
+    pe_ratio: Optional[float],
+    next_earnings_date: Optional[date],
+    request: ScanRequest,
+) -> list[OptionRecord]:
+    """
+    Filter one calls or puts DataFrame and build result records for surviving rows.
+    Missing volume and open interest count as 0. A missing last price also
+    counts as 0, so the contract is dropped like any unpriced one rather
+    than reported with a NaN premium and ROI. Missing bid, ask and implied
+    volatility are reported as None.
+    """
+    arrays = chain_arrays(df)
+    if arrays is None:
+        return []
+    return filter_chain_arrays(
+        arrays, ticker, stock_price, exp, dte, opt_type, pe_ratio, next_earnings_date, request
+    )
+
+
+def filter_packed_chain(packed: bytes, *args) -> list[OptionRecord]:
+    """
+    Process pool entry point: filter_chain_arrays() for a chain sent as
+    chain_arrays(df).tobytes(), so workers receive raw float64 columns
+    rather than a pickled DataFrame.
+    """
+    arrays = np.frombuffer(packed, dtype=np.float64).reshape(len(CHAIN_COLUMNS), -1)
+    return filter_chain_arrays(arrays, *args)
+
+
+def filter_chain_arrays(
+    arrays: np.ndarray,
+    ticker: str,
+    stock_price: float,
+    exp: date,
+    dte: int,
+    opt_type: str,
+    pe_ratio: Optional[float],
+    next_earnings_date: Optional[date],
+    request: ScanRequest,
+) -> list[OptionRecord]:
+    """filter_option_chain() for a chain already in chain_arrays() form."""
+    strike, premium, bid, ask, volume, open_interest, implied_volatility = arrays
+
+    mask, is_itm, collateral, roi, annualized_roi = compute_option_mask(
+        strike, premium, volume, opt_type, stock_price, dte, request
+    )
+
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
+        return []
+
+    # Only the surviving rows are converted to Python objects
+    exp_iso = exp.isoformat()
+    earnings_iso = (
+        next_earnings_date.isoformat() if isinstance(next_earnings_date, date) else next_earnings_date
+    )
+    stock_price_rounded = round(stock_price, 2)
+    pe_ratio_rounded = round(pe_ratio, 2) if pe_ratio else None
+
+    columns = zip(
+        strike[rows].tolist(),
+        premium[rows].tolist(),
+        bid[rows].tolist(),
+        ask[rows].tolist(),
+        volume[rows].tolist(),
+        open_interest[rows].tolist(),
+        implied_volatility[rows].tolist(),
+        collateral[rows].tolist(),
+        roi[rows].tolist(),
+        annualized_roi[rows].tolist(),
+        is_itm[rows].tolist(),
+    )
+
+    return [
+        OptionRecord(
+            ticker,
+            stock_price_rounded,
+            round(row_strike, 2),
+            exp_iso,
+            dte,
+            opt_type,
+            round(row_premium, 2),
+            round(bid, 2) if bid and bid == bid else None,
+            round(ask, 2) if ask and ask == ask else None,
+            int(row_volume),
+            int(oi),
+            round(iv, 4) if iv and iv == iv else None,
+            round(row_collateral, 2),
+            round(row_roi, 2),
+            round(row_annualized, 2),
+            "ITM" if itm else "OTM",
+            pe_ratio_rounded,
+            earnings_iso,
+            None,
+            stock_price,
+            pe_ratio,
+            row_collateral,
+            row_roi,
+        )
+        for (row_strike, row_premium, bid, ask, row_volume, oi, iv,
+             row_collateral, row_roi, row_annualized, itm) in columns
+    ]
@@ -0,0 +1,246 @@
+"""
+Background prefetch of market data for the built-in ticker universes.
+
+Runs inside the FastAPI app lifespan and keeps prices, expirations and option
+chains for SP100_TICKERS or SP500_TICKERS warm in the cache, so interactive
+scans rarely wait on upstream. Cycles run often while the US market is open
+and rarely while it's closed. Every upstream call goes through the shared
+rate budget of the market data provider. Each complete cycle is also
+materialized into a columnar snapshot that scans of the universe query
+directly while it's fresh.
+
+Configured with environment variables:
+    PREFETCH_ENABLED            run the scheduler (default true)
+    PREFETCH_UNIVERSE           sp100 or sp500 (default sp100)
+    PREFETCH_MAX_DTE            only prefetch chains expiring within this many days (default 60, 0 for all)
+    PREFETCH_CONCURRENCY        tickers refreshed at once (default 2)
+    PREFETCH_MARKET_INTERVAL    seconds between cycles while the market is open (default 240)
+    PREFETCH_CLOSED_INTERVAL    seconds between cycles while it's closed (default 3600)
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from app.services.chain_cache import option_chain_cache
+from app.services.concurrency import AdaptiveConcurrencyLimiter
+from app.services.market_data import OptionChain, is_rate_limit_error
+from app.services.scanner_service import scanner_service
+from app.services.snapshot_store import build_snapshot, snapshot_store
+from app.utils.ticker_lists import get_tickers
+
+
+PREFETCH_ENABLED = os.environ.get("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+PREFETCH_UNIVERSE = os.environ.get("PREFETCH_UNIVERSE", "sp100")
+PREFETCH_MAX_DTE = int(os.environ.get("PREFETCH_MAX_DTE", "60"))
+PREFETCH_CONCURRENCY = int(os.environ.get("PREFETCH_CONCURRENCY", "2"))
+PREFETCH_MARKET_INTERVAL = int(os.environ.get("PREFETCH_MARKET_INTERVAL", "240"))
+PREFETCH_CLOSED_INTERVAL = int(os.environ.get("PREFETCH_CLOSED_INTERVAL", "3600"))
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """Regular US trading hours, Monday to Friday. Holidays aren't modelled."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if now.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
+
+
+def seconds_until_open(now: Optional[datetime] = None) -> float:
+    """Seconds until the next regular session opens (0 if it's open now)."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if is_market_open(now):
+        return 0.0
+
+    next_open = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    if next_open <= now:
+        next_open += timedelta(days=1)
+    while next_open.weekday() >= 5:
+        next_open += timedelta(days=1)
+    return (next_open - now).total_seconds()
+
+
+class PrefetchScheduler:
+    """
+    Periodically refreshes one universe's market data in the background.
+    start()/stop() are called from the app lifespan.
+    """
+
+    def __init__(
+        self,
+        universe: str = PREFETCH_UNIVERSE,
+        max_dte: int = PREFETCH_MAX_DTE,
+        concurrency: int = PREFETCH_CONCURRENCY,
+        market_interval: int = PREFETCH_MARKET_INTERVAL,
+        closed_interval: int = PREFETCH_CLOSED_INTERVAL,
+    ):
+        self.universe = universe
+        self.max_dte = max_dte
+        self.market_interval = market_interval
+        self.closed_interval = closed_interval
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        # Kept small so prefetching leaves most of the rate budget to interactive scans
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial=concurrency, min_limit=1, max_limit=concurrency
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._cycles = 0
+        self._cycle_started: Optional[str] = None
+        self._cycle_finished: Optional[str] = None
+        self._cycle_seconds: Optional[float] = None
+        self._next_cycle_at: Optional[str] = None
+        # ticker -> last refresh status
+        self._tickers: dict[str, dict] = {}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_cycle()
+            except Exception as e:
+                print(f"Error in prefetch cycle: {e}")
+
+            delay = self._next_delay()
+            self._next_cycle_at = (datetime.now() + timedelta(seconds=delay)).isoformat()
+            await asyncio.sleep(delay)
+
+    def _next_delay(self) -> float:
+        if is_market_open():
+            return self.market_interval
+        # Don't sleep through the open
+        return max(1.0, min(self.closed_interval, seconds_until_open()))
+
+    def _ttl(self) -> Optional[int]:
+        """
+        TTL for prefetched entries: the normal TTLs while the market is open.
+        While closed, quotes don't move, so keep entries until the next cycle
+        or the open, whichever comes first.
+        """
+        if is_market_open():
+            return None
+        return int(max(1, min(self.closed_interval * 1.5, seconds_until_open())))
+
+    async def run_cycle(self):
+        """
+        Refresh prices, then expirations and chains for every ticker, then
+        publish a snapshot of the universe if every ticker refreshed.
+        """
+        start = time.time()
+        self._cycle_started = datetime.now().isoformat()
+        tickers = get_tickers(self.universe)
+        ttl = self._ttl()
+        chains: dict[str, list[tuple[str, OptionChain]]] = {}
+        failed = 0
+
+        # Step 1: Prices, in the same chunks a scan of this universe reads
+        prices, price_timestamp = await scanner_service.fetch_prices(
+            tickers, refresh=True, ttl=ttl or 600
+        )
+        refreshed_at = datetime.now().isoformat()
+        for ticker in tickers:
+            status = self._tickers.setdefault(ticker, {})
+            status["price"] = prices.get(ticker)
+            status["price_refreshed_at"] = refreshed_at
+
+        # Step 2: Expirations and near-term chains, a few tickers at a time
+        async for ticker, result in self.limiter.map_unordered(
+            tickers,
+            lambda t: self._refresh_ticker(t, ttl),
+            classify_error=lambda e: "throttled" if is_rate_limit_error(e) else "error",
+        ):
+            status = self._tickers[ticker]
+            if isinstance(result, Exception):
+                failed += 1
+                status["error"] = str(result)
+            else:
+                chains[ticker] = result
+                status["chains"] = len(result)
+                status["chains_refreshed_at"] = datetime.now().isoformat()
+                status["error"] = None
+
+        # Step 3: Materialize the cycle for snapshot scans. A partial cycle
+        # would silently drop tickers from results, so only publish full ones.
+        if failed:
+            print(f"Prefetch cycle: {failed} tickers failed, keeping the previous snapshot")
+        else:
+            stock_data = await scanner_service.fetch_stock_info(tickers, prices)
+            loop = asyncio.get_event_loop()
+            snapshot = await loop.run_in_executor(self.executor, lambda: build_snapshot(
+                self.universe,
+                stock_data,
+                chains,
+                as_of=start,
+                expires_at=start + (ttl or option_chain_cache.chain_ttl),
+                max_dte=self.max_dte or None,
+                price_data_timestamp=price_timestamp,
+            ))
+            snapshot_store.put(snapshot)
+
+        self._cycles += 1
+        self._cycle_finished = datetime.now().isoformat()
+        self._cycle_seconds = round(time.time() - start, 2)
+
+    async def _refresh_ticker(
+        self, ticker: str, ttl: Optional[int]
+    ) -> list[tuple[str, OptionChain]]:
+        """Refresh one ticker's chains. Returns its (expiration, chain) pairs."""
+        loop = asyncio.get_event_loop()
+        expirations = await loop.run_in_executor(
+            self.executor, lambda: option_chain_cache.get_expirations(ticker, ttl=ttl)
+        )
+
+        today = datetime.now().date()
+        chains = []
+        for exp in expirations:
+            dte = (datetime.strptime(exp, "%Y-%m-%d").date() - today).days
+            if dte < 0 or (self.max_dte and dte > self.max_dte):
+                continue
+            chain = await loop.run_in_executor(
+                self.executor,
+                lambda e=exp: option_chain_cache.get_chain(ticker, e, refresh=True, ttl=ttl),
+            )
+            chains.append((exp, chain))
+
+        return chains
+
+    def status(self, ticker: Optional[str] = None) -> dict:
+        """Scheduler status, with the last refresh of each ticker."""
+        if ticker is not None:
+            return self._tickers.get(ticker.upper(), {})
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "universe": self.universe,
+            "max_dte": self.max_dte,
+            "market_open": is_market_open(),
+            "cycles": self._cycles,
+            "last_cycle_started": self._cycle_started,
+            "last_cycle_finished": self._cycle_finished,
+            "last_cycle_seconds": self._cycle_seconds,
+            "next_cycle_at": self._next_cycle_at,
+            "limiter": self.limiter.stats(),
+            "snapshots": snapshot_store.stats(),
+            "tickers": self._tickers,
+        }
+
+
+# Global scheduler instance, started by the app lifespan when enabled
+prefetch_scheduler = PrefetchScheduler()
@@ -0,0 +1,162 @@
+"""
+Per-ticker cache of latest prices.
+
+Each ticker's price is cached on its own under price_{TICKER}, with the time
+it was downloaded, so overlapping ticker lists (sp100 inside sp500, a scan
+plus one custom ticker, the batch price endpoint) share what was already
+fetched. A request bulk-downloads only its missing or expired tickers, in
+one market data download. Concurrent requests share in-flight downloads
+ticker by ticker.
+
+Configured with environment variables:
+    PRICE_CACHE_TTL   seconds a downloaded price is reused (default 600)
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import pandas as pd
+
+from app.services.cache_service import cache_service
+from app.services.market_data import market_data
+
+
+PRICE_TTL = int(os.environ.get("PRICE_CACHE_TTL", "600"))
+
+
+def last_closes(data: pd.DataFrame, tickers: list[str]) -> dict[str, Optional[float]]:
+    """Each ticker's last close in a market_data.download() frame (None if absent)."""
+    result: dict[str, Optional[float]] = dict.fromkeys(tickers)
+    if data.empty:
+        return result
+
+    # Handle MultiIndex columns (multiple tickers)
+    if isinstance(data.columns, pd.MultiIndex):
+        close_data = data["Close"]
+        for ticker in tickers:
+            try:
+                if ticker in close_data.columns:
+                    price = close_data[ticker].iloc[-1]
+                    result[ticker] = float(price) if pd.notna(price) else None
+            except (KeyError, IndexError):
+                pass
+    else:
+        # Single ticker - flat columns
+        price = data["Close"].iloc[-1]
+        result[tickers[0]] = float(price) if pd.notna(price) else None
+    return result
+
+
+class PriceStore:
+    """
+    Read-through per-ticker price cache over bulk downloads. Use from the
+    event loop; downloads run in a thread.
+    """
+
+    def __init__(self, ttl: int = PRICE_TTL):
+        self.ttl = ttl
+        # ticker -> the download task fetching it; its result maps ticker -> entry
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._stats = {"hits": 0, "misses": 0, "downloads": 0, "downloaded_tickers": 0}
+
+    @staticmethod
+    def key(ticker: str) -> str:
+        return f"price_{ticker.upper()}"
+
+    async def get(
+        self,
+        tickers: list[str],
+        refresh: bool = False,
+        ttl: Optional[int] = None,
+        run: Optional[Callable[..., Awaitable[Any]]] = None,
+    ) -> tuple[dict[str, Optional[float]], Optional[float]]:
+        """
+        Prices for tickers, downloading the missing ones (all of them with
+        refresh=True) in one call. `run(fn, *args)` runs the blocking
+        download; by default it goes to the loop's default executor.
+        Returns (prices, timestamp_ms of the oldest price). A ticker with no
+        data maps to None; one whose download failed is left out.
+        """
+        prices: dict[str, Optional[float]] = {}
+        timestamps: list[float] = []
+
+        def take(ticker: str, entry: dict):
+            prices[ticker] = entry["price"]
+            timestamps.append(entry["timestamp"])
+
+        missing = []
+        unique = list(dict.fromkeys(tickers))
+        cached = {} if refresh else await cache_service.get_many_async([self.key(t) for t in unique])
+        for ticker in unique:
+            entry = cached.get(self.key(ticker))
+            if entry is None:
+                missing.append(ticker)
+            else:
+                take(ticker, entry)
+        self._stats["hits"] += len(prices)
+        self._stats["misses"] += len(missing)
+
+        if missing:
+            # Join downloads already fetching some of these; fetch the rest in one
+            waiting = {ticker: self._inflight.get(ticker) for ticker in missing}
+            claimed = [ticker for ticker, task in waiting.items() if task is None]
+            if claimed:
+                task = asyncio.ensure_future(self._download(claimed, ttl or self.ttl, run))
+                for ticker in claimed:
+                    self._inflight[ticker] = task
+                    waiting[ticker] = task
+                task.add_done_callback(lambda t, claimed=claimed: self._finished(t, claimed))
+
+            # Shielded, so one caller going away doesn't cancel a shared download
+            tasks = list(dict.fromkeys(waiting.values()))
+            await asyncio.gather(*(asyncio.shield(task) for task in tasks))
+            for ticker, task in waiting.items():
+                entry = task.result().get(ticker)
+                if entry is not None:
+                    take(ticker, entry)
+
+        return prices, min(timestamps, default=None)
+
+    def _finished(self, task: asyncio.Task, claimed: list[str]):
+        for ticker in claimed:
+            if self._inflight.get(ticker) is task:
+                del self._inflight[ticker]
+
+    async def _download(
+        self, tickers: list[str], ttl: int, run: Optional[Callable[..., Awaitable[Any]]]
+    ) -> dict[str, dict]:
+        """Download prices and cache each ticker's entry; {} if the download failed."""
+        timestamp = time.time() * 1000  # Current time in ms
+        try:
+            if run is None:
+                loop = asyncio.get_running_loop()
+                closes = await loop.run_in_executor(None, self._download_closes, tickers)
+            else:
+                closes = await run(self._download_closes, tickers)
+        except Exception as e:
+            print(f"Error downloading prices: {e}")
+            return {}
+
+        self._stats["downloads"] += 1
+        self._stats["downloaded_tickers"] += len(tickers)
+        entries = {}
+        for ticker, price in closes.items():
+            entries[ticker] = {"price": price, "timestamp": timestamp}
+            cache_service.set(self.key(ticker), entries[ticker], ttl=ttl)
+        return entries
+
+    @staticmethod
+    def _download_closes(tickers: list[str]) -> dict[str, Optional[float]]:
+        return last_closes(market_data.download(tickers, period="1d"), tickers)
+
+    def stats(self) -> dict:
+        return {
+            "ttl": self.ttl,
+            "in_flight_tickers": len(self._inflight),
+            **self._stats,
+        }
+
+
+# Global price store instance
+price_store = PriceStore()
@@ -0,0 +1,87 @@
+"""
+Top-K ranking for scans that only want the best contracts.
+
+TopK keeps a bounded min-heap of result records by a sort field, so a scan
+holds K results instead of all of them. It also lets the scanner skip
+upstream work: score_upper_bound() gives the best score any contract of an
+expiration could reach, and once the heap is full, an expiration (or a
+whole ticker) whose bound can't beat the K-th score is never fetched.
+
+The bounds assume a premium never exceeds the collateral behind it (a call
+is worth less than its stock, a put less than its strike), so ROI is at
+most 100% and annualized ROI at most 100% * 365 / dte. A deep ITM put can
+really be priced near its strike, so there is no tighter bound that holds
+without a pricing model, and a roi ranking rarely prunes anything. What
+the request itself rules out (calls on a stock whose 100 shares exceed
+available_collateral, say) is skipped in every scan, ranked or not; see
+option_filter.possible_option_types().
+"""
+import heapq
+import itertools
+from typing import Optional
+
+from app.models.records import OptionRecord
+
+
+SORT_FIELDS = ("annualized_roi", "roi")
+
+MAX_ROI = 100.0
+
+
+def score_upper_bound(sort_by: str, dte: Optional[int]) -> float:
+    """The highest score a contract expiring in `dte` days could have."""
+    if sort_by == "roi":
+        return MAX_ROI
+    if dte is None:
+        return float("inf")
+    # Same-day contracts are reported with an annualized ROI of 0
+    return MAX_ROI * 365 / dte if dte > 0 else 0.0
+
+
+class TopK:
+    """The `limit` best results by `sort_by`, highest first. Use from one task."""
+
+    def __init__(self, sort_by: str, limit: int):
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of {SORT_FIELDS}")
+        self.sort_by = sort_by
+        self.limit = limit
+        self._field = OptionRecord._fields.index(sort_by)
+        # (score, insertion order, record); the root is the current K-th best
+        self._heap: list[tuple[float, int, OptionRecord]] = []
+        self._counter = itertools.count()
+        self.seen = 0
+        # Expirations and tickers skipped because they couldn't make the cut
+        self.skipped_expirations = 0
+        self.skipped_tickers = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def pruned(self) -> bool:
+        """Whether any work was skipped, so the full result set is unknown."""
+        return bool(self.skipped_expirations or self.skipped_tickers)
+
+    def push(self, record: OptionRecord) -> bool:
+        """Offer a result. Returns whether the top K changed."""
+        self.seen += 1
+        score = record[self._field]
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, (score, next(self._counter), record))
+            return True
+        if score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (score, next(self._counter), record))
+            return True
+        return False
+
+    def can_enter(self, upper_bound: float) -> bool:
+        """Whether a result scoring up to upper_bound could still get in."""
+        return len(self._heap) < self.limit or upper_bound > self._heap[0][0]
+
+    def results(self) -> list[OptionRecord]:
+        """The current top K, best first; ties in a stable contract order."""
+        records = [entry[2] for entry in self._heap]
+        records.sort(key=lambda r: (r.ticker, r.expiration, r.option_type, r.strike))
+        records.sort(key=lambda r: r[self._field], reverse=True)
+        return records
@@ -0,0 +1,252 @@
+"""
+Cache of finished scan results, keyed by a canonical form of the ScanRequest.
+
+Users tweak one filter at a time, so most scans repeat or tighten an earlier
+one. A repeated request is answered straight from its cached results. A
+strictly narrower request (same tickers, every bound at least as tight) is
+answered by re-filtering the cached superset in memory, using the unrounded
+values the live filters saw, so it returns exactly what a fresh scan would.
+
+An entry records the cache expiry of every price, expiration and chain entry
+its scan read, and is dropped as soon as any of them expires or is refreshed.
+
+Configured with environment variables:
+    SCAN_CACHE_ENTRIES      cached scans kept per ticker set (default 4)
+    SCAN_CACHE_MAX_RESULTS  larger result sets aren't cached (default 100000)
+    SCAN_CACHE_MAX_MB       memory budget for cached results, on top of
+                            cache_service's CACHE_MAX_MB (default 32)
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.models.records import OptionRecord
+from app.models.requests import ScanRequest
+from app.services.cache_service import cache_service, estimate_size
+from app.utils.ticker_lists import get_tickers
+
+
+SCAN_CACHE_ENTRIES = int(os.environ.get("SCAN_CACHE_ENTRIES", "4"))
+SCAN_CACHE_MAX_RESULTS = int(os.environ.get("SCAN_CACHE_MAX_RESULTS", "100000"))
+SCAN_CACHE_MAX_MB = float(os.environ.get("SCAN_CACHE_MAX_MB", "32"))
+
+# Bounds a narrower request may only raise / lower
+LOWER_BOUNDS = ("min_stock_price", "min_pe_ratio", "min_volume", "min_roi", "min_dte")
+UPPER_BOUNDS = ("max_stock_price", "max_pe_ratio", "available_collateral", "max_dte")
+
+OPTION_TYPES = {"calls": "call", "puts": "put"}
+
+
+def canonical_request(request: ScanRequest) -> dict:
+    """The request's filters. Unset and zero bounds both mean no filter."""
+    canonical = {name: getattr(request, name) or None for name in LOWER_BOUNDS + UPPER_BOUNDS}
+    canonical["option_type"] = request.option_type
+    canonical["moneyness"] = request.moneyness
+    return canonical
+
+
+def is_narrower(request: dict, cached: dict) -> bool:
+    """Whether every result of `request` is also a result of `cached`."""
+    for name in LOWER_BOUNDS:
+        bound = cached[name]
+        if bound is not None and (request[name] is None or request[name] < bound):
+            return False
+    for name in UPPER_BOUNDS:
+        bound = cached[name]
+        if bound is not None and (request[name] is None or request[name] > bound):
+            return False
+    for name in ("option_type", "moneyness"):
+        if cached[name] != "both" and request[name] != cached[name]:
+            return False
+    return True
+
+
+def _matches(record: OptionRecord, request: dict) -> bool:
+    """Apply a scan's filters to one cached result, as the live scan would."""
+    stock_price, pe_ratio, collateral, roi = record.filter_values
+
+    # Stock filters
+    if request["min_stock_price"] and stock_price < request["min_stock_price"]:
+        return False
+    if request["max_stock_price"] and stock_price > request["max_stock_price"]:
+        return False
+    if pe_ratio is not None:
+        if request["min_pe_ratio"] and pe_ratio < request["min_pe_ratio"]:
+            return False
+        if request["max_pe_ratio"] and pe_ratio > request["max_pe_ratio"]:
+            return False
+    elif request["min_pe_ratio"] or request["max_pe_ratio"]:
+        return False
+
+    # Expiration filters
+    if request["min_dte"] and record.dte < request["min_dte"]:
+        return False
+    if request["max_dte"] and record.dte > request["max_dte"]:
+        return False
+    if request["option_type"] != "both" and record.option_type != OPTION_TYPES[request["option_type"]]:
+        return False
+
+    # Contract filters
+    if request["moneyness"] != "both" and record.moneyness != request["moneyness"].upper():
+        return False
+    if request["min_volume"] and record.volume < request["min_volume"]:
+        return False
+    if request["available_collateral"] and collateral > request["available_collateral"]:
+        return False
+    if request["min_roi"] and roi < request["min_roi"]:
+        return False
+    return True
+
+
+class ScanResultCache:
+    """
+    Finished scans per ticker set, least recently used first and bounded by
+    estimated bytes. Kept out of cache_service since one large scan can
+    outgrow a whole cache shard. Use from the event loop.
+    """
+
+    def __init__(
+        self,
+        entries_per_key: int = SCAN_CACHE_ENTRIES,
+        max_results: int = SCAN_CACHE_MAX_RESULTS,
+        max_bytes: int = int(SCAN_CACHE_MAX_MB * 1024 * 1024),
+    ):
+        self.entries_per_key = entries_per_key
+        self.max_results = max_results
+        self.max_bytes = max_bytes
+        # ticker set key -> entries, oldest first
+        self._entries: OrderedDict[str, list[dict]] = OrderedDict()
+        self._bytes = 0
+        self._stats = {"exact_hits": 0, "narrowed_hits": 0, "misses": 0, "stored": 0, "evictions": 0}
+
+    def _key(self, request: ScanRequest) -> str:
+        tickers = sorted(set(get_tickers(request.universe, request.custom_tickers)))
+        digest = hashlib.sha1(",".join(tickers).encode()).hexdigest()[:16]
+        return f"{request.universe}_{digest}"
+
+    def _is_valid(self, entry: dict) -> bool:
+        return time.monotonic() < entry["expires_at"] and all(
+            cache_service.expires_at(key) == expiry for key, expiry in entry["depends_on"].items()
+        )
+
+    def _valid_entries(self, key: str) -> list[dict]:
+        """The key's entries, dropping any whose data has expired or changed."""
+        entries = self._entries.get(key, [])
+        valid = [e for e in entries if self._is_valid(e)]
+        if len(valid) != len(entries):
+            self._bytes -= sum(e["size"] for e in entries if e not in valid)
+            if valid:
+                self._entries[key] = valid
+            else:
+                del self._entries[key]
+        return valid
+
+    def find(self, request: ScanRequest) -> Optional[dict]:
+        """
+        Answer a request from a cached scan of the same tickers, if one is
+        still valid and at least as broad. Returns {"results": [OptionRecord], "price_data_timestamp",
+        "stored_at", "narrowed"} or None.
+        """
+        key = self._key(request)
+        canonical = canonical_request(request)
+        entries = self._valid_entries(key)
+
+        entry = next((e for e in entries if e["request"] == canonical), None)
+        if entry is not None:
+            self._stats["exact_hits"] += 1
+            results = entry["results"]
+        else:
+            # The smallest cached superset has the least to re-filter
+            supersets = [e for e in entries if is_narrower(canonical, e["request"])]
+            if not supersets:
+                self._stats["misses"] += 1
+                return None
+            entry = min(supersets, key=lambda e: len(e["results"]))
+            self._stats["narrowed_hits"] += 1
+            results = [r for r in entry["results"] if _matches(r, canonical)]
+
+        self._entries.move_to_end(key)
+        return {
+            "results": results,
+            "price_data_timestamp": entry["price_data_timestamp"],
+            "stored_at": entry["stored_at"],
+            "narrowed": entry["request"] != canonical,
+        }
+
+    def store(
+        self,
+        request: ScanRequest,
+        results: list[OptionRecord],
+        price_data_timestamp: Optional[float],
+        depends_on: set[str],
+        expires_at: Optional[float] = None,
+    ):
+        """
+        Cache a finished scan's result records.
+        depends_on: cache keys the scan read; expires_at: monotonic expiry
+        for data that isn't in cache_service, like a snapshot.
+        """
+        if len(results) > self.max_results:
+            return
+
+        expiries = {key: cache_service.expires_at(key) for key in depends_on}
+        if any(expiry is None for expiry in expiries.values()):
+            # Something the scan read has already expired
+            return
+        expires_at = min([*expiries.values(), *([expires_at] if expires_at else [])], default=None)
+        if expires_at is None or expires_at <= time.monotonic():
+            return
+
+        size = estimate_size(results)
+        if size > self.max_bytes:
+            return
+
+        key = self._key(request)
+        canonical = canonical_request(request)
+        entries = self._valid_entries(key)
+        for old in [e for e in entries if e["request"] == canonical]:
+            entries.remove(old)
+            self._bytes -= old["size"]
+
+        entries.append({
+            "request": canonical,
+            "results": results,
+            "price_data_timestamp": price_data_timestamp,
+            "depends_on": expiries,
+            "expires_at": expires_at,
+            "stored_at": time.time(),
+            "size": size,
+        })
+        self._bytes += size
+        while len(entries) > self.entries_per_key:
+            self._bytes -= entries.pop(0)["size"]
+            self._stats["evictions"] += 1
+        self._entries[key] = entries
+        self._entries.move_to_end(key)
+        self._stats["stored"] += 1
+
+        # Evict the oldest scans of the least recently used ticker sets
+        while self._bytes > self.max_bytes:
+            lru_key, lru_entries = next(iter(self._entries.items()))
+            self._bytes -= lru_entries.pop(0)["size"]
+            self._stats["evictions"] += 1
+            if not lru_entries:
+                del self._entries[lru_key]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": sum(len(e) for e in self._entries.values()),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            **self._stats,
+        }
+
+
+# Global scan result cache instance
+scan_result_cache = ScanResultCache()
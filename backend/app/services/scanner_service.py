@@ -1,49 +1,182 @@
 import asyncio
-import json
+import multiprocessing
+import os
+import threading
 from typing import AsyncGenerator, Optional
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, date
-from pathlib import Path
 import time
 
-import yfinance as yf
 import pandas as pd
 
+from app.models.records import OptionRecord
 from app.models.requests import ScanRequest
 from app.models.responses import (
-    OptionResult,
     ScanProgressEvent,
     ScanCompleteEvent,
     ScanStatus,
 )
+from app.utils.reference_data import reference_data
 from app.utils.ticker_lists import get_tickers
-from app.services.cache_service import cache_service
+from app.services.chain_cache import option_chain_cache
+from app.services.market_data import market_data, is_rate_limit_error
+from app.services.concurrency import AdaptiveConcurrencyLimiter, scan_limiter
+from app.services.price_store import price_store
+from app.services.option_filter import (
+    chain_arrays,
+    filter_chain_arrays,
+    filter_option_chain,
+    filter_packed_chain,
+    possible_option_types,
+)
+from app.services.snapshot_store import UniverseSnapshot, query_snapshot, snapshot_store
+from app.services.scan_result_cache import scan_result_cache
+from app.services.ranking import TopK, score_upper_bound
+
+
+# Tickers per bulk price download; smaller chunks reach option scanning sooner
+PRICE_CHUNK_SIZE = 50
+
+# Stock filters answerable from static reference data, as (request lower
+# bound, request upper bound, reference data field). They run before any
+# upstream call, so excluded tickers never have prices or chains fetched.
+STATIC_RANGE_FILTERS = (
+    ("min_pe_ratio", "max_pe_ratio", "trailing_pe"),
+)
+
+# Tickers scanned at once per scan; enough to keep scan_limiter saturated
+# even when each ticker has only a few expirations in the DTE range
+TICKER_WINDOW = 2 * scan_limiter.max_limit
+
+# Worker processes for filtering option chains, to use more than one core.
+# 0 (default) filters on the scan threads.
+SCANNER_PROCESS_WORKERS = int(os.environ.get("SCANNER_PROCESS_WORKERS", "0"))
+
+# Bound on each inter-stage queue, so a slow consumer applies backpressure
+PIPELINE_QUEUE_SIZE = 256
+
+# Seconds between top-K updates while a ranked scan runs
+TOPK_EVENT_INTERVAL = 0.5
+
 
-# Load pre-cached S&P 500 stock info (PE ratios, names, etc.)
-_INFO_PATH = Path(__file__).parent.parent / "data" / "sp500_info.json"
-_SP500_INFO: dict = {}
+class _Pruned(Exception):
+    """Raised in a scan_limiter slot whose job turned out not to be needed."""
 
-if _INFO_PATH.exists():
-    with open(_INFO_PATH) as f:
-        data = json.load(f)
-        _SP500_INFO = data.get("stocks", {})
+
+def _classify_upstream_error(error: Exception) -> str:
+    if isinstance(error, _Pruned):
+        # No upstream call was made; don't adapt the limit
+        return "cancelled"
+    return "throttled" if is_rate_limit_error(error) else "error"
+
+
+def _in_range(value: Optional[float], low: Optional[float], high: Optional[float]) -> bool:
+    """A stock filter check; unset (or zero) bounds don't apply, and a missing value fails."""
+    if value is None:
+        return False
+    if low and value < low:
+        return False
+    if high and value > high:
+        return False
+    return True
 
 
 class ScannerService:
     def __init__(self):
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        # Enough threads to keep the whole concurrency window busy
+        self.executor = ThreadPoolExecutor(max_workers=max(10, scan_limiter.max_limit))
+        # Optional processes for chain filtering; network I/O stays on threads
+        self._process_pool_lock = threading.Lock()
+        self.process_pool = self._create_process_pool()
 
     async def scan_options(
-        self, request: ScanRequest
+        self, request: ScanRequest, ranking: Optional[TopK] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Scan with the given filters, streaming progress, result and complete
+        events. Repeated and narrowed requests are answered from the results
+        of an earlier scan while its data is still cached; finished scans
+        are cached for that.
+
+        With a ranking, only its top K are streamed: result events are
+        replaced by periodic `topk` events, and expirations and tickers
+        that can't reach the top K are skipped.
+        """
+        cached = scan_result_cache.find(request)
+        if cached is not None:
+            events = self._scan_cached(cached, time.time())
+        else:
+            events = self._scan_and_store(request, ranking)
+
+        if ranking is not None:
+            events = self._rank_events(events, ranking)
+        async for event in events:
+            yield event
+
+    async def _scan_and_store(
+        self, request: ScanRequest, ranking: Optional[TopK]
+    ) -> AsyncGenerator[dict, None]:
+        """Run a scan and cache its results, unless ranking cut it short."""
+        # Cache keys (and, for snapshots, an expiry) the scan's data lives under
+        deps = {"keys": set(), "expires_at": None}
+        results = []
+        async for event in self._run_scan(request, deps, ranking):
+            if event["type"] == "result":
+                results.append(event["record"])
+            elif event["type"] == "complete" and not (ranking and ranking.pruned):
+                scan_result_cache.store(
+                    request,
+                    results,
+                    event["data"]["price_data_timestamp"],
+                    deps["keys"],
+                    expires_at=deps["expires_at"],
+                )
+            yield event
+
+    async def _rank_events(
+        self, events: AsyncGenerator[dict, None], ranking: TopK
+    ) -> AsyncGenerator[dict, None]:
+        """Fold result events into the ranking and stream its top K instead."""
+        def top_event() -> dict:
+            return {
+                "type": "topk",
+                "data": {
+                    "sort_by": ranking.sort_by,
+                    "limit": ranking.limit,
+                    "results": [self._serialize_result(r) for r in ranking.results()],
+                },
+            }
+
+        changed = False
+        last_sent = time.monotonic()
+        async for event in events:
+            if event["type"] == "result":
+                changed |= ranking.push(event["record"])
+                if changed and time.monotonic() - last_sent >= TOPK_EVENT_INTERVAL:
+                    yield top_event()
+                    changed = False
+                    last_sent = time.monotonic()
+                continue
+
+            if event["type"] == "complete":
+                yield top_event()
+                event["data"]["total_results"] = len(ranking)
+            yield event
+
+    async def _run_scan(
+        self, request: ScanRequest, deps: dict, ranking: Optional[TopK] = None
     ) -> AsyncGenerator[dict, None]:
         """
-        Progressive filtering pipeline:
-        1. Get ticker universe
-        2. Batch fetch prices (single yfinance call)
+        Progressive filtering pipeline. Each stage runs as its own task,
+        connected by bounded queues, so a ticker reaches option scanning as
+        soon as its own price and fundamentals pass the filters:
+        1. Get ticker universe, minus tickers static reference data rules out
+        2. Fetch prices in chunks (bulk download per chunk)
         3. Filter by price/collateral (no API calls)
-        4. Fetch P/E ratios for remaining tickers only
+        4. Fetch P/E ratios for price-filtered tickers, concurrently
         5. Filter by P/E
-        6. Fetch options for final filtered tickers
+        6. Fetch options for tickers as they pass
         7. Stream results as found
         """
         start_time = time.time()
@@ -58,11 +191,27 @@ class ScannerService:
             }
             return
 
+        # A built-in universe with a fresh prefetched snapshot is answered
+        # from memory without fetching anything
+        if not request.custom_tickers:
+            snapshot = snapshot_store.get(request.universe)
+            if snapshot is not None and snapshot.covers(request):
+                deps["expires_at"] = time.monotonic() + (snapshot.expires_at - time.time())
+                async for event in self._scan_snapshot(snapshot, request, start_time):
+                    yield event
+                return
+
+        # Filters known from reference data go first, before any download
+        universe_size = len(tickers)
+        tickers = self._prefilter_static(tickers, request)
+        excluded = universe_size - len(tickers)
+
         yield {
             "type": "progress",
             "data": ScanProgressEvent(
                 status=ScanStatus.FILTERING_STOCKS,
-                message=f"Fetching prices for {len(tickers)} tickers...",
+                message=f"Fetching prices for {len(tickers)} tickers"
+                + (f" ({excluded} excluded by fundamentals)..." if excluded else "..."),
                 progress=5,
                 tickers_scanned=0,
                 tickers_total=len(tickers),
@@ -71,164 +220,296 @@ class ScannerService:
             ).model_dump(),
         }
 
-        # Step 2: Batch fetch prices only (1 API call)
-        prices, price_data_timestamp = await self._fetch_prices_batch(tickers)
+        events: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        price_passed: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        stock_passed: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        state = {
+            "price_data_timestamp": None,
+            "price_filtered": None,  # count, known once the price stage finishes
+            "stock_filtered": None,  # count, known once the P/E stage finishes
+            "admitted": 0,
+        }
+
+        async def price_stage():
+            # Steps 2-3: chunks are fetched concurrently and filtered as they land
+            passed = 0
+            chunks = self._price_chunks(tickers)
+            deps["keys"].update(price_store.key(t) for t in tickers)
+            for next_chunk in asyncio.as_completed([self._fetch_prices_batch(c) for c in chunks]):
+                prices, timestamp = await next_chunk
+                if state["price_data_timestamp"] is None or timestamp < state["price_data_timestamp"]:
+                    state["price_data_timestamp"] = timestamp
+
+                for ticker in self._filter_by_price(prices, request):
+                    passed += 1
+                    await price_passed.put((ticker, prices[ticker]))
+            await price_passed.put(None)
+
+            state["price_filtered"] = passed
+            await events.put({
+                "type": "progress",
+                "data": ScanProgressEvent(
+                    status=ScanStatus.FILTERING_STOCKS,
+                    message=f"Price filter: {len(tickers)} → {passed} tickers. Fetching P/E ratios...",
+                    progress=10,
+                    tickers_scanned=0,
+                    tickers_total=passed,
+                    results_found=0,
+                    current_ticker=None,
+                ).model_dump(),
+            })
+
+        async def stock_stage():
+            # Steps 4-5: static info passes straight through; uncached tickers
+            # are fetched concurrently so one slow .info call holds up no one
+            pending = set()
+
+            async def check(ticker: str, price: float):
+                stock_data = await self.fetch_stock_info([ticker], {ticker: price})
+                if self._filter_stocks(stock_data, request):
+                    state["admitted"] += 1
+                    await stock_passed.put((ticker, stock_data[ticker]))
+
+            try:
+                while (item := await price_passed.get()) is not None:
+                    task = asyncio.create_task(check(*item))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                if pending:
+                    await asyncio.gather(*pending)
+            finally:
+                for task in pending:
+                    task.cancel()
+            await stock_passed.put(None)
+
+            state["stock_filtered"] = state["admitted"]
+            await events.put({
+                "type": "progress",
+                "data": ScanProgressEvent(
+                    status=ScanStatus.SCANNING_OPTIONS,
+                    message=f"Scanning options for {state['admitted']} stocks...",
+                    progress=20,
+                    tickers_scanned=0,
+                    tickers_total=state["admitted"],
+                    results_found=0,
+                    current_ticker=None,
+                ).model_dump(),
+            })
+
+        async def admitted_tickers():
+            while (item := await stock_passed.get()) is not None:
+                yield item
+
+        async def options_stage():
+            # Step 6: Scan options for a window of tickers at a time. Each
+            # ticker fans its expirations out under the global scan_limiter,
+            # whose size adapts to upstream throttling; the upstream rate
+            # itself is capped by the provider's token bucket.
+            counts = {"results": 0, "scanned": 0}
+
+            # Every expiration a ticker could have is at least min_dte out
+            if ranking is not None:
+                ticker_bound = score_upper_bound(ranking.sort_by, request.min_dte or None)
+
+            async def scan_ticker(item):
+                ticker, stock_data = item
+                if ranking is not None and not ranking.can_enter(ticker_bound):
+                    ranking.skipped_tickers += 1
+                    return
+                async for options in self._scan_ticker_options(
+                    ticker, stock_data, request, depends_on=deps["keys"], ranking=ranking
+                ):
+                    for option in options:
+                        counts["results"] += 1
+                        await events.put({
+                            "type": "result",
+                            "data": self._serialize_result(option),
+                            "record": option,
+                        })
+
+            # Fixed-size window; tickers only hold a window slot, not an upstream slot
+            ticker_window = AdaptiveConcurrencyLimiter(
+                initial=TICKER_WINDOW, min_limit=TICKER_WINDOW, max_limit=TICKER_WINDOW
+            )
+
+            async for (ticker, _), result in ticker_window.map_unordered(admitted_tickers(), scan_ticker):
+                counts["scanned"] += 1
+
+                if isinstance(result, Exception):
+                    # No results for it, but it still counts toward progress
+                    print(f"Error scanning options for {ticker}: {result}")
+
+                # Progress update per ticker. Until the P/E stage finishes the
+                # total isn't known, so measure against the whole universe.
+                tickers_total = state["stock_filtered"]
+                if tickers_total is None:
+                    progress_total = max(len(tickers), counts["scanned"])
+                    tickers_total = state["admitted"]
+                else:
+                    progress_total = max(tickers_total, 1)
+
+                await events.put({
+                    "type": "progress",
+                    "data": ScanProgressEvent(
+                        status=ScanStatus.SCANNING_OPTIONS,
+                        message=f"Scanning {ticker}...",
+                        progress=20 + int((counts["scanned"] / progress_total) * 75),
+                        tickers_scanned=counts["scanned"],
+                        tickers_total=tickers_total,
+                        results_found=counts["results"],
+                        current_ticker=ticker,
+                    ).model_dump(),
+                })
 
-        # Step 3: Filter by price/collateral BEFORE expensive .info calls
-        price_filtered = self._filter_by_price(prices, request)
+            return counts["results"]
 
+        async def run_pipeline():
+            stages = [
+                asyncio.create_task(price_stage()),
+                asyncio.create_task(stock_stage()),
+                asyncio.create_task(options_stage()),
+            ]
+            try:
+                _, _, results_count = await asyncio.gather(*stages)
+                await events.put({
+                    "type": "complete",
+                    "data": ScanCompleteEvent(
+                        status=ScanStatus.COMPLETE,
+                        total_results=results_count,
+                        scan_duration_seconds=round(time.time() - start_time, 2),
+                        price_data_timestamp=state["price_data_timestamp"],
+                    ).model_dump(),
+                })
+            except Exception as e:
+                await events.put({"type": "error", "data": {"message": f"Scan failed: {e}"}})
+            finally:
+                for stage in stages:
+                    stage.cancel()
+            await events.put(None)
+
+        pipeline = asyncio.create_task(run_pipeline())
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+        finally:
+            # Client went away or scan finished - stop every stage
+            pipeline.cancel()
+
+    async def _scan_snapshot(
+        self, snapshot: UniverseSnapshot, request: ScanRequest, start_time: float
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Answer a scan with one vectorized query against a universe snapshot,
+        emitting the same events as the live pipeline.
+        """
         yield {
             "type": "progress",
             "data": ScanProgressEvent(
-                status=ScanStatus.FILTERING_STOCKS,
-                message=f"Price filter: {len(tickers)} → {len(price_filtered)} tickers. Fetching P/E ratios...",
-                progress=10,
+                status=ScanStatus.SCANNING_OPTIONS,
+                message=(
+                    f"Querying {len(snapshot.tickers)} tickers from data "
+                    f"{int(snapshot.age_seconds())}s old..."
+                ),
+                progress=20,
                 tickers_scanned=0,
-                tickers_total=len(price_filtered),
+                tickers_total=len(snapshot.tickers),
                 results_found=0,
                 current_ticker=None,
             ).model_dump(),
         }
 
-        # Step 4: Fetch P/E ratios only for price-filtered tickers
-        stock_data = await self._fetch_stock_info(price_filtered, prices)
+        loop = asyncio.get_event_loop()
+        results = await loop.run_in_executor(self.executor, query_snapshot, snapshot, request)
+        for option in results:
+            yield {
+                "type": "result",
+                "data": self._serialize_result(option),
+                "record": option,
+            }
 
-        # Step 5: Filter by P/E ratio
-        filtered_tickers = self._filter_stocks(stock_data, request)
+        yield {
+            "type": "complete",
+            "data": ScanCompleteEvent(
+                status=ScanStatus.COMPLETE,
+                total_results=len(results),
+                scan_duration_seconds=round(time.time() - start_time, 2),
+                price_data_timestamp=snapshot.price_data_timestamp,
+            ).model_dump(),
+        }
 
+    async def _scan_cached(self, cached: dict, start_time: float) -> AsyncGenerator[dict, None]:
+        """Replay results found by scan_result_cache as a scan's events."""
+        results = cached["results"]
+        source = "Filtering cached results" if cached["narrowed"] else "Using cached results"
         yield {
             "type": "progress",
             "data": ScanProgressEvent(
                 status=ScanStatus.SCANNING_OPTIONS,
-                message=f"Scanning options for {len(filtered_tickers)} stocks...",
+                message=f"{source}...",
                 progress=20,
                 tickers_scanned=0,
-                tickers_total=len(filtered_tickers),
+                tickers_total=0,
                 results_found=0,
                 current_ticker=None,
             ).model_dump(),
         }
 
-        if not filtered_tickers:
-            yield {
-                "type": "complete",
-                "data": ScanCompleteEvent(
-                    status=ScanStatus.COMPLETE,
-                    total_results=0,
-                    scan_duration_seconds=round(time.time() - start_time, 2),
-                    price_data_timestamp=price_data_timestamp,
-                ).model_dump(),
-            }
-            return
-
-        # Step 4: Scan options with concurrency control
-        results_count = 0
-        scanned_count = 0
-
-        # Process in batches to avoid rate limiting
-        batch_size = 3
-        for i in range(0, len(filtered_tickers), batch_size):
-            batch = filtered_tickers[i : i + batch_size]
-
-            # Concurrent options fetch within batch
-            tasks = [
-                self._scan_ticker_options(ticker, stock_data.get(ticker, {}), request)
-                for ticker in batch
-            ]
-
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for ticker, result in zip(batch, batch_results):
-                scanned_count += 1
-
-                if isinstance(result, Exception):
-                    continue
-
-                for option in result:
-                    results_count += 1
-                    yield {"type": "result", "data": self._serialize_result(option)}
-
-                # Progress update per ticker
-                progress = 20 + int((scanned_count / len(filtered_tickers)) * 75)
-                yield {
-                    "type": "progress",
-                    "data": ScanProgressEvent(
-                        status=ScanStatus.SCANNING_OPTIONS,
-                        message=f"Scanning {ticker}...",
-                        progress=progress,
-                        tickers_scanned=scanned_count,
-                        tickers_total=len(filtered_tickers),
-                        results_found=results_count,
-                        current_ticker=ticker,
-                    ).model_dump(),
-                }
-
-            # Small delay between batches to be respectful to Yahoo
-            await asyncio.sleep(0.2)
+        # Snapshot results report their data's age, which has grown since
+        elapsed = time.time() - cached["stored_at"]
+        for record in results:
+            if record.data_age_seconds is not None:
+                record = record._replace(data_age_seconds=round(record.data_age_seconds + elapsed, 1))
+            yield {"type": "result", "data": record.to_dict(), "record": record}
 
         yield {
             "type": "complete",
             "data": ScanCompleteEvent(
                 status=ScanStatus.COMPLETE,
-                total_results=results_count,
+                total_results=len(results),
                 scan_duration_seconds=round(time.time() - start_time, 2),
-                price_data_timestamp=price_data_timestamp,
+                price_data_timestamp=cached["price_data_timestamp"],
             ).model_dump(),
         }
 
-    async def _fetch_prices_batch(self, tickers: list[str]) -> tuple[dict, float]:
+    def _price_chunks(self, tickers: list[str]) -> list[list[str]]:
+        """Split tickers into the chunks a scan downloads prices in."""
+        return [
+            tickers[i : i + PRICE_CHUNK_SIZE]
+            for i in range(0, len(tickers), PRICE_CHUNK_SIZE)
+        ]
+
+    async def fetch_prices(
+        self, tickers: list[str], refresh: bool = False, ttl: int = 600
+    ) -> tuple[dict, Optional[float]]:
+        """
+        Get prices for a ticker list in the chunks a scan over it downloads,
+        through the per-ticker price cache. refresh=True redownloads them.
+        Returns (prices_dict, timestamp_ms of the oldest chunk).
+        """
+        prices = {}
+        timestamp = None
+        for chunk_prices, chunk_timestamp in await asyncio.gather(*[
+            self._fetch_prices_batch(chunk, refresh=refresh, ttl=ttl)
+            for chunk in self._price_chunks(tickers)
+        ]):
+            prices.update(chunk_prices)
+            if timestamp is None or chunk_timestamp < timestamp:
+                timestamp = chunk_timestamp
+        return prices, timestamp
+
+    async def _fetch_prices_batch(
+        self, tickers: list[str], refresh: bool = False, ttl: int = 600
+    ) -> tuple[dict, float]:
         """
-        Fetch only prices using bulk yf.download().
+        Fetch only prices using a bulk market data download.
         This is fast and allows early filtering before expensive .info calls.
-        Returns (prices_dict, timestamp_ms) where timestamp is when data was fetched.
+        Prices are cached per ticker, so only tickers without a fresh price
+        are downloaded, and concurrent scans share in-flight downloads.
+        Returns (prices_dict, timestamp_ms) where timestamp is when the
+        oldest price was fetched.
         """
-        cache_key = f"prices_{hash(tuple(sorted(tickers)))}"
-        cached = cache_service.get(cache_key)
-        if cached:
-            return cached["prices"], cached["timestamp"]
-
-        loop = asyncio.get_event_loop()
-
-        def fetch():
-            result = {}
-            timestamp = time.time() * 1000  # Current time in ms
-            try:
-                data = yf.download(
-                    tickers,
-                    period="1d",
-                    progress=False,
-                    threads=True,
-                    auto_adjust=False,
-                )
-
-                if data.empty:
-                    return result, timestamp
-
-                # Handle MultiIndex columns (multiple tickers)
-                if isinstance(data.columns, pd.MultiIndex):
-                    close_data = data["Close"]
-                    for ticker in tickers:
-                        try:
-                            if ticker in close_data.columns:
-                                price = close_data[ticker].iloc[-1]
-                                result[ticker] = float(price) if pd.notna(price) else None
-                            else:
-                                result[ticker] = None
-                        except (KeyError, IndexError):
-                            result[ticker] = None
-                else:
-                    # Single ticker - flat columns
-                    price = data["Close"].iloc[-1]
-                    result[tickers[0]] = float(price) if pd.notna(price) else None
-
-            except Exception as e:
-                print(f"Error in fetch: {e}")
-
-            return result, timestamp
-
-        result, timestamp = await loop.run_in_executor(self.executor, fetch)
-        cache_service.set(cache_key, {"prices": result, "timestamp": timestamp}, ttl=600)  # 10 minute cache
-        return result, timestamp
+        prices, timestamp = await price_store.get(tickers, refresh=refresh, ttl=ttl)
+        return prices, timestamp if timestamp is not None else time.time() * 1000
 
     def _filter_by_price(self, prices: dict, request: ScanRequest) -> list[str]:
         """
@@ -251,31 +532,23 @@ class ScannerService:
 
         return filtered
 
-    async def _fetch_stock_info(self, tickers: list[str], prices: dict) -> dict:
+    async def fetch_stock_info(self, tickers: list[str], prices: dict) -> dict:
         """
-        Get P/E ratios, names, and earnings dates from cached sp500_info.json.
+        Get P/E ratios, names, and earnings dates from the static reference data.
         Falls back to yfinance API only for tickers not in cache (custom tickers).
         """
         result = {}
         uncached_tickers = []
 
         # First pass: use cached data where available
+        ref = reference_data()
         for ticker in tickers:
-            if ticker in _SP500_INFO:
-                info = _SP500_INFO[ticker]
-                # Convert earnings_timestamp to date if present
-                next_earnings = None
-                if info.get("earnings_timestamp"):
-                    try:
-                        next_earnings = datetime.fromtimestamp(info["earnings_timestamp"]).date()
-                    except Exception:
-                        pass
-
+            if ticker in ref:
                 result[ticker] = {
                     "price": prices.get(ticker),
-                    "pe_ratio": info.get("trailing_pe"),
-                    "name": info.get("name", ticker),
-                    "next_earnings_date": next_earnings,
+                    "pe_ratio": ref.get(ticker, "trailing_pe"),
+                    "name": ref.get(ticker, "name") or ticker,
+                    "next_earnings_date": ref.next_earnings_date(ticker),
                 }
             else:
                 uncached_tickers.append(ticker)
@@ -284,43 +557,67 @@ class ScannerService:
         if uncached_tickers:
             loop = asyncio.get_event_loop()
 
-            def fetch_uncached():
-                uncached_result = {}
-                for ticker in uncached_tickers:
+            def fetch_uncached(ticker: str) -> dict:
+                try:
+                    info = market_data.info(ticker)
+
+                    next_earnings = None
                     try:
-                        t = yf.Ticker(ticker)
-                        info = t.info
-
-                        next_earnings = None
-                        try:
-                            calendar = t.calendar
-                            if calendar and isinstance(calendar, dict):
-                                earnings_dates = calendar.get("Earnings Date")
-                                if earnings_dates and isinstance(earnings_dates, list) and len(earnings_dates) > 0:
-                                    next_earnings = earnings_dates[0]
-                        except Exception:
-                            pass
-
-                        uncached_result[ticker] = {
-                            "price": prices.get(ticker),
-                            "pe_ratio": float(info.get("trailingPE")) if info.get("trailingPE") else None,
-                            "name": info.get("shortName", ticker),
-                            "next_earnings_date": next_earnings,
-                        }
+                        calendar = market_data.calendar(ticker)
+                        if calendar and isinstance(calendar, dict):
+                            earnings_dates = calendar.get("Earnings Date")
+                            if earnings_dates and isinstance(earnings_dates, list) and len(earnings_dates) > 0:
+                                next_earnings = earnings_dates[0]
                     except Exception:
-                        uncached_result[ticker] = {
-                            "price": prices.get(ticker),
-                            "pe_ratio": None,
-                            "name": ticker,
-                            "next_earnings_date": None,
-                        }
-                return uncached_result
+                        pass
 
-            uncached_data = await loop.run_in_executor(self.executor, fetch_uncached)
-            result.update(uncached_data)
+                    return {
+                        "price": prices.get(ticker),
+                        "pe_ratio": float(info.get("trailingPE")) if info.get("trailingPE") else None,
+                        "name": info.get("shortName", ticker),
+                        "next_earnings_date": next_earnings,
+                    }
+                except Exception:
+                    return {
+                        "price": prices.get(ticker),
+                        "pe_ratio": None,
+                        "name": ticker,
+                        "next_earnings_date": None,
+                    }
+
+            # Fetch uncached tickers concurrently rather than one after another
+            uncached_data = await asyncio.gather(*[
+                loop.run_in_executor(self.executor, fetch_uncached, ticker)
+                for ticker in uncached_tickers
+            ])
+            result.update(zip(uncached_tickers, uncached_data))
 
         return result
 
+    def _prefilter_static(self, tickers: list[str], request: ScanRequest) -> list[str]:
+        """
+        Drop tickers whose reference data fails STATIC_RANGE_FILTERS, with
+        the same rules as _filter_stocks(). Tickers without reference data
+        (custom tickers) pass through to the live filters.
+        """
+        bounds = [
+            (getattr(request, low), getattr(request, high), field)
+            for low, high, field in STATIC_RANGE_FILTERS
+            if getattr(request, low) or getattr(request, high)
+        ]
+        if not bounds:
+            return tickers
+
+        ref = reference_data()
+        filtered = []
+        for ticker in tickers:
+            if ticker in ref and not all(
+                _in_range(ref.get(ticker, field), low, high) for low, high, field in bounds
+            ):
+                continue
+            filtered.append(ticker)
+        return filtered
+
     def _filter_stocks(self, stock_data: dict, request: ScanRequest) -> list[str]:
         """
         Filter stocks by P/E ratio.
@@ -346,159 +643,187 @@ class ScannerService:
         return filtered
 
     async def _scan_ticker_options(
-        self, ticker: str, stock_data: dict, request: ScanRequest
-    ) -> list[OptionResult]:
-        """Scan options for a single ticker."""
-
-        loop = asyncio.get_event_loop()
+        self,
+        ticker: str,
+        stock_data: dict,
+        request: ScanRequest,
+        depends_on: Optional[set] = None,
+        ranking: Optional[TopK] = None,
+    ) -> AsyncGenerator[list[OptionRecord], None]:
+        """
+        Scan options for a single ticker.
+        Expirations are fetched concurrently, each holding one slot of the
+        global scan_limiter, and their results are yielded as they arrive.
+        The cache keys read are added to depends_on, if given. A ticker
+        whose price rules out every contract the request allows is skipped.
+        With a ranking, expirations that can no longer reach its top K are
+        skipped, and so is the whole ticker once its nearest one can't.
+        """
+        stock_price = stock_data.get("price")
+        if not stock_price:
+            return
 
-        def fetch_options():
-            results = []
-            t = yf.Ticker(ticker)
+        option_types = possible_option_types(request, stock_price)
+        if not option_types:
+            return
 
-            # Get available expiration dates
-            try:
-                expirations = t.options
-            except Exception:
-                return results
+        pe_ratio = stock_data.get("pe_ratio")
+        next_earnings_date = stock_data.get("next_earnings_date")
 
-            stock_price = stock_data.get("price")
-            if not stock_price:
-                return results
+        loop = asyncio.get_event_loop()
 
-            pe_ratio = stock_data.get("pe_ratio")
-            next_earnings_date = stock_data.get("next_earnings_date")
+        if depends_on is not None:
+            depends_on.add(option_chain_cache.expirations_key(ticker))
 
-            for exp_date in expirations:
-                # Calculate DTE
-                exp = datetime.strptime(exp_date, "%Y-%m-%d").date()
-                dte = (exp - datetime.now().date()).days
+        # Get available expiration dates. Errors propagate so the caller
+        # skips the ticker.
+        async with scan_limiter.slot(classify_error=_classify_upstream_error):
+            expirations = await loop.run_in_executor(
+                self.executor, option_chain_cache.get_expirations, ticker
+            )
 
-                if dte < 0:
-                    continue
+        today = datetime.now().date()
+        wanted = []
+        for exp_date in expirations:
+            # Calculate DTE
+            exp = datetime.strptime(exp_date, "%Y-%m-%d").date()
+            dte = (exp - today).days
 
-                # DTE filter
-                if request.min_dte and dte < request.min_dte:
-                    continue
-                if request.max_dte and dte > request.max_dte:
-                    continue
+            if dte < 0:
+                continue
 
-                try:
-                    chain = t.option_chain(exp_date)
-                except Exception:
-                    continue
+            # DTE filter
+            if request.min_dte and dte < request.min_dte:
+                continue
+            if request.max_dte and dte > request.max_dte:
+                continue
 
-                # Process calls and/or puts based on filter
-                frames_to_process = []
-                if request.option_type in ["calls", "both"]:
-                    frames_to_process.append(("call", chain.calls))
-                if request.option_type in ["puts", "both"]:
-                    frames_to_process.append(("put", chain.puts))
-
-                for opt_type, df in frames_to_process:
-                    for _, row in df.iterrows():
-                        # Apply all filters
-                        option = self._process_option_row(
-                            row,
-                            ticker,
-                            stock_price,
-                            exp,
-                            dte,
-                            opt_type,
-                            pe_ratio,
-                            next_earnings_date,
-                            request,
-                        )
-                        if option:
-                            results.append(option)
+            wanted.append((exp_date, exp, dte))
 
-            return results
+        # The nearest expiration has the highest bound of the ticker's
+        if ranking is not None and wanted and not ranking.can_enter(
+            score_upper_bound(ranking.sort_by, min(dte for _, _, dte in wanted))
+        ):
+            ranking.skipped_tickers += 1
+            return
 
-        return await loop.run_in_executor(self.executor, fetch_options)
-
-    def _serialize_result(self, option: OptionResult) -> dict:
-        """Convert OptionResult to JSON-serializable dict."""
-        data = option.model_dump()
-        # Convert dates to strings
-        if isinstance(data.get("expiration"), date):
-            data["expiration"] = data["expiration"].isoformat()
-        if isinstance(data.get("next_earnings_date"), date):
-            data["next_earnings_date"] = data["next_earnings_date"].isoformat()
-        return data
-
-    def _process_option_row(
-        self, row, ticker, stock_price, exp, dte, opt_type, pe_ratio, next_earnings_date, request
-    ) -> Optional[OptionResult]:
-        """Process a single option and apply filters."""
-
-        strike = row["strike"]
-        premium = row.get("lastPrice", 0) or 0
-        volume = row.get("volume", 0) or 0
-        oi = row.get("openInterest", 0) or 0
-        iv = row.get("impliedVolatility")
-        bid = row.get("bid")
-        ask = row.get("ask")
-
-        if premium <= 0:
-            return None
+        if depends_on is not None:
+            depends_on.update(option_chain_cache.chain_key(ticker, exp_date) for exp_date, _, _ in wanted)
 
-        # Calculate moneyness
-        if opt_type == "call":
-            is_itm = stock_price > strike
-        else:
-            is_itm = stock_price < strike
-        moneyness = "ITM" if is_itm else "OTM"
+        def fetch_expiration(exp_date: str, exp: date, dte: int) -> list[OptionRecord]:
+            chain = option_chain_cache.get_chain(ticker, exp_date)
 
-        # Moneyness filter
-        if request.moneyness == "itm" and not is_itm:
-            return None
-        if request.moneyness == "otm" and is_itm:
-            return None
+            # Process calls and/or puts based on filter
+            frames_to_process = [
+                (opt_type, chain.calls if opt_type == "call" else chain.puts)
+                for opt_type in option_types
+            ]
 
-        # Volume filter
-        if request.min_volume and volume < request.min_volume:
-            return None
+            # Apply all filters to the whole frame at once
+            return self._filter_chains(
+                frames_to_process, ticker, stock_price, exp, dte, pe_ratio, next_earnings_date, request
+            )
 
-        # Calculate collateral and ROI
-        if opt_type == "put":
-            collateral = strike * 100
-        else:
-            # For calls, collateral is 100 shares at current price (covered call)
-            collateral = stock_price * 100
+        async def scan_expiration(exp_date: str, exp: date, dte: int) -> list[OptionRecord]:
+            try:
+                async with scan_limiter.slot(classify_error=_classify_upstream_error):
+                    # Checked once a slot is free, against the latest top K
+                    if ranking is not None and not ranking.can_enter(
+                        score_upper_bound(ranking.sort_by, dte)
+                    ):
+                        ranking.skipped_expirations += 1
+                        raise _Pruned()
+                    return await loop.run_in_executor(
+                        self.executor, fetch_expiration, exp_date, exp, dte
+                    )
+            except Exception:
+                # Skip this expiration (pruned, or the limiter has already backed off)
+                return []
+
+        tasks = [asyncio.create_task(scan_expiration(*job)) for job in wanted]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                results = await next_done
+                if results:
+                    yield results
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _filter_chains(
+        self,
+        frames: list[tuple[str, pd.DataFrame]],
+        ticker: str,
+        stock_price: float,
+        exp: date,
+        dte: int,
+        pe_ratio: Optional[float],
+        next_earnings_date: Optional[date],
+        request: ScanRequest,
+    ) -> list[OptionRecord]:
+        """
+        Filter (option_type, frame) pairs for one expiration. Runs in a worker
+        thread; with a process pool, the thread only packs the columns and
+        waits, so filtering isn't serialized on the GIL.
+        """
+        def args(opt_type: str) -> tuple:
+            return (ticker, stock_price, exp, dte, opt_type, pe_ratio, next_earnings_date, request)
 
-        # Collateral filter
-        if request.available_collateral and collateral > request.available_collateral:
-            return None
+        pool = self.process_pool
+        if pool is None:
+            results = []
+            for opt_type, df in frames:
+                results.extend(filter_option_chain(df, *args(opt_type)))
+            return results
 
-        # ROI calculation
-        roi = (premium * 100 / collateral) * 100 if collateral > 0 else 0
-        annualized_roi = roi * (365 / dte) if dte > 0 else 0
+        # Ship raw float64 columns, not DataFrames; only surviving rows come back
+        packed = []
+        for opt_type, df in frames:
+            arrays = chain_arrays(df)
+            if arrays is not None:
+                packed.append((opt_type, arrays))
+        try:
+            futures = [
+                pool.submit(filter_packed_chain, arrays.tobytes(), *args(opt_type))
+                for opt_type, arrays in packed
+            ]
+            return [record for future in futures for record in future.result()]
+        except BrokenProcessPool as e:
+            # A worker died; replace the pool and filter this chain here
+            print(f"Error in scanner process pool, restarting it: {e}")
+            self._restart_process_pool(pool)
+            results = []
+            for opt_type, arrays in packed:
+                results.extend(filter_chain_arrays(arrays, *args(opt_type)))
+            return results
 
-        # ROI filter
-        if request.min_roi and roi < request.min_roi:
+    def _create_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if SCANNER_PROCESS_WORKERS <= 0:
             return None
-
-        return OptionResult(
-            ticker=ticker,
-            stock_price=round(stock_price, 2),
-            strike=round(strike, 2),
-            expiration=exp,
-            dte=dte,
-            option_type=opt_type,
-            premium=round(premium, 2),
-            bid=round(bid, 2) if bid else None,
-            ask=round(ask, 2) if ask else None,
-            volume=int(volume),
-            open_interest=int(oi),
-            implied_volatility=round(iv, 4) if iv else None,
-            collateral=round(collateral, 2),
-            roi=round(roi, 2),
-            annualized_roi=round(annualized_roi, 2),
-            moneyness=moneyness,
-            pe_ratio=round(pe_ratio, 2) if pe_ratio else None,
-            next_earnings_date=next_earnings_date,
+        # Spawned, not forked: the parent has threads and an event loop running
+        return ProcessPoolExecutor(
+            max_workers=SCANNER_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
         )
 
+    def _restart_process_pool(self, broken: ProcessPoolExecutor):
+        with self._process_pool_lock:
+            # Threads that saw the same pool break restart it only once
+            if self.process_pool is not broken:
+                return
+            self.process_pool = self._create_process_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop the process pool, if any. Threads are left to finish."""
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
+
+    def _serialize_result(self, option: OptionRecord) -> dict:
+        """Convert an OptionRecord to a JSON-serializable OptionResult dict."""
+        return option.to_dict()
+
 
 # Global service instance
 scanner_service = ScannerService()
@@ -0,0 +1,307 @@
+"""
+Columnar snapshots of every option contract in a ticker universe.
+
+The prefetch scheduler materializes each cycle's prices, fundamentals and
+option chains into row-aligned NumPy arrays. While a snapshot is fresh, a
+scan over its universe runs as one vectorized query against those arrays
+instead of refetching and filtering chain by chain.
+"""
+import threading
+import time
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from app.models.requests import ScanRequest
+from app.models.records import OptionRecord
+from app.services.market_data import OptionChain
+from app.services.option_filter import _column, compute_option_mask
+
+
+class UniverseSnapshot(NamedTuple):
+    """
+    Per-contract columns are row-aligned; ticker_index points into the
+    per-ticker columns. Rows are ordered by ticker, expiration, then calls
+    before puts, the same order a live scan finds them in.
+    """
+    universe: str
+    as_of: float  # Unix time the oldest data in the snapshot was fetched
+    expires_at: float  # Unix time after which the snapshot is stale
+    max_dte: Optional[int]  # Expirations covered, in days out (None = all)
+    price_data_timestamp: Optional[float]  # ms, as in ScanCompleteEvent
+
+    # Per ticker
+    tickers: list[str]
+    stock_price: np.ndarray
+    pe_ratio: np.ndarray  # NaN when unavailable
+    next_earnings_date: list[Optional[date]]
+
+    # Per contract
+    ticker_index: np.ndarray
+    is_call: np.ndarray
+    strike: np.ndarray
+    expiration: np.ndarray  # date ordinals
+    bid: np.ndarray
+    ask: np.ndarray
+    last_price: np.ndarray
+    volume: np.ndarray
+    open_interest: np.ndarray
+    implied_volatility: np.ndarray
+
+    @property
+    def contracts(self) -> int:
+        return len(self.strike)
+
+    def age_seconds(self) -> float:
+        return time.time() - self.as_of
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def covers(self, request: ScanRequest) -> bool:
+        """Whether every expiration the request could match is in the snapshot."""
+        if self.max_dte is None:
+            return True
+        return bool(request.max_dte) and request.max_dte <= self.max_dte
+
+
+def build_snapshot(
+    universe: str,
+    stock_data: dict[str, dict],
+    chains: dict[str, list[tuple[str, OptionChain]]],
+    as_of: float,
+    expires_at: float,
+    max_dte: Optional[int],
+    price_data_timestamp: Optional[float] = None,
+) -> UniverseSnapshot:
+    """
+    Build a snapshot from per-ticker stock data (price, pe_ratio,
+    next_earnings_date, as from ScannerService.fetch_stock_info) and each
+    ticker's (expiration, chain) pairs.
+    """
+    tickers = list(stock_data.keys())
+    columns = {name: [] for name in (
+        "ticker_index", "is_call", "strike", "expiration", "bid", "ask",
+        "last_price", "volume", "open_interest", "implied_volatility",
+    )}
+
+    for index, ticker in enumerate(tickers):
+        for exp_date, chain in chains.get(ticker, []):
+            expiration = datetime.strptime(exp_date, "%Y-%m-%d").date().toordinal()
+            for is_call, df in ((True, chain.calls), (False, chain.puts)):
+                if df is None or df.empty or "strike" not in df.columns:
+                    continue
+                rows = len(df)
+                columns["ticker_index"].append(np.full(rows, index, dtype=np.int32))
+                columns["is_call"].append(np.full(rows, is_call))
+                columns["expiration"].append(np.full(rows, expiration, dtype=np.int32))
+                columns["strike"].append(_column(df, "strike"))
+                columns["bid"].append(_column(df, "bid"))
+                columns["ask"].append(_column(df, "ask"))
+                columns["last_price"].append(_column(df, "lastPrice", fill=0))
+                columns["volume"].append(_column(df, "volume", fill=0))
+                columns["open_interest"].append(_column(df, "openInterest", fill=0))
+                columns["implied_volatility"].append(_column(df, "impliedVolatility"))
+
+    empty = {"ticker_index": np.int32, "is_call": bool, "expiration": np.int32}
+    arrays = {
+        name: np.concatenate(parts) if parts else np.empty(0, dtype=empty.get(name, float))
+        for name, parts in columns.items()
+    }
+
+    def stock_value(ticker: str, name: str) -> float:
+        value = stock_data[ticker].get(name)
+        return float(value) if value is not None else np.nan
+
+    return UniverseSnapshot(
+        universe=universe,
+        as_of=as_of,
+        expires_at=expires_at,
+        max_dte=max_dte,
+        price_data_timestamp=price_data_timestamp,
+        tickers=tickers,
+        stock_price=np.array([stock_value(t, "price") for t in tickers], dtype=float),
+        pe_ratio=np.array([stock_value(t, "pe_ratio") for t in tickers], dtype=float),
+        next_earnings_date=[stock_data[t].get("next_earnings_date") for t in tickers],
+        **arrays,
+    )
+
+
+def _ticker_mask(snapshot: UniverseSnapshot, request: ScanRequest) -> np.ndarray:
+    """The stock price and P/E filters of a scan, per ticker."""
+    price = snapshot.stock_price
+    pe = snapshot.pe_ratio
+
+    # Tickers without a price are never scanned
+    mask = ~np.isnan(price) & (price != 0)
+    if request.min_stock_price:
+        mask &= ~(price < request.min_stock_price)
+    if request.max_stock_price:
+        mask &= ~(price > request.max_stock_price)
+
+    # Skip tickers without a P/E only when a P/E filter is set
+    has_pe = ~np.isnan(pe)
+    if request.min_pe_ratio or request.max_pe_ratio:
+        mask &= has_pe
+    if request.min_pe_ratio:
+        mask &= ~(has_pe & (pe < request.min_pe_ratio))
+    if request.max_pe_ratio:
+        mask &= ~(has_pe & (pe > request.max_pe_ratio))
+
+    return mask
+
+
+def query_snapshot(snapshot: UniverseSnapshot, request: ScanRequest) -> list[OptionRecord]:
+    """Run a scan against a snapshot. Matches what a live scan would return."""
+    if snapshot.contracts == 0:
+        return []
+
+    # Stock filters, then broadcast to contracts
+    ticker_index = snapshot.ticker_index
+    mask = _ticker_mask(snapshot, request)[ticker_index]
+
+    # Expiration filters
+    dte = snapshot.expiration - date.today().toordinal()
+    mask &= dte >= 0
+    if request.min_dte:
+        mask &= ~(dte < request.min_dte)
+    if request.max_dte:
+        mask &= ~(dte > request.max_dte)
+
+    if request.option_type == "calls":
+        mask &= snapshot.is_call
+    elif request.option_type == "puts":
+        mask &= ~snapshot.is_call
+
+    # Contract filters, on the rows still in play
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
+        return []
+    stock_price = snapshot.stock_price[ticker_index[rows]]
+    contract_mask, is_itm, collateral, roi, annualized_roi = compute_option_mask(
+        snapshot.strike[rows],
+        snapshot.last_price[rows],
+        snapshot.volume[rows],
+        snapshot.is_call[rows],
+        stock_price,
+        dte[rows],
+        request,
+    )
+    keep = np.flatnonzero(contract_mask)
+    if len(keep) == 0:
+        return []
+    rows = rows[keep]
+
+    # Only the surviving rows are converted to Python objects
+    age = round(snapshot.age_seconds(), 1)
+    columns = zip(
+        ticker_index[rows].tolist(),
+        snapshot.is_call[rows].tolist(),
+        snapshot.strike[rows].tolist(),
+        snapshot.expiration[rows].tolist(),
+        dte[rows].tolist(),
+        snapshot.last_price[rows].tolist(),
+        snapshot.bid[rows].tolist(),
+        snapshot.ask[rows].tolist(),
+        snapshot.volume[rows].tolist(),
+        snapshot.open_interest[rows].tolist(),
+        snapshot.implied_volatility[rows].tolist(),
+        collateral[keep].tolist(),
+        roi[keep].tolist(),
+        annualized_roi[keep].tolist(),
+        is_itm[keep].tolist(),
+    )
+
+    # Per-ticker and per-expiration values are converted once, not per row
+    ticker_values = []
+    for ticker, stock_price, pe_ratio, earnings in zip(
+        snapshot.tickers,
+        snapshot.stock_price.tolist(),
+        snapshot.pe_ratio.tolist(),
+        snapshot.next_earnings_date,
+    ):
+        pe_ratio = pe_ratio if pe_ratio == pe_ratio else None
+        ticker_values.append((
+            ticker,
+            round(stock_price, 2),
+            round(pe_ratio, 2) if pe_ratio else None,
+            earnings.isoformat() if isinstance(earnings, date) else earnings,
+            stock_price,
+            pe_ratio,
+        ))
+    expirations = {
+        ordinal: date.fromordinal(ordinal).isoformat()
+        for ordinal in np.unique(snapshot.expiration[rows]).tolist()
+    }
+
+    results = []
+    for (index, is_call, strike, expiration, row_dte, premium, bid, ask, volume,
+         open_interest, iv, row_collateral, row_roi, row_annualized, row_itm) in columns:
+        ticker, stock_price, pe_ratio, earnings, raw_stock_price, raw_pe_ratio = ticker_values[index]
+        results.append(OptionRecord(
+            ticker,
+            stock_price,
+            round(strike, 2),
+            expirations[expiration],
+            row_dte,
+            "call" if is_call else "put",
+            round(premium, 2),
+            round(bid, 2) if bid and bid == bid else None,
+            round(ask, 2) if ask and ask == ask else None,
+            int(volume),
+            int(open_interest),
+            round(iv, 4) if iv and iv == iv else None,
+            round(row_collateral, 2),
+            round(row_roi, 2),
+            round(row_annualized, 2),
+            "ITM" if row_itm else "OTM",
+            pe_ratio,
+            earnings,
+            age,
+            raw_stock_price,
+            raw_pe_ratio,
+            row_collateral,
+            row_roi,
+        ))
+
+    return results
+
+
+class SnapshotStore:
+    """The latest snapshot per universe. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: dict[str, UniverseSnapshot] = {}
+
+    def put(self, snapshot: UniverseSnapshot):
+        with self._lock:
+            self._snapshots[snapshot.universe] = snapshot
+
+    def get(self, universe: str) -> Optional[UniverseSnapshot]:
+        """The universe's snapshot, or None if there isn't a fresh one."""
+        with self._lock:
+            snapshot = self._snapshots.get(universe)
+        if snapshot is None or not snapshot.is_fresh():
+            return None
+        return snapshot
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+        return {
+            s.universe: {
+                "tickers": len(s.tickers),
+                "contracts": s.contracts,
+                "bytes": sum(a.nbytes for a in s if isinstance(a, np.ndarray)),
+                "age_seconds": round(s.age_seconds(), 1),
+                "fresh": s.is_fresh(),
+                "max_dte": s.max_dte,
+            }
+            for s in snapshots
+        }
+
+
+# Global snapshot store, filled by the prefetch scheduler
+snapshot_store = SnapshotStore()
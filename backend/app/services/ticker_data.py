@@ -0,0 +1,70 @@
+"""
+Per-ticker data behind the snapshot page.
+
+The snapshot, history, news, SEC filings and earnings history endpoints all
+read a few upstream datasets for one ticker. TickerDataService caches each
+dataset per ticker, so the endpoints share what any of them fetched, and
+concurrent requests for the same dataset share one upstream call. Fetches
+run on the route offloader's threads, so callers can await several at once
+and pay for one round of parallel upstream calls. market_data fetches
+these datasets with a fresh yf.Ticker each time, so once TICKER_DATA_TTL
+lapses the next request gets current data from upstream.
+
+Configured with environment variables:
+    TICKER_DATA_TTL   seconds a fetched dataset is reused (default 300)
+"""
+import os
+from typing import Any, Callable
+
+import pandas as pd
+
+from app.services.cache_service import cache_service
+from app.services.concurrency import route_offloader
+from app.services.market_data import market_data
+
+
+TICKER_DATA_TTL = int(os.environ.get("TICKER_DATA_TTL", "300"))
+
+
+class TickerDataService:
+    """Cached, single-flight access to one ticker's snapshot datasets."""
+
+    def __init__(self, ttl: int = TICKER_DATA_TTL):
+        self.ttl = ttl
+
+    @staticmethod
+    def key(ticker: str, dataset: str) -> str:
+        return f"tickerdata_{ticker.upper()}_{dataset}"
+
+    async def _get(self, ticker: str, dataset: str, fetch: Callable[..., Any], *args) -> Any:
+        return await cache_service.get_or_compute(
+            self.key(ticker, dataset),
+            lambda: route_offloader.run(fetch, *args),
+            ttl=self.ttl,
+        )
+
+    async def info(self, ticker: str) -> dict:
+        ticker = ticker.upper()
+        return await self._get(ticker, "info", market_data.info, ticker)
+
+    async def earnings_dates(self, ticker: str) -> pd.DataFrame:
+        ticker = ticker.upper()
+        return await self._get(ticker, "earnings", market_data.earnings_dates, ticker)
+
+    async def news(self, ticker: str) -> list[dict]:
+        ticker = ticker.upper()
+        return await self._get(ticker, "news", market_data.news, ticker)
+
+    async def sec_filings(self, ticker: str) -> list[dict]:
+        ticker = ticker.upper()
+        return await self._get(ticker, "filings", market_data.sec_filings, ticker)
+
+    async def history(self, ticker: str, period: str, interval: str) -> pd.DataFrame:
+        ticker = ticker.upper()
+        return await self._get(
+            ticker, f"history_{period}_{interval}", market_data.history, ticker, period, interval
+        )
+
+
+# Global ticker data instance
+ticker_data = TickerDataService()
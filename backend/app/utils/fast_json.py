@@ -0,0 +1,17 @@
+"""
+JSON encoding for hot paths, such as streaming scan results.
+Uses orjson when it's installed and falls back to the standard library.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(value) -> str:
+    """Encode to a JSON string. NaN is encoded as null with orjson."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(value)
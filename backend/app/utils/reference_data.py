@@ -0,0 +1,275 @@
+"""
+Static reference data for S&P 500 stocks: names, sectors and fundamentals
+from app/data/sp500_info.json, written by scripts/generate_sp500_info.py.
+
+The file is parsed once, on first use, into one ReferenceData table that
+the ticker lists, scanner and heatmap all query. Numeric fields are float64
+columns (NaN when missing), text fields are interned, and a ticker index
+maps symbols to rows. Derived values (the next earnings date, the S&P 100
+as the top 100 by market cap, as the generator picks it) are computed at
+load instead of on every scan.
+
+The generator also writes sp500_info.bin, the same table in a binary
+layout that is memory-mapped instead of parsed: numeric columns are read
+in place, so uvicorn workers share their pages, and loading it costs a
+header read plus decoding the interned strings. It is used when it was
+compiled from the current JSON (checked by digest) and the JSON is used
+otherwise. `python scripts/generate_sp500_info.py --binary-only` rebuilds
+it from an edited JSON.
+
+sp500_info.bin layout, little-endian:
+    8 bytes   magic, BINARY_MAGIC
+    uint32    header length, then the JSON header: row count, numeric,
+              integral and text field names, source_sha256
+    padding   to an 8-byte boundary
+    float64   numeric matrix, (numeric fields, rows), NaN when missing
+    uint32    string codes, (1 + text fields, rows); row 0 is the ticker,
+              NO_STRING when missing
+    bytes     string table, UTF-8, NUL-separated, to the end of the file
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+SP500_INFO_PATH = DATA_DIR / "sp500_info.json"
+
+BINARY_MAGIC = b"OWSREF\x00\x01"
+NO_STRING = 0xFFFFFFFF
+
+SP100_SIZE = 100
+
+
+def _earnings_date(timestamp: float) -> Optional[date]:
+    if np.isnan(timestamp):
+        return None
+    try:
+        return datetime.fromtimestamp(timestamp).date()
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+class ReferenceData:
+    """Columnar per-ticker reference data, rows in file order. Read-only."""
+
+    def __init__(
+        self,
+        tickers: list[str],
+        strings: dict[str, tuple],
+        numeric_fields: list[str],
+        numeric: np.ndarray,
+        integral: frozenset,
+    ):
+        self.tickers = tuple(tickers)
+        self.index = {ticker: row for row, ticker in enumerate(self.tickers)}
+        self._strings = strings
+        self._columns = {field: col for col, field in enumerate(numeric_fields)}
+        self._numeric = numeric  # (fields, tickers)
+        self._integral = integral
+
+        if "earnings_timestamp" in self._columns:
+            self.next_earnings = tuple(_earnings_date(ts) for ts in self.column("earnings_timestamp"))
+        else:
+            self.next_earnings = (None,) * len(self.tickers)
+        self.sp100 = self._top_by_market_cap(SP100_SIZE)
+
+    @classmethod
+    def from_stocks(cls, stocks: dict[str, dict]) -> "ReferenceData":
+        """Build the table from sp500_info.json's {ticker: {field: value}} records."""
+        records = list(stocks.values())
+        fields = list(dict.fromkeys(f for info in records for f in info if f != "ticker"))
+        text = {f for f in fields if any(isinstance(info.get(f), str) for info in records)}
+
+        strings = {
+            f: tuple(sys.intern(v) if isinstance(v, str) else None for v in (info.get(f) for info in records))
+            for f in fields if f in text
+        }
+        numeric_fields = [f for f in fields if f not in text]
+        numeric = np.full((len(numeric_fields), len(records)), np.nan)
+        integral = set(numeric_fields)
+        for col, field in enumerate(numeric_fields):
+            for row, info in enumerate(records):
+                value = info.get(field)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    numeric[col, row] = value
+                    if not isinstance(value, int):
+                        integral.discard(field)
+        return cls(list(stocks), strings, numeric_fields, numeric, frozenset(integral))
+
+    @classmethod
+    def from_binary(cls, path: Path, source_digest: Optional[str] = None) -> "ReferenceData":
+        """
+        Map a table written by write_binary(). ValueError if the file is
+        malformed, or wasn't compiled from the source with source_digest.
+        """
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buf[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+            raise ValueError("not a reference data file")
+        (header_len,) = struct.unpack_from("<I", buf, len(BINARY_MAGIC))
+        start = len(BINARY_MAGIC) + 4
+        header = json.loads(buf[start:start + header_len])
+        if source_digest is not None and header["source_sha256"] != source_digest:
+            raise ValueError("compiled from a different sp500_info.json")
+
+        rows = header["rows"]
+        numeric_fields = header["numeric_fields"]
+        text_fields = header["text_fields"]
+        offset = _aligned(start + header_len)
+        # Views into the mapping; the pages stay shared between processes
+        numeric = np.frombuffer(buf, "<f8", len(numeric_fields) * rows, offset)
+        offset += numeric.nbytes
+        codes = np.frombuffer(buf, "<u4", (1 + len(text_fields)) * rows, offset)
+        offset += codes.nbytes
+        table = [sys.intern(s) for s in buf[offset:].decode().split("\0")]
+
+        codes = codes.reshape(1 + len(text_fields), rows).tolist()
+        tickers, *columns = ([table[c] if c != NO_STRING else None for c in row] for row in codes)
+        return cls(
+            tickers,
+            {field: tuple(col) for field, col in zip(text_fields, columns)},
+            numeric_fields,
+            numeric.reshape(len(numeric_fields), rows),
+            frozenset(header["integral_fields"]),
+        )
+
+    def write_binary(self, path: Path, source_digest: str):
+        """Write the table in from_binary()'s layout, replacing path atomically."""
+        table: dict[str, int] = {}
+
+        def code(value: Optional[str]) -> int:
+            if value is None:
+                return NO_STRING
+            if "\0" in value:
+                raise ValueError(f"NUL in reference data string {value!r}")
+            return table.setdefault(value, len(table))
+
+        text_fields = list(self._strings)
+        codes = np.array(
+            [[code(t) for t in self.tickers]]
+            + [[code(v) for v in self._strings[field]] for field in text_fields],
+            dtype="<u4",
+        ).reshape(1 + len(text_fields), len(self.tickers))
+        header = json.dumps({
+            "rows": len(self.tickers),
+            "numeric_fields": list(self._columns),
+            "integral_fields": sorted(self._integral),
+            "text_fields": text_fields,
+            "source_sha256": source_digest,
+        }).encode()
+
+        start = len(BINARY_MAGIC) + 4
+        padding = _aligned(start + len(header)) - start - len(header)
+        # Workers may have the old file mapped, so never write into it
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(BINARY_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header + b" " * padding)
+            f.write(np.ascontiguousarray(self._numeric, dtype="<f8").tobytes())
+            f.write(codes.tobytes())
+            f.write("\0".join(table).encode())
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.index
+
+    def column(self, field: str) -> np.ndarray:
+        """A numeric field for every row, NaN where missing."""
+        return self._numeric[self._columns[field]]
+
+    def get(self, ticker: str, field: str) -> Any:
+        """One ticker's field, as the JSON had it; None if missing or unknown."""
+        row = self.index.get(ticker)
+        if row is None:
+            return None
+        if field in self._strings:
+            return self._strings[field][row]
+        col = self._columns.get(field)
+        if col is None:
+            return None
+        value = self._numeric[col, row]
+        if np.isnan(value):
+            return None
+        return int(value) if field in self._integral else float(value)
+
+    def values(self, field: str, tickers: Iterable[str]) -> list:
+        """get() for several tickers."""
+        return [self.get(ticker, field) for ticker in tickers]
+
+    def next_earnings_date(self, ticker: str) -> Optional[date]:
+        row = self.index.get(ticker)
+        return self.next_earnings[row] if row is not None else None
+
+    def _top_by_market_cap(self, count: int) -> tuple[str, ...]:
+        if "market_cap" not in self._columns:
+            return ()
+        caps = np.nan_to_num(self.column("market_cap"))
+        # Stable, so equal caps keep file order as in the generator's sort
+        order = np.argsort(-caps, kind="stable")
+        return tuple(self.tickers[row] for row in order[:count] if caps[row])
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _file_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compile_reference_data(path: Path = SP500_INFO_PATH) -> Path:
+    """Write an info file's binary companion next to it; returns its path."""
+    with open(path) as f:
+        stocks = json.load(f).get("stocks", {})
+    binary_path = path.with_suffix(".bin")
+    ReferenceData.from_stocks(stocks).write_binary(binary_path, _file_digest(path))
+    return binary_path
+
+
+def load_reference_data(path: Path = SP500_INFO_PATH) -> ReferenceData:
+    """
+    Load an info file, from its binary companion when that is current.
+    An empty table if neither exists.
+    """
+    binary_path = path.with_suffix(".bin")
+    if binary_path.exists():
+        digest = _file_digest(path) if path.exists() else None
+        try:
+            return ReferenceData.from_binary(binary_path, digest)
+        except (ValueError, KeyError, OSError) as e:
+            print(f"Ignoring {binary_path.name}, loading {path.name}: {e}")
+
+    stocks = {}
+    if path.exists():
+        with open(path) as f:
+            stocks = json.load(f).get("stocks", {})
+    return ReferenceData.from_stocks(stocks)
+
+
+_reference: Optional[ReferenceData] = None
+_lock = threading.Lock()
+
+
+def reference_data() -> ReferenceData:
+    """The shared reference data, loaded on first use."""
+    global _reference
+    if _reference is None:
+        with _lock:
+            if _reference is None:
+                _reference = load_reference_data()
+    return _reference
@@ -0,0 +1,115 @@
+"""
+Batched framing for scan event streams.
+
+A broad scan yields one result event per contract and one progress event per
+ticker; framed one by one, tens of thousands of tiny SSE messages cost more
+than the scan. batch_scan_events() coalesces result events into `results`
+events carrying an array, flushed when a batch is full or its time window
+ends, and keeps at most one progress event per interval (the latest).
+"""
+import asyncio
+from typing import AsyncGenerator, AsyncIterable
+
+
+async def batch_scan_events(
+    events: AsyncIterable[dict],
+    max_rows: int = 200,
+    max_delay: float = 0.1,
+    progress_interval: float = 0.25,
+) -> AsyncGenerator[dict, None]:
+    """
+    Re-frame scan events. Result rows are buffered until max_rows arrive or
+    max_delay seconds pass since the first one; progress events are dropped
+    unless progress_interval seconds passed since the last one sent, with
+    the latest dropped one sent before the next batch or the end. Other
+    events flush the buffer and pass through in order.
+    """
+    loop = asyncio.get_running_loop()
+    # One task pumps the source into a bounded queue, so the common case of
+    # a ready event costs no task or timer of its own
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(max_rows, 64))
+    finished = object()
+
+    async def pump():
+        try:
+            async for event in events:
+                await queue.put(event)
+            await queue.put((finished, None))
+        except Exception as e:
+            await queue.put((finished, e))
+
+    rows: list[dict] = []
+    deadline = None
+    pending_progress = None
+    last_progress = float("-inf")
+
+    def flush() -> list[dict]:
+        nonlocal rows, deadline, pending_progress, last_progress
+        out = []
+        if pending_progress is not None:
+            out.append(pending_progress)
+            pending_progress = None
+            last_progress = loop.time()
+        if rows:
+            out.append({"type": "results", "data": rows})
+            rows = []
+        deadline = None
+        return out
+
+    pump_task = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                event = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                if deadline is None:
+                    event = await queue.get()
+                else:
+                    try:
+                        event = await asyncio.wait_for(
+                            queue.get(), timeout=max(0.0, deadline - loop.time())
+                        )
+                    except asyncio.TimeoutError:
+                        # Time window ended with the batch still open
+                        for out in flush():
+                            yield out
+                        continue
+
+            if isinstance(event, tuple) and event[0] is finished:
+                if event[1] is not None:
+                    raise event[1]
+                break
+
+            if event["type"] == "result":
+                if not rows:
+                    window_end = loop.time() + max_delay
+                    deadline = window_end if deadline is None else min(deadline, window_end)
+                rows.append(event["data"])
+                if len(rows) >= max_rows:
+                    for out in flush():
+                        yield out
+            elif event["type"] == "progress":
+                now = loop.time()
+                if now - last_progress >= progress_interval:
+                    last_progress = now
+                    pending_progress = None
+                    yield event
+                else:
+                    pending_progress = event
+                    if deadline is None:
+                        deadline = last_progress + progress_interval
+            else:
+                for out in flush():
+                    yield out
+                yield event
+
+        for out in flush():
+            yield out
+    finally:
+        pump_task.cancel()
+        try:
+            await pump_task
+        except asyncio.CancelledError:
+            pass
+        if hasattr(events, "aclose"):
+            await events.aclose()
@@ -1,29 +1,15 @@
-import json
-from pathlib import Path
+from app.utils.reference_data import reference_data
 
-# Load S&P 500 and S&P 100 data from JSON files (single source of truth)
-_DATA_DIR = Path(__file__).parent.parent / "data"
-_SP500_INFO_PATH = _DATA_DIR / "sp500_info.json"
-_SP100_INFO_PATH = _DATA_DIR / "sp100_info.json"
 
-_SP500_INFO: dict = {}
-_SP100_INFO: dict = {}
-
-if _SP500_INFO_PATH.exists():
-    with open(_SP500_INFO_PATH) as f:
-        data = json.load(f)
-        _SP500_INFO = data.get("stocks", {})
-
-if _SP100_INFO_PATH.exists():
-    with open(_SP100_INFO_PATH) as f:
-        data = json.load(f)
-        _SP100_INFO = data.get("stocks", {})
-
-# S&P 100 - loaded from sp100_info.json (top 100 by market cap)
-SP100_TICKERS = list(_SP100_INFO.keys())
-
-# S&P 500 - loaded from sp500_info.json
-SP500_TICKERS = list(_SP500_INFO.keys())
+def __getattr__(name: str) -> list[str]:
+    # SP100_TICKERS / SP500_TICKERS, built from the reference data on access
+    if name == "SP100_TICKERS":
+        # S&P 100 - top 100 of sp500_info.json by market cap
+        return list(reference_data().sp100)
+    if name == "SP500_TICKERS":
+        # S&P 500 - every ticker in sp500_info.json
+        return list(reference_data().tickers)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_tickers(universe: str, custom_tickers: str | None = None) -> list[str]:
@@ -31,9 +17,9 @@ def get_tickers(universe: str, custom_tickers: str | None = None) -> list[str]:
     base_tickers = []
 
     if universe == "sp100":
-        base_tickers = SP100_TICKERS.copy()
+        base_tickers = list(reference_data().sp100)
     elif universe == "sp500":
-        base_tickers = SP500_TICKERS.copy()
+        base_tickers = list(reference_data().tickers)
     elif universe == "custom":
         # Custom only - no base tickers
         pass
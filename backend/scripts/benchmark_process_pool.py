@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark chain filtering on scan threads vs a process pool, by worker count.
+
+Feeds synthetic calls/puts chains through ScannerService._filter_chains from
+the scanner's thread pool, as _scan_ticker_options does, first with no
+process pool and then with SCANNER_PROCESS_WORKERS-style pools of 1, 2, 4...
+up to --max-workers processes. Checks every run returns the same records and
+prints throughput, so scaling with core count is visible.
+
+Usage:
+    cd backend
+    source venv/bin/activate
+    python scripts/benchmark_process_pool.py [--chains 2000] [--strikes 120] [--max-workers 8]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.requests import ScanRequest  # noqa: E402
+from app.services.scanner_service import scanner_service  # noqa: E402
+from benchmark_option_filter import make_chain  # noqa: E402
+
+
+def run(jobs, request) -> tuple[float, list]:
+    """Filter every job on the scanner's threads; returns (seconds, records)."""
+    start = time.perf_counter()
+    futures = [
+        scanner_service.executor.submit(
+            scanner_service._filter_chains, frames, ticker, stock_price, exp, dte, 25.0, None, request
+        )
+        for ticker, stock_price, exp, dte, frames in jobs
+    ]
+    results = [record for future in futures for record in future.result()]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chains", type=int, default=2000, help="Expirations (calls + puts) to filter")
+    parser.add_argument("--strikes", type=int, default=120)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    today = date.today()
+    jobs = []
+    for i in range(args.chains):
+        stock_price = float(rng.uniform(20, 600))
+        dte = 7 * (i % 12 + 1)
+        frames = [
+            ("call", make_chain(rng, stock_price, args.strikes)),
+            ("put", make_chain(rng, stock_price, args.strikes)),
+        ]
+        jobs.append((f"T{i // 12:03d}", stock_price, today + timedelta(days=dte), dte, frames))
+
+    request = ScanRequest(min_roi=0.5)
+    contracts = args.chains * 2 * args.strikes
+    print(f"{args.chains} expirations, {contracts} contracts, {os.cpu_count()} CPUs")
+
+    scanner_service.shutdown()
+    baseline, expected = run(jobs, request)
+    print(f"threads only:  {baseline:7.3f}s  {contracts / baseline:10.0f} contracts/s  "
+          f"({len(expected)} results)")
+
+    workers = 1
+    while workers <= args.max_workers:
+        scanner_service.process_pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        # Start the workers before timing
+        run(jobs[:workers * 4], request)
+
+        seconds, results = run(jobs, request)
+        scanner_service.shutdown()
+        if results != expected:
+            print("MISMATCH: process pool results differ from thread results")
+            sys.exit(1)
+        print(f"{workers:2d} processes:  {seconds:7.3f}s  {contracts / seconds:10.0f} contracts/s  "
+              f"({baseline / seconds:.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
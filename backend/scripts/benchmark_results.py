@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark building and serializing scan results: OptionResult vs OptionRecord.
+
+Filters synthetic chains down to about 50k contracts, then times turning them
+into the JSON each SSE result event carries, both ways:
+    model:  OptionResult per row, model_dump(), isoformat dates, json.dumps
+    record: OptionRecord per row, to_dict(), fast_json.dumps
+and reports CPU time and peak traced allocations per result. Both paths must
+produce the same decoded JSON.
+
+Usage:
+    cd backend
+    source venv/bin/activate
+    python scripts/benchmark_results.py [--contracts 50000] [--runs 3]
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.requests import ScanRequest  # noqa: E402
+from app.models.responses import OptionResult  # noqa: E402
+from app.services.option_filter import filter_option_chain  # noqa: E402
+from app.utils import fast_json  # noqa: E402
+from benchmark_option_filter import make_chain  # noqa: E402
+
+
+def model_path(records) -> list[str]:
+    """The pre-record path: validate a model per row, dump and encode it."""
+    out = []
+    for record in records:
+        option = OptionResult(
+            ticker=record.ticker,
+            stock_price=record.stock_price,
+            strike=record.strike,
+            expiration=date.fromisoformat(record.expiration),
+            dte=record.dte,
+            option_type=record.option_type,
+            premium=record.premium,
+            bid=record.bid,
+            ask=record.ask,
+            volume=record.volume,
+            open_interest=record.open_interest,
+            implied_volatility=record.implied_volatility,
+            collateral=record.collateral,
+            roi=record.roi,
+            annualized_roi=record.annualized_roi,
+            moneyness=record.moneyness,
+            pe_ratio=record.pe_ratio,
+            next_earnings_date=record.next_earnings_date,
+        )
+        data = option.model_dump()
+        if isinstance(data.get("expiration"), date):
+            data["expiration"] = data["expiration"].isoformat()
+        if isinstance(data.get("next_earnings_date"), date):
+            data["next_earnings_date"] = data["next_earnings_date"].isoformat()
+        out.append(json.dumps(data))
+    return out
+
+
+def record_path(records) -> list[str]:
+    """The current path: records are already built, just dict and encode."""
+    return [fast_json.dumps(record.to_dict()) for record in records]
+
+
+def measure(fn, records, runs: int) -> tuple[float, int, list[str]]:
+    """Best CPU seconds over runs, and peak traced bytes of one more run."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.process_time()
+        out = fn(records)
+        best = min(best, time.process_time() - start)
+
+    tracemalloc.start()
+    fn(records)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--contracts", type=int, default=50000)
+    parser.add_argument("--strikes", type=int, default=80)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    today = date.today()
+    request = ScanRequest()
+
+    # Record building is part of filtering, so time it separately from encoding
+    records = []
+    build_cpu = 0.0
+    t = 0
+    while len(records) < args.contracts:
+        stock_price = float(rng.uniform(20, 600))
+        for e in range(12):
+            dte = 7 * (e + 1)
+            exp = today + timedelta(days=dte)
+            for opt_type in ("call", "put"):
+                df = make_chain(rng, stock_price, args.strikes)
+                start = time.process_time()
+                records.extend(filter_option_chain(
+                    df, f"T{t:03d}", stock_price, exp, dte, opt_type, 25.0, None, request
+                ))
+                build_cpu += time.process_time() - start
+        t += 1
+    records = records[: args.contracts]
+    print(f"{len(records)} results from {t} tickers (filter + build {build_cpu:.3f}s CPU)")
+
+    model_cpu, model_peak, model_out = measure(model_path, records, args.runs)
+    record_cpu, record_peak, record_out = measure(record_path, records, args.runs)
+
+    if [json.loads(s) for s in model_out] != [json.loads(s) for s in record_out]:
+        print("MISMATCH: record JSON differs from OptionResult JSON")
+        sys.exit(1)
+
+    n = len(records)
+    print("Output:  identical JSON")
+    print(f"model:   {model_cpu:7.3f}s CPU ({model_cpu / n * 1e6:6.2f} us/result), "
+          f"peak {model_peak / 1024 / 1024:7.1f} MiB")
+    print(f"record:  {record_cpu:7.3f}s CPU ({record_cpu / n * 1e6:6.2f} us/result), "
+          f"peak {record_peak / 1024 / 1024:7.1f} MiB")
+    print(f"Speedup: {model_cpu / record_cpu:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark the full /scan and /heatmap pipelines offline against recorded data.
+
+Runs the scanner and heatmap services on the replay market data provider, so
+results are reproducible and need no network. Record real data by running
+the API with MARKET_DATA_PROVIDER=record, or synthesize a dataset here.
+
+Usage:
+    cd backend
+    source venv/bin/activate
+    python scripts/benchmark_scan.py --synthesize [--data .market_data] [--latency-ms 50]
+    python scripts/benchmark_scan.py --universe sp500 --min-roi 1 --runs 3
+    python scripts/benchmark_scan.py --sort-by annualized_roi --limit 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def synthesize(data_dir: Path, universe: str, expirations: int, strikes: int):
+    """Write a synthetic recording for every ticker in the universe."""
+    from benchmark_option_filter import make_chain
+
+    with open(BACKEND_DIR / "app" / "data" / f"{universe}_info.json") as f:
+        tickers = list(json.load(f)["stocks"].keys())
+
+    rng = np.random.default_rng(7)
+    today = date.today()
+    days = pd.bdate_range(end=pd.Timestamp(today), periods=260)
+
+    for ticker in tickers:
+        base = float(rng.uniform(20, 600))
+        close = base * np.exp(np.cumsum(rng.normal(0, 0.015, len(days))))
+        prices = pd.DataFrame({
+            "Adj Close": close,
+            "Close": close,
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Open": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, len(days)),
+        }, index=pd.Index(days, name="Date"))
+        (data_dir / "prices").mkdir(parents=True, exist_ok=True)
+        prices.to_csv(data_dir / "prices" / f"{ticker}.csv")
+
+        exp_dates = [(today + timedelta(days=7 * (i + 1))).isoformat() for i in range(expirations)]
+        (data_dir / "options").mkdir(parents=True, exist_ok=True)
+        with open(data_dir / "options" / f"{ticker}.json", "w") as f:
+            json.dump(exp_dates, f)
+
+        chain_dir = data_dir / "chains" / ticker
+        chain_dir.mkdir(parents=True, exist_ok=True)
+        for exp in exp_dates:
+            make_chain(rng, close[-1], strikes).to_csv(chain_dir / f"{exp}_calls.csv", index=False)
+            make_chain(rng, close[-1], strikes).to_csv(chain_dir / f"{exp}_puts.csv", index=False)
+
+    print(f"Synthesized {len(tickers)} tickers x {expirations} expirations into {data_dir}")
+
+
+async def run_scan(request, sort_by: Optional[str] = None, limit: int = 100) -> dict:
+    from app.services.ranking import TopK
+    from app.services.scanner_service import scanner_service
+
+    ranking = TopK(sort_by, limit) if sort_by else None
+    start = time.perf_counter()
+    first_result = None
+    results = 0
+    events = 0
+
+    async for event in scanner_service.scan_options(request, ranking=ranking):
+        events += 1
+        if event["type"] == "result":
+            results += 1
+        elif event["type"] == "topk":
+            results = len(event["data"]["results"])
+        else:
+            continue
+        if first_result is None:
+            first_result = time.perf_counter() - start
+
+    return {
+        "total": time.perf_counter() - start,
+        "first_result": first_result,
+        "results": results,
+        "events": events,
+        "ranking": ranking,
+    }
+
+
+async def run_heatmap() -> float:
+    from app.services.heatmap_service import heatmap_service
+
+    start = time.perf_counter()
+    await heatmap_service.get_heatmap("1d")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", type=Path, default=BACKEND_DIR / ".market_data")
+    parser.add_argument("--synthesize", action="store_true", help="Write a synthetic recording first")
+    parser.add_argument("--universe", default="sp100", choices=["sp100", "sp500"])
+    parser.add_argument("--expirations", type=int, default=8)
+    parser.add_argument("--strikes", type=int, default=60)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--min-roi", type=float, default=None)
+    parser.add_argument("--min-dte", type=int, default=None)
+    parser.add_argument("--max-dte", type=int, default=None)
+    parser.add_argument("--sort-by", choices=["annualized_roi", "roi"], default=None,
+                        help="Top-K mode: keep only the best --limit results")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--warm", action="store_true", help="Keep caches between runs")
+    args = parser.parse_args()
+
+    # The provider is chosen at import time, so configure it before importing the app
+    os.environ["MARKET_DATA_PROVIDER"] = "replay"
+    os.environ["MARKET_DATA_DIR"] = str(args.data)
+    os.environ["MARKET_DATA_LATENCY_MS"] = str(args.latency_ms)
+
+    if args.synthesize:
+        synthesize(args.data, args.universe, args.expirations, args.strikes)
+
+    from app.models.requests import ScanRequest
+    from app.services.cache_service import cache_service
+
+    request = ScanRequest(
+        universe=args.universe, min_roi=args.min_roi, min_dte=args.min_dte, max_dte=args.max_dte
+    )
+
+    for run in range(1, args.runs + 1):
+        if not args.warm:
+            cache_service.clear()
+
+        scan = asyncio.run(run_scan(request, args.sort_by, args.limit))
+        heatmap = asyncio.run(run_heatmap())
+
+        first = f"{scan['first_result']:.3f}s" if scan["first_result"] is not None else "n/a"
+        print(
+            f"Run {run}: scan {scan['total']:.3f}s (first result {first}, "
+            f"{scan['results']} results, {scan['events']} events), heatmap {heatmap:.3f}s"
+        )
+        ranking = scan["ranking"]
+        if ranking is not None:
+            print(
+                f"  top {ranking.limit} of {ranking.seen} by {ranking.sort_by}: skipped "
+                f"{ranking.skipped_expirations} expirations, {ranking.skipped_tickers} tickers"
+            )
+
+
+if __name__ == "__main__":
+    main()
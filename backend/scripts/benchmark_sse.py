@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark /scan SSE framing: one event per result vs batched results.
+
+Streams the real /api/v1/scan endpoint over the replay market data provider
+and reports bytes, SSE messages and CPU time per scan for each mode. Chains
+stay cached between runs, so the numbers are dominated by building and
+framing events rather than fetching.
+
+Usage:
+    cd backend
+    source venv/bin/activate
+    python scripts/benchmark_scan.py --synthesize   # once, to create .market_data
+    python scripts/benchmark_sse.py --min-roi 1 --runs 3
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def stream_scan(client, body: dict, params: dict) -> dict:
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    received = 0
+    messages = 0
+
+    with client.stream("POST", "/api/v1/scan", json=body, params=params) as response:
+        for chunk in response.iter_bytes():
+            received += len(chunk)
+            messages += chunk.count(b"\r\n\r\n") + chunk.count(b"\n\n")
+
+    return {
+        "seconds": time.perf_counter() - start,
+        "cpu": time.process_time() - start_cpu,
+        "bytes": received,
+        "messages": messages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", type=Path, default=BACKEND_DIR / ".market_data")
+    parser.add_argument("--universe", default="sp100", choices=["sp100", "sp500"])
+    parser.add_argument("--min-roi", type=float, default=None)
+    parser.add_argument("--max-dte", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--batch-ms", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # Configure the app before importing it: replay data, no background work
+    os.environ["MARKET_DATA_PROVIDER"] = "replay"
+    os.environ["MARKET_DATA_DIR"] = str(args.data)
+    os.environ["PREFETCH_ENABLED"] = "false"
+    os.environ["CACHE_DISK_PATH"] = ""
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services.scan_result_cache import scan_result_cache
+
+    body = {"universe": args.universe, "min_roi": args.min_roi, "max_dte": args.max_dte}
+    modes = {
+        "per-result": {},
+        "batched": {"batch": "true", "batch_size": args.batch_size, "batch_ms": args.batch_ms},
+    }
+
+    with TestClient(app) as client:
+        # Warm the chain cache so both modes scan the same cached data
+        stream_scan(client, body, {})
+
+        for name, params in modes.items():
+            runs = []
+            for _ in range(args.runs):
+                scan_result_cache.clear()
+                runs.append(stream_scan(client, body, params))
+            best = min(runs, key=lambda r: r["cpu"])
+            print(
+                f"{name:>10}: {best['bytes'] / 1024:9.1f} KiB, {best['messages']:6d} messages, "
+                f"CPU {best['cpu']:.3f}s, wall {best['seconds']:.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
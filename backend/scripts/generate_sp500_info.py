@@ -3,13 +3,17 @@
 Generate static SP500 info file with sector, name, and market cap data.
 
 Run this script monthly (or whenever S&P 500 composition changes) to update the static data.
+Besides the JSON files it writes sp500_info.bin, the binary companion the app
+memory-maps at startup. After editing sp500_info.json by hand, rebuild just the
+companion with --binary-only; until then the app loads the JSON.
 
 Usage:
     cd backend
     source venv/bin/activate
-    python scripts/generate_sp500_info.py
+    python scripts/generate_sp500_info.py [--binary-only]
 """
 
+import argparse
 import json
 import sys
 import time
@@ -18,6 +22,10 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import yfinance as yf
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.reference_data import SP500_INFO_PATH, compile_reference_data  # noqa: E402
+
 
 def load_sp500_tickers() -> list[str]:
     """Load S&P 500 tickers from the JSON file."""
@@ -109,7 +117,23 @@ def fetch_ticker_info(ticker: str) -> dict | None:
         }
 
 
+def write_binary(sp500_path: Path):
+    binary_path = compile_reference_data(sp500_path)
+    print(f"Saved binary reference data: {binary_path}")
+
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--binary-only", action="store_true",
+        help="only rebuild sp500_info.bin from the existing sp500_info.json",
+    )
+    args = parser.parse_args()
+
+    if args.binary_only:
+        write_binary(SP500_INFO_PATH)
+        return
+
     # Load tickers from JSON file
     tickers = load_sp500_tickers()
 
@@ -159,6 +183,7 @@ def main():
         json.dump(sp500_data, f, indent=2)
 
     print(f"\nSaved S&P 500: {sp500_path}")
+    write_binary(sp500_path)
 
     # Derive S&P 100 (top 100 by market cap) and save
     stocks_by_cap = [
@@ -0,0 +1,115 @@
+import os
+
+# Keep the app's global cache in memory and the scheduler off before any
+# app module is imported
+os.environ.setdefault("CACHE_DISK_PATH", "")
+os.environ.setdefault("PREFETCH_ENABLED", "false")
+
+import zlib  # noqa: E402
+from collections import Counter  # noqa: E402
+from datetime import date, timedelta  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from app.services import chain_cache, price_store, scanner_service  # noqa: E402
+from app.services.cache_service import cache_service  # noqa: E402
+from app.services.market_data import MarketDataProvider, OptionChain  # noqa: E402
+from app.services.scan_result_cache import scan_result_cache  # noqa: E402
+
+
+# Symbols that aren't in the reference data, so scans look them up live
+FAKE_TICKERS = ("TSTA", "TSTB", "TSTC", "TSTD", "TSTE", "TSTF")
+
+
+class FakeMarketData(MarketDataProvider):
+    """
+    Deterministic synthetic market data: every ticker has a price, a P/E
+    (None for some), four weekly expirations and 40-strike chains. Counts
+    calls per method in `calls`.
+    """
+
+    def __init__(self, tickers=FAKE_TICKERS, expirations: int = 4, strikes: int = 40):
+        self.tickers = tickers
+        self.expirations = expirations
+        self.strikes = strikes
+        self.calls: Counter = Counter()
+
+    @staticmethod
+    def _rng(*parts) -> np.random.Generator:
+        return np.random.default_rng(zlib.crc32("/".join(map(str, parts)).encode()))
+
+    def price(self, ticker: str) -> float:
+        return round(float(self._rng(ticker).uniform(20, 400)), 2)
+
+    def download(self, tickers, period=None, start=None, interval="1d"):
+        self.calls["download"] += 1
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        known = [t for t in tickers if t in self.tickers]
+        columns = pd.MultiIndex.from_product([["Close"], known], names=["Price", "Ticker"])
+        return pd.DataFrame([[self.price(t) for t in known]], columns=columns, index=[pd.Timestamp(date.today())])
+
+    def info(self, ticker):
+        self.calls["info"] += 1
+        pe = round(float(self._rng(ticker, "pe").uniform(5, 60)), 2)
+        return {"shortName": ticker, "trailingPE": None if ticker.endswith(("C", "F")) else pe}
+
+    def options(self, ticker):
+        self.calls["options"] += 1
+        today = date.today()
+        return [(today + timedelta(days=7 * (i + 1))).isoformat() for i in range(self.expirations)]
+
+    def option_chain(self, ticker, expiration):
+        self.calls["option_chain"] += 1
+        price = self.price(ticker)
+        return OptionChain(
+            calls=self._chain(ticker, expiration, "calls", price),
+            puts=self._chain(ticker, expiration, "puts", price),
+        )
+
+    def _chain(self, ticker: str, expiration: str, side: str, price: float) -> pd.DataFrame:
+        rng = self._rng(ticker, expiration, side)
+        strike = np.round(np.linspace(price * 0.6, price * 1.4, self.strikes), 1)
+        last_price = np.round(np.abs(rng.normal(price * 0.02, price * 0.015, self.strikes)), 2)
+        last_price[rng.random(self.strikes) < 0.05] = 0.0
+        return pd.DataFrame({
+            "strike": strike,
+            "lastPrice": last_price,
+            "bid": np.round(last_price * 0.97, 2),
+            "ask": np.round(last_price * 1.03, 2),
+            "volume": rng.integers(0, 5000, self.strikes).astype(float),
+            "openInterest": rng.integers(0, 20000, self.strikes).astype(float),
+            "impliedVolatility": np.round(rng.uniform(0.1, 1.2, self.strikes), 5),
+        })
+
+    def history(self, ticker, period, interval):
+        return pd.DataFrame()
+
+    def calendar(self, ticker):
+        return {}
+
+    def news(self, ticker):
+        return []
+
+    def sec_filings(self, ticker):
+        return []
+
+    def earnings_dates(self, ticker):
+        return pd.DataFrame()
+
+    def ticker_attribute(self, ticker, attribute):
+        return None
+
+
+@pytest.fixture
+def fake_market(monkeypatch):
+    """Point the scanner's data path at a FakeMarketData, with empty caches."""
+    provider = FakeMarketData()
+    for module in (scanner_service, price_store, chain_cache):
+        monkeypatch.setattr(module, "market_data", provider)
+    cache_service.clear()
+    scan_result_cache.clear()
+    yield provider
+    cache_service.clear()
+    scan_result_cache.clear()
@@ -0,0 +1,108 @@
+import asyncio
+import sys
+
+from app.services.cache_service import CacheService
+
+
+def blob(n: int = 1000) -> bytes:
+    return b"x" * n
+
+
+def make_cache(values: int) -> CacheService:
+    """One shard with room for `values` blobs by bytes, and plenty by count."""
+    return CacheService(max_entries=1000, max_bytes=sys.getsizeof(blob()) * values, shards=1)
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = make_cache(3)
+    for key in ("a_1", "a_2", "a_3"):
+        cache.set(key, blob())
+    assert cache.get("a_1") is not None  # a_2 is now least recently used
+
+    cache.set("a_4", blob())
+    assert cache.get("a_2") is None
+    assert all(cache.get(key) is not None for key in ("a_1", "a_3", "a_4"))
+
+    stats = cache.stats()
+    assert stats["bytes"] <= stats["max_bytes"]
+    assert stats["namespaces"]["a"]["evictions"] == 1
+
+
+def test_large_value_evicts_several():
+    cache = make_cache(3)
+    for key in ("a_1", "a_2", "a_3"):
+        cache.set(key, blob())
+
+    cache.set("b_1", blob(2000))
+    assert cache.get("a_1") is None and cache.get("a_2") is None
+    assert cache.get("a_3") is not None and cache.get("b_1") is not None
+
+
+def test_value_larger_than_a_shard_is_not_cached():
+    cache = make_cache(3)
+    cache.set("a_1", blob())
+    cache.set("b_1", blob(5000))
+    assert cache.get("b_1") is None
+    assert cache.get("a_1") is not None
+
+
+def test_replacing_a_key_updates_its_size():
+    cache = make_cache(3)
+    cache.set("a_1", blob(2000))
+    cache.set("a_1", blob())
+    assert cache.stats()["bytes"] == sys.getsizeof(blob())
+
+
+def test_get_or_compute_shares_one_load():
+    cache = make_cache(10)
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        results = await asyncio.gather(*(cache.get_or_compute("k_1", loader) for _ in range(5)))
+        assert results == ["value"] * 5
+        assert await cache.get_or_compute("k_1", loader) == "value"
+        assert await cache.get_or_compute("k_1", loader, refresh=True) == "value"
+
+    asyncio.run(main())
+    assert loads == 2
+
+
+def test_get_or_compute_raises_loader_error_to_every_caller():
+    cache = make_cache(10)
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.get_or_compute("k_1", loader) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert cache.get("k_1") is None
+
+
+def test_get_or_compute_survives_a_cancelled_caller():
+    cache = make_cache(10)
+
+    async def loader():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def main():
+        first = asyncio.ensure_future(cache.get_or_compute("k_1", loader))
+        second = asyncio.ensure_future(cache.get_or_compute("k_1", loader))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        assert await second == "value"
+
+    asyncio.run(main())
+    assert cache.get("k_1") == "value"
@@ -0,0 +1,49 @@
+import pytest
+
+from app.services import chain_cache as chain_cache_module
+from app.services import market_data as market_data_module
+from app.services.cache_service import cache_service
+from app.services.chain_cache import OptionChainCache
+from app.services.market_data import YFinanceProvider
+
+
+class FakeTicker:
+    """yf.Ticker stand-in that memoizes its expiration list per instance."""
+
+    listings = 0
+
+    def __init__(self, ticker: str):
+        self._expirations = {}
+
+    @property
+    def options(self):
+        if not self._expirations:
+            FakeTicker.listings += 1
+            self._expirations = {f"2030-01-{FakeTicker.listings:02d}": 1}
+        return tuple(self._expirations)
+
+
+@pytest.fixture
+def chains(monkeypatch):
+    FakeTicker.listings = 0
+    monkeypatch.setattr(market_data_module.yf, "Ticker", FakeTicker)
+    monkeypatch.setattr(chain_cache_module, "market_data", YFinanceProvider())
+    keys = ("yfticker_TEST", OptionChainCache.expirations_key("TEST"))
+    for key in keys:
+        cache_service.delete(key)
+    yield OptionChainCache()
+    for key in keys:
+        cache_service.delete(key)
+
+
+def test_expirations_are_cached(chains):
+    assert chains.get_expirations("TEST") == ["2030-01-01"]
+    assert chains.get_expirations("TEST") == ["2030-01-01"]
+    assert FakeTicker.listings == 1
+
+
+def test_refresh_refetches_expirations(chains):
+    chains.get_expirations("TEST")
+    assert chains.get_expirations("TEST", refresh=True) == ["2030-01-02"]
+    assert FakeTicker.listings == 2
+    assert chains.get_expirations("TEST") == ["2030-01-02"]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.services.concurrency import AdaptiveConcurrencyLimiter
+
+
+def single_slot() -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(initial=1, min_limit=1, max_limit=1)
+
+
+def test_cancelled_after_grant_hands_the_slot_back():
+    async def main():
+        limiter = single_slot()
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+
+        # Grants the slot to the waiter, which is cancelled before it resumes
+        limiter.release("cancelled")
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert limiter.in_flight == 0
+        await asyncio.wait_for(limiter.acquire(), 1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(main())
+
+
+def test_slot_handed_back_goes_to_the_next_waiter():
+    async def main():
+        limiter = single_slot()
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        limiter.release("cancelled")
+        first.cancel()
+        await asyncio.wait_for(second, 1)
+        assert first.cancelled()
+        assert limiter.in_flight == 1
+        assert limiter.queue_depth == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_while_waiting_leaves_the_queue():
+    async def main():
+        limiter = single_slot()
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert limiter.queue_depth == 0
+        limiter.release("cancelled")
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
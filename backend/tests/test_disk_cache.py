@@ -0,0 +1,202 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.cache_service import CacheService
+from app.services.disk_cache import DiskCache
+
+
+@pytest.fixture
+def disk_path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+@pytest.fixture
+def disk(disk_path):
+    disk = DiskCache(disk_path, max_bytes=10 * 1024 * 1024)
+    yield disk
+    disk.close()
+
+
+class SlowToPickle:
+    """Holds up the writer thread while it is being pickled."""
+
+    def __init__(self, release: threading.Event):
+        self.release = release
+
+    def __reduce__(self):
+        self.release.wait(5)
+        return (str, ("slow",))
+
+
+def test_entries_expire_by_wall_clock(disk):
+    disk.set("k_1", {"a": 1}, ttl=0.2, wait=True)
+    value, remaining = disk.get("k_1")
+    assert value == {"a": 1}
+    assert 0 < remaining <= 0.2
+
+    time.sleep(0.3)
+    assert disk.get("k_1") is None
+    assert disk.expiry("k_1") is None
+
+
+def test_ttl_carries_over_a_restart(disk, disk_path):
+    CacheService(shards=1, disk=disk).set("k_1", "value", ttl=60)
+    disk.flush()
+
+    reopened = DiskCache(disk_path, max_bytes=10 * 1024 * 1024)
+    restarted = CacheService(shards=1, disk=reopened)
+    assert restarted.get("k_1") == "value"
+    remaining = restarted.expires_at("k_1") - time.monotonic()
+    assert 55 < remaining <= 60
+    reopened.close()
+
+
+def test_clear_drops_writes_queued_before_it(disk):
+    release = threading.Event()
+    disk.set("k_slow", SlowToPickle(release), ttl=60)
+    disk.set("k_1", "queued before clear", ttl=60)
+    disk.clear()
+    disk.set("k_2", "queued after clear", ttl=60)
+    release.set()
+    disk.flush()
+
+    assert disk.get("k_slow") is None
+    assert disk.get("k_1") is None
+    assert disk.get("k_2")[0] == "queued after clear"
+
+
+def test_get_async_reads_disk_off_the_event_loop(disk, disk_path):
+    disk.set("k_1", "value", ttl=60, wait=True)
+    cache = CacheService(shards=1, disk=disk)
+    readers = []
+    read = disk.get
+
+    def recording_get(key):
+        readers.append(threading.get_ident())
+        return read(key)
+
+    disk.get = recording_get
+    assert asyncio.run(cache.get_async("k_1")) == "value"
+    assert readers and threading.get_ident() not in readers
+
+    # Promoted to memory, so the next read doesn't touch disk
+    assert asyncio.run(cache.get_async("k_1")) == "value"
+    assert len(readers) == 1
+
+
+def test_lease_excludes_other_holders_until_released(disk, disk_path):
+    other = DiskCache(disk_path, max_bytes=10 * 1024 * 1024)
+    token = disk.try_lease("k_1")
+    assert token is not None
+    assert other.try_lease("k_1") is None
+    assert other.lease_held("k_1")
+
+    disk.release_lease("k_1", token)
+    assert not other.lease_held("k_1")
+    assert other.try_lease("k_1") is not None
+    other.close()
+
+
+def test_lapsed_lease_can_be_taken_over(disk, disk_path):
+    other = DiskCache(disk_path, max_bytes=10 * 1024 * 1024)
+    stale = disk.try_lease("k_1", ttl=0.1)
+    time.sleep(0.2)
+    assert other.try_lease("k_1") is not None
+    # The old holder's release doesn't free the new holder's lease
+    disk.release_lease("k_1", stale)
+    assert other.lease_held("k_1")
+    other.close()
+
+
+def test_workers_share_one_load(disk, disk_path):
+    """Two caches on one file, like two uvicorn workers, load a key once."""
+    other_disk = DiskCache(disk_path, max_bytes=10 * 1024 * 1024)
+    workers = [CacheService(shards=1, disk=disk), CacheService(shards=1, disk=other_disk)]
+    loads = []
+    loading = threading.Event()
+
+    def loader():
+        loads.append(threading.get_ident())
+        loading.set()
+        time.sleep(0.3)
+        return "value"
+
+    results = {}
+
+    def first():
+        results["first"] = workers[0].load("k_1", loader, ttl=60)
+
+    def second():
+        loading.wait(5)
+        results["second"] = workers[1].load("k_1", loader, ttl=60)
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert results == {"first": "value", "second": "value"}
+    assert len(loads) == 1
+    assert other_disk.stats()["lease_conflicts"] >= 1
+    other_disk.close()
+
+
+def test_async_waiters_share_another_workers_load(disk, disk_path):
+    other_disk = DiskCache(disk_path, max_bytes=10 * 1024 * 1024)
+    worker = CacheService(shards=1, disk=other_disk)
+    token = disk.try_lease("k_1")
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        return "own load"
+
+    async def main():
+        waiter = asyncio.ensure_future(worker.get_or_compute("k_1", loader, ttl=60))
+        await asyncio.sleep(0.2)
+        assert not waiter.done()
+        # The lease holder finishes its load
+        disk.set("k_1", "shared load", ttl=60, wait=True)
+        disk.release_lease("k_1", token)
+        return await asyncio.wait_for(waiter, 5)
+
+    assert asyncio.run(main()) == "shared load"
+    assert loads == []
+    other_disk.close()
+
+
+def test_leased_loads_keep_sqlite_off_the_event_loop(disk, disk_path):
+    other_disk = DiskCache(disk_path, max_bytes=10 * 1024 * 1024)
+    worker = CacheService(shards=1, disk=other_disk)
+    callers = []
+    for name in ("expiry", "try_lease", "release_lease", "lease_held", "get"):
+        method = getattr(other_disk, name)
+
+        def recording(*args, _method=method, **kwargs):
+            callers.append(threading.get_ident())
+            return _method(*args, **kwargs)
+
+        setattr(other_disk, name, recording)
+
+    async def loader():
+        return "own load"
+
+    async def main():
+        loop_thread = threading.get_ident()
+        # k_1 is loaded under this worker's lease, k_2 waited for
+        assert await worker.get_or_compute("k_1", loader, ttl=60) == "own load"
+        token = disk.try_lease("k_2")
+        waiter = asyncio.ensure_future(worker.get_or_compute("k_2", loader, ttl=60))
+        await asyncio.sleep(0.2)
+        disk.set("k_2", "shared load", ttl=60, wait=True)
+        disk.release_lease("k_2", token)
+        assert await asyncio.wait_for(waiter, 5) == "shared load"
+        return loop_thread
+
+    loop_thread = asyncio.run(main())
+    assert callers and loop_thread not in callers
+    other_disk.close()
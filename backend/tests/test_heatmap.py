@@ -0,0 +1,73 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.heatmap_service import HEATMAP_PERIODS, compute_period_changes, history_start
+from app.services.market_data import _slice_period
+
+
+# yfinance period each heatmap period was downloaded with, one download each
+PERIOD_MAP = {"1d": "2d", "1w": "7d", "1m": "1mo", "3m": "3mo", "ytd": "ytd"}
+
+TODAY = date(2026, 3, 20)
+
+
+def close_matrix() -> pd.DataFrame:
+    """Daily closes from mid 2025 to TODAY, with gaps and missing tickers."""
+    index = pd.bdate_range("2025-06-02", TODAY)
+    rng = np.random.default_rng(0)
+    close = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(index), 6)), axis=0)),
+        index=index,
+        columns=["GAPS", "LATE", "STALE", "ONE", "EMPTY", "FULL"],
+    )
+    close.loc[rng.random(len(index)) < 0.2, "GAPS"] = np.nan
+    # Listed in February
+    close.loc[:"2026-02-10", "LATE"] = np.nan
+    # No close for the last three days
+    close.iloc[-3:, close.columns.get_loc("STALE")] = np.nan
+    # A single close, on the last day
+    close["ONE"] = np.nan
+    close.iloc[-1, close.columns.get_loc("ONE")] = 50.0
+    close["EMPTY"] = np.nan
+    return close
+
+
+def per_ticker_changes(close: pd.DataFrame, period: str) -> dict:
+    """The pre-vectorized build: slice the period, then dropna per ticker."""
+    window = _slice_period(close, PERIOD_MAP[period], None)
+    changes = {}
+    for ticker in window.columns:
+        prices = window[ticker].dropna()
+        if len(prices) >= 2:
+            current = prices.iloc[-1]
+            previous = prices.iloc[0]
+            changes[ticker] = {
+                "price": float(current),
+                "change": float((current - previous) / previous * 100),
+            }
+    return changes
+
+
+@pytest.mark.parametrize("period", HEATMAP_PERIODS)
+def test_period_changes_match_the_per_ticker_loop(period):
+    close = close_matrix()
+    close = close[close.index >= pd.Timestamp(history_start(TODAY))]
+    changes = compute_period_changes(close)
+    expected = per_ticker_changes(close, period)
+
+    assert set(changes.index[changes[period].notna()]) == set(expected)
+    for ticker, values in expected.items():
+        assert changes.loc[ticker, "price"] == pytest.approx(values["price"])
+        assert changes.loc[ticker, period] == pytest.approx(values["change"])
+
+
+def test_history_start_covers_every_period():
+    assert history_start(TODAY) == date(2025, 12, 13)
+    assert history_start(date(2026, 8, 14)) == date(2026, 1, 1)
+
+    close = close_matrix()
+    trimmed = close[close.index >= pd.Timestamp(history_start(TODAY))]
+    pd.testing.assert_frame_equal(compute_period_changes(trimmed), compute_period_changes(close))
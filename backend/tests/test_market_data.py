@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from app.services import market_data as market_data_module
+from app.services import ticker_data as ticker_data_module
+from app.services.cache_service import cache_service
+from app.services.concurrency import TokenBucket
+from app.services.market_data import (
+    RateLimitedProvider,
+    RecordingProvider,
+    ReplayProvider,
+    YFinanceProvider,
+)
+from app.services.ticker_data import TickerDataService
+
+
+class FakeTicker:
+    """Stands in for yf.Ticker, memoizing fetched data per instance like it does."""
+
+    created: list["FakeTicker"] = []
+    fetches: dict[str, int] = {}
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self._info = None
+        self._expirations = {}
+        FakeTicker.created.append(self)
+
+    @classmethod
+    def _fetch(cls, name: str):
+        cls.fetches[name] = cls.fetches.get(name, 0) + 1
+        return cls.fetches[name]
+
+    @property
+    def info(self):
+        if self._info is None:
+            self._info = {"currentPrice": self._fetch("info")}
+        return self._info
+
+    @property
+    def news(self):
+        return [{"n": self._fetch("news")}]
+
+    @property
+    def recommendations(self):
+        self._fetch("recommendations")
+        return pd.DataFrame({"period": ["0m", "-1m"], "buy": [10, 8]})
+
+    @property
+    def analyst_price_targets(self):
+        self._fetch("analyst_price_targets")
+        return {"current": 101.5, "mean": 120.0}
+
+    @property
+    def options(self):
+        if not self._expirations:
+            self._fetch("options")
+            self._expirations = {"2030-01-18": 1}
+        return tuple(self._expirations)
+
+    def option_chain(self, expiration):
+        assert expiration in self.options
+        self._fetch("option_chain")
+        frame = pd.DataFrame({"strike": [100.0]})
+        return type("Options", (), {"calls": frame, "puts": frame})
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    FakeTicker.created = []
+    FakeTicker.fetches = {}
+    monkeypatch.setattr(market_data_module.yf, "Ticker", FakeTicker)
+    cache_service.delete("yfticker_TEST")
+    yield YFinanceProvider()
+    cache_service.delete("yfticker_TEST")
+
+
+def test_info_and_news_are_fetched_live_every_call(provider):
+    assert provider.info("TEST") == {"currentPrice": 1}
+    assert provider.info("TEST") == {"currentPrice": 2}
+    provider.news("TEST")
+    provider.news("TEST")
+    assert FakeTicker.fetches["news"] == 2
+
+
+def test_chain_fetches_share_one_ticker(provider):
+    provider.options("TEST")
+    provider.option_chain("TEST", "2030-01-18")
+    provider.option_chain("TEST", "2030-01-18")
+    assert FakeTicker.fetches["options"] == 1
+    assert FakeTicker.fetches["option_chain"] == 2
+    assert len(FakeTicker.created) == 1
+
+
+def test_ticker_data_refetches_from_upstream_after_its_ttl(provider, monkeypatch):
+    monkeypatch.setattr(ticker_data_module, "market_data", provider)
+    service = TickerDataService(ttl=0.2)
+    cache_service.delete(service.key("TEST", "info"))
+
+    async def fetch_twice():
+        return await service.info("TEST"), await service.info("TEST")
+
+    assert asyncio.run(fetch_twice()) == ({"currentPrice": 1}, {"currentPrice": 1})
+    time.sleep(0.3)
+    assert asyncio.run(service.info("TEST")) == {"currentPrice": 2}
+    assert FakeTicker.fetches["info"] == 2
+    cache_service.delete(service.key("TEST", "info"))
+
+
+def test_ticker_attributes_are_rate_limited_and_replayable(provider, tmp_path):
+    bucket = TokenBucket(rate=1000, burst=1000)
+    recorder = RateLimitedProvider(RecordingProvider(provider, tmp_path), bucket)
+    recommendations = recorder.ticker_attribute("TEST", "recommendations")
+    targets = recorder.ticker_attribute("TEST", "analyst_price_targets")
+    assert bucket.stats()["acquired"] == 2
+
+    replay = ReplayProvider(tmp_path)
+    assert replay.ticker_attribute("TEST", "analyst_price_targets") == targets
+    pd.testing.assert_frame_equal(replay.ticker_attribute("TEST", "recommendations"), recommendations)
+    assert replay.ticker_attribute("TEST", "major_holders") is None
@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.requests import ScanRequest
+from app.services.option_filter import filter_option_chain
+
+from scripts.benchmark_option_filter import make_chain, process_option_row
+
+
+STOCK_PRICE = 180.0
+EXP = date.today() + timedelta(days=21)
+
+
+def chain_with_nan_rows(seed: int):
+    rng = np.random.default_rng(seed)
+    df = make_chain(rng, STOCK_PRICE, 60)
+    for column in ("lastPrice", "bid", "ask", "volume", "openInterest", "impliedVolatility"):
+        df.loc[rng.random(len(df)) < 0.15, column] = np.nan
+    return df
+
+
+def per_row(df, opt_type, request) -> list[dict]:
+    """
+    process_option_row() over every row, with the vectorized path's
+    deliberate NaN differences applied: a contract with no last price is
+    dropped, missing volume and open interest count as 0 (per row, int(nan)
+    raised and lost the whole ticker), and missing bid, ask and IV are None.
+    """
+    results = []
+    for _, row in df.iterrows():
+        if np.isnan(row["lastPrice"]):
+            continue
+        row = row.fillna({"volume": 0, "openInterest": 0})
+        option = process_option_row(row, "TEST", STOCK_PRICE, EXP, 21, opt_type, 22.5, None, request)
+        if option is None:
+            continue
+        data = option.model_dump(mode="json")
+        for field in ("bid", "ask", "implied_volatility"):
+            if data[field] != data[field]:
+                data[field] = None
+        results.append(data)
+    return results
+
+
+@pytest.mark.parametrize("opt_type", ["call", "put"])
+@pytest.mark.parametrize("filters", [
+    {},
+    {"moneyness": "otm", "min_volume": 1000},
+    {"moneyness": "itm", "min_roi": 1.0},
+    {"available_collateral": 19000, "min_roi": 0.5},
+])
+def test_filter_option_chain_matches_the_per_row_filter(opt_type, filters):
+    request = ScanRequest(**filters)
+    for seed in range(5):
+        df = chain_with_nan_rows(seed)
+        vectorized = filter_option_chain(df, "TEST", STOCK_PRICE, EXP, 21, opt_type, 22.5, None, request)
+        expected = per_row(df, opt_type, request)
+        assert expected
+        assert [r.to_dict() for r in vectorized] == expected
+
+
+def test_contract_with_no_last_price_is_dropped():
+    df = chain_with_nan_rows(0)
+    df["lastPrice"] = np.nan
+    assert filter_option_chain(df, "TEST", STOCK_PRICE, EXP, 21, "put", None, None, ScanRequest()) == []
@@ -0,0 +1,58 @@
+import asyncio
+
+from app.models.requests import ScanRequest
+from app.services.cache_service import cache_service
+from app.services.ranking import TopK
+from app.services.scan_result_cache import scan_result_cache
+from app.services.scanner_service import scanner_service
+
+from tests.conftest import FAKE_TICKERS
+
+
+BROAD = {"universe": "custom", "custom_tickers": ",".join(FAKE_TICKERS)}
+
+
+def scan(request: ScanRequest, ranking=None) -> list:
+    async def collect():
+        return [
+            event
+            async for event in scanner_service.scan_options(request, ranking=ranking)
+        ]
+    return asyncio.run(collect())
+
+
+def test_ranked_scan_skips_expirations_and_keeps_the_top_k(fake_market):
+    # A year of weekly expirations; the far ones can't reach the top K
+    fake_market.expirations = 52
+    request = ScanRequest(**BROAD, max_dte=400)
+
+    full = [e["record"] for e in scan(request) if e["type"] == "result"]
+    full_chains = fake_market.calls["option_chain"]
+    assert full_chains == len(FAKE_TICKERS) * 52
+
+    # Cold caches, so every chain the ranked scan wants is an upstream fetch
+    cache_service.clear()
+    scan_result_cache.clear()
+    fake_market.calls.clear()
+    ranking = TopK("annualized_roi", 20)
+    scan(request, ranking)
+
+    assert ranking.skipped_expirations > 0
+    assert fake_market.calls["option_chain"] < full_chains / 2
+    # Every skipped expiration is a chain that was never fetched
+    assert ranking.skipped_tickers == 0
+    assert fake_market.calls["option_chain"] + ranking.skipped_expirations == full_chains
+    best = sorted((r.annualized_roi for r in full), reverse=True)[:20]
+    assert [r.annualized_roi for r in ranking.results()] == best
+
+
+def test_collateral_rules_out_calls_before_any_chain_is_fetched(fake_market):
+    cap = 27000
+    affordable = [t for t in FAKE_TICKERS if fake_market.price(t) * 100 <= cap]
+    assert 0 < len(affordable) < len(FAKE_TICKERS)
+
+    events = scan(ScanRequest(**BROAD, option_type="calls", available_collateral=cap))
+
+    assert {e["record"].ticker for e in events if e["type"] == "result"} <= set(affordable)
+    assert fake_market.calls["options"] == len(affordable)
+    assert fake_market.calls["option_chain"] == len(affordable) * fake_market.expirations
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.models.requests import ScanRequest
+from app.services.cache_service import cache_service, estimate_size
+from app.services.scan_result_cache import (
+    ScanResultCache,
+    canonical_request,
+    is_narrower,
+    scan_result_cache,
+)
+from app.services.scanner_service import scanner_service
+
+from tests.conftest import FAKE_TICKERS
+
+
+BROAD = {"universe": "custom", "custom_tickers": ",".join(FAKE_TICKERS)}
+
+# Each narrows BROAD along one or more bounds
+NARROWER = [
+    {"min_stock_price": 100},
+    {"max_stock_price": 250},
+    {"min_pe_ratio": 15},
+    {"max_pe_ratio": 30},
+    {"min_pe_ratio": 10, "max_pe_ratio": 40},
+    {"available_collateral": 15000},
+    {"min_volume": 2500},
+    {"min_roi": 1.5},
+    {"min_dte": 10},
+    {"max_dte": 20},
+    {"option_type": "puts"},
+    {"option_type": "calls", "moneyness": "otm"},
+    {"moneyness": "itm", "min_roi": 0.5, "max_dte": 25},
+]
+
+
+def scan(request: ScanRequest) -> list:
+    async def collect():
+        return [
+            event["record"]
+            async for event in scanner_service.scan_options(request)
+            if event["type"] == "result"
+        ]
+    return asyncio.run(collect())
+
+
+def canonical(**filters) -> dict:
+    return canonical_request(ScanRequest(**BROAD, **filters))
+
+
+def test_is_narrower():
+    assert is_narrower(canonical(min_roi=2), canonical(min_roi=1))
+    assert is_narrower(canonical(min_roi=1), canonical())
+    assert is_narrower(canonical(max_dte=30, option_type="puts"), canonical(max_dte=45))
+    assert is_narrower(canonical(), canonical())
+
+    assert not is_narrower(canonical(min_roi=1), canonical(min_roi=2))
+    assert not is_narrower(canonical(), canonical(max_pe_ratio=30))
+    assert not is_narrower(canonical(option_type="calls"), canonical(option_type="puts"))
+    assert not is_narrower(canonical(moneyness="both"), canonical(moneyness="otm"))
+    # Unset and zero bounds both mean no filter
+    assert is_narrower(canonical(min_volume=0), canonical())
+
+
+@pytest.mark.parametrize("filters", NARROWER)
+def test_narrowed_results_match_a_fresh_scan(fake_market, filters):
+    scan(ScanRequest(**BROAD))
+    request = ScanRequest(**BROAD, **filters)
+
+    cached = scan_result_cache.find(request)
+    assert cached is not None and cached["narrowed"]
+
+    scan_result_cache.clear()
+    fresh = scan(request)
+    assert fresh, "filters should leave some results to compare"
+    assert sorted(cached["results"]) == sorted(fresh)
+
+
+def test_broader_request_is_not_answered_from_cache(fake_market):
+    scan(ScanRequest(**BROAD, min_roi=1))
+    assert scan_result_cache.find(ScanRequest(**BROAD, min_roi=1)) is not None
+    assert scan_result_cache.find(ScanRequest(**BROAD)) is None
+
+
+def test_budget_evicts_least_recently_used_scans(fake_market):
+    records = scan(ScanRequest(**BROAD))
+    cache_service.set("price_TSTA", 1.0)
+    size = estimate_size(records)
+    cache = ScanResultCache(max_bytes=int(size * 1.5))
+
+    first = ScanRequest(**BROAD, min_roi=0.1)
+    second = ScanRequest(**BROAD, min_roi=0.2)
+    cache.store(first, records, None, {"price_TSTA"})
+    cache.store(second, records, None, {"price_TSTA"})
+
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert cache.stats()["evictions"] == 1
+    assert cache.find(second) is not None
+    assert cache.find(first) is None
@@ -0,0 +1,32 @@
+import asyncio
+
+from app.models.requests import ScanRequest
+from app.services.scanner_service import scanner_service
+
+from tests.conftest import FAKE_TICKERS
+
+
+BROAD = {"universe": "custom", "custom_tickers": ",".join(FAKE_TICKERS)}
+
+
+def scan(request: ScanRequest) -> list:
+    async def collect():
+        return [event async for event in scanner_service.scan_options(request)]
+    return asyncio.run(collect())
+
+
+def test_ticker_that_fails_still_reports_progress(fake_market, monkeypatch):
+    options = fake_market.options
+
+    def failing_options(ticker):
+        if ticker == "TSTB":
+            raise RuntimeError("upstream error")
+        return options(ticker)
+
+    monkeypatch.setattr(fake_market, "options", failing_options)
+    events = scan(ScanRequest(**BROAD))
+
+    scanning = [e["data"] for e in events if e["type"] == "progress" and e["data"]["current_ticker"]]
+    assert {p["current_ticker"] for p in scanning} == set(FAKE_TICKERS)
+    assert scanning[-1]["tickers_scanned"] == len(FAKE_TICKERS)
+    assert "TSTB" not in {e["record"].ticker for e in events if e["type"] == "result"}
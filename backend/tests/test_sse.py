@@ -0,0 +1,60 @@
+import asyncio
+
+from app.utils.sse import batch_scan_events
+
+
+def result(n: int) -> dict:
+    return {"type": "result", "data": {"n": n}}
+
+
+def batches(out: list[dict]) -> list[list[int]]:
+    return [[row["n"] for row in event["data"]] for event in out if event["type"] == "results"]
+
+
+async def collect(events, **kwargs) -> list[dict]:
+    return [event async for event in batch_scan_events(events, **kwargs)]
+
+
+def test_flushes_by_count():
+    async def source():
+        for n in range(5):
+            yield result(n)
+        yield {"type": "complete", "data": {}}
+
+    out = asyncio.run(collect(source(), max_rows=2, max_delay=10))
+    assert batches(out) == [[0, 1], [2, 3], [4]]
+    # The partial batch is sent before the event that closed it
+    assert [event["type"] for event in out] == ["results", "results", "results", "complete"]
+
+
+def test_flushes_by_time():
+    async def source():
+        yield result(0)
+        yield result(1)
+        await asyncio.sleep(0.3)
+        yield result(2)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        sent = []
+        async for event in batch_scan_events(source(), max_rows=100, max_delay=0.05):
+            sent.append((loop.time() - start, event))
+        return sent
+
+    sent = asyncio.run(main())
+    assert batches([event for _, event in sent]) == [[0, 1], [2]]
+    # The first batch went out when its window closed, not when the next row came
+    assert sent[0][0] < 0.2
+
+
+def test_throttles_progress_and_sends_the_latest():
+    async def source():
+        for n in range(5):
+            yield {"type": "progress", "data": {"n": n}}
+        yield {"type": "complete", "data": {}}
+
+    out = asyncio.run(collect(source(), progress_interval=10))
+    assert [(e["type"], e["data"].get("n")) for e in out] == [
+        ("progress", 0), ("progress", 4), ("complete", None),
+    ]
@@ -55,7 +55,8 @@ export function useScanner() {
     }));
 
     try {
-      const response = await fetch(`${API_URL}/api/v1/scan`, {
+      // Batched mode: results arrive as arrays and progress is throttled
+      const response = await fetch(`${API_URL}/api/v1/scan?batch=true`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -108,7 +109,19 @@ export function useScanner() {
             try {
               const data = JSON.parse(line.slice(6));
 
-              if (data.total_results !== undefined) {
+              if (Array.isArray(data)) {
+                // Results event (a batch of results)
+                setState((prev) => ({
+                  ...prev,
+                  results: [...prev.results, ...data],
+                }));
+              } else if (data.sort_by !== undefined) {
+                // Top-K event (sort_by mode): replaces the current results
+                setState((prev) => ({
+                  ...prev,
+                  results: data.results,
+                }));
+              } else if (data.total_results !== undefined) {
                 // Complete event (check first since it also has status field)
                 setState((prev) => ({
                   ...prev,
@@ -17,6 +17,14 @@ interface CacheEntry {
   fetchedAt: number;
 }
 
+// /overview response: each section in its own endpoint's format
+interface TickerOverview {
+  snapshot: TickerSnapshot;
+  history: { history?: PriceHistoryPoint[] };
+  news: { news?: NewsArticle[] };
+  filings: { filings?: SecFiling[] };
+}
+
 interface UseTickerSnapshotReturn {
   ticker: string;
   snapshot: TickerSnapshot | null;
@@ -48,41 +56,38 @@ export function useTickerSnapshot(initialTicker?: string): UseTickerSnapshotRetu
 
   const abortControllerRef = useRef<AbortController | null>(null);
 
-  // Fetch main snapshot data
-  const fetchSnapshot = useCallback(async (t: string, signal: AbortSignal) => {
-    const upperTicker = t.toUpperCase();
-
-    // Check cache
-    const cached = snapshotCache.get(upperTicker);
-    if (cached && Date.now() - cached.fetchedAt < CACHE_TTL) {
-      return cached.data;
-    }
-
-    const response = await fetch(
-      `${API_URL}/api/v1/stock/${upperTicker}/snapshot`,
-      { signal }
-    );
+  // Fetch the snapshot with its history, news and filings in one call
+  const fetchOverview = useCallback(
+    async (t: string, period: ChartPeriod, signal: AbortSignal) => {
+      const upperTicker = t.toUpperCase();
 
-    if (!response.ok) {
-      throw new Error(
-        response.status === 404
-          ? `Ticker "${upperTicker}" not found`
-          : `Failed to fetch snapshot: ${response.statusText}`
+      const response = await fetch(
+        `${API_URL}/api/v1/stock/${upperTicker}/overview?period=${period}&news_limit=5&filings_limit=5`,
+        { signal }
       );
-    }
 
-    const data: TickerSnapshot = await response.json();
+      if (!response.ok) {
+        throw new Error(
+          response.status === 404
+            ? `Ticker "${upperTicker}" not found`
+            : `Failed to fetch snapshot: ${response.statusText}`
+        );
+      }
+
+      const data: TickerOverview = await response.json();
 
-    // Check for API-level error
-    if (data.error) {
-      throw new Error(data.error);
-    }
+      // Check for API-level error
+      if (data.snapshot.error) {
+        throw new Error(data.snapshot.error);
+      }
 
-    // Update cache
-    snapshotCache.set(upperTicker, { data, fetchedAt: Date.now() });
+      // Update cache
+      snapshotCache.set(upperTicker, { data: data.snapshot, fetchedAt: Date.now() });
 
-    return data;
-  }, []);
+      return data;
+    },
+    []
+  );
 
   // Fetch price history
   const fetchPriceHistory = useCallback(async (t: string, period: ChartPeriod) => {
@@ -149,19 +154,28 @@ export function useTickerSnapshot(initialTicker?: string): UseTickerSnapshotRetu
       setError(null);
 
       try {
-        // Fetch snapshot first (main data)
-        const snapshotData = await fetchSnapshot(
-          upperTicker,
-          abortControllerRef.current.signal
-        );
-        setSnapshot(snapshotData);
-
-        // Fetch supplementary data in parallel (don't block on these)
-        Promise.all([
-          fetchPriceHistory(upperTicker, chartPeriod),
-          fetchNews(upperTicker),
-          fetchFilings(upperTicker),
-        ]);
+        const cached = snapshotCache.get(upperTicker);
+        if (cached && Date.now() - cached.fetchedAt < CACHE_TTL) {
+          setSnapshot(cached.data);
+
+          // Fetch supplementary data in parallel (don't block on these)
+          Promise.all([
+            fetchPriceHistory(upperTicker, chartPeriod),
+            fetchNews(upperTicker),
+            fetchFilings(upperTicker),
+          ]);
+        } else {
+          // One round trip; the backend fetches all of it in parallel
+          const overview = await fetchOverview(
+            upperTicker,
+            chartPeriod,
+            abortControllerRef.current.signal
+          );
+          setSnapshot(overview.snapshot);
+          setPriceHistory(overview.history.history || []);
+          setNews(overview.news.news || []);
+          setFilings(overview.filings.filings || []);
+        }
       } catch (err) {
         if ((err as Error).name === "AbortError") return;
         setError((err as Error).message);
@@ -170,7 +184,7 @@ export function useTickerSnapshot(initialTicker?: string): UseTickerSnapshotRetu
         setIsLoading(false);
       }
     },
-    [fetchSnapshot, fetchPriceHistory, fetchNews, fetchFilings, chartPeriod]
+    [fetchOverview, fetchPriceHistory, fetchNews, fetchFilings, chartPeriod]
   );
 
   // Re-fetch history when chart period changes
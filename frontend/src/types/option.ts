@@ -17,4 +17,5 @@ export interface OptionResult {
   moneyness: "ITM" | "OTM";
   pe_ratio: number | null;
   next_earnings_date: string | null;
+  data_age_seconds?: number | null; // Set when served from a prefetched snapshot
 }